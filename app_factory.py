@@ -0,0 +1,128 @@
+import logging
+from typing import List, Optional
+
+from aiogram import Bot, Dispatcher, Router
+from aiogram.client.default import DefaultBotProperties
+from aiogram.enums import ParseMode
+
+from config import config
+from utils.http_session import create_session
+from utils.startup_report import startup_report, FirstUpdateMiddleware
+from utils.verticals import Vertical, VerticalMiddleware, get_vertical
+
+logger = logging.getLogger(__name__)
+
+def get_business_types(business_type: Optional[str] = None) -> List[str]:
+    """Parse a business type setting; several can be given separated by commas"""
+    business_type = business_type or config.business_type
+    return [name.strip() for name in business_type.split(",") if name.strip()]
+
+def load_routers(verticals: List[Vertical]) -> List[Router]:
+    """Import the handler modules of the given verticals, each router once"""
+    routers = []
+    for vertical in verticals:
+        for router in vertical.load_routers():
+            if router not in routers:
+                routers.append(router)
+    return routers
+
+def create_bot() -> Bot:
+    """Create the Bot instance from configuration"""
+    return Bot(
+        token=config.token,
+        session=create_session(config),
+        default=DefaultBotProperties(parse_mode=ParseMode.HTML)
+    )
+
+def create_dispatcher(business_type: Optional[str] = None, load_stores: bool = True) -> Dispatcher:
+    """Build a Dispatcher with the routers of the given business type(s)
+    
+    Subsystems are imported here, and optional ones only when enabled, so
+    importing this module stays cheap.
+    """
+    from utils.dedup import UpdateDeduplicator
+    from utils.i18n import translations
+    from utils.lifecycle import LifecycleManager
+    from utils.maintenance import maintenance
+    
+    verticals = [get_vertical(name) for name in get_business_types(business_type)]
+    
+    dp = Dispatcher()
+    dedup = UpdateDeduplicator(config.dedup_file, config.dedup_window)
+    dp["dedup"] = dedup
+    lifecycle = LifecycleManager(config.lifecycle_file, config.drain_timeout)
+    dp["lifecycle"] = lifecycle
+    recorder = None
+    if config.record_updates:
+        from utils.recorder import Anonymizer, UpdateRecorder
+        secret = config.record_secret.encode() if config.record_secret else None
+        recorder = UpdateRecorder(config.record_dir, Anonymizer(secret, admin_ids=[config.admin_id]))
+        dp["recorder"] = recorder
+    
+    with startup_report.measure("router_import"):
+        routers = load_routers(verticals)
+    dp.include_routers(*routers)
+    
+    # Business info (contact, location, hours) is read by the menu handlers from the restaurant store
+    settings_sync = None
+    if any("handlers.menu" in vertical.router_modules for vertical in verticals):
+        from database.business_info import settings_sync
+        from database.db_helper import db
+    
+    async def load_storage() -> None:
+        """Read the active verticals' stores before the first update arrives"""
+        with startup_report.measure("storage_load"):
+            for vertical in verticals:
+                vertical.load_store()
+        startup_report.mark("ready")
+        startup_report.log()
+    
+    def all_stores() -> List:
+        """Every loaded store of the active verticals, tenant stores included"""
+        stores = []
+        for vertical in verticals:
+            for store in vertical.store.all_stores():
+                if store not in stores:
+                    stores.append(store)
+        return stores
+    
+    async def start_maintenance() -> None:
+        maintenance.cart_ttl = config.cart_ttl_hours * 3600
+        maintenance.interval = config.maintenance_interval
+        maintenance.start(all_stores)
+        if settings_sync is not None:
+            settings_sync.interval = config.settings_sync_interval
+            settings_sync.start(db.all_stores)
+    
+    async def flush_storage() -> None:
+        """Let running handlers finish, then make sure snapshot writes reach the disk"""
+        await lifecycle.drain(dp.get("ingress"))
+        await maintenance.stop()
+        if settings_sync is not None:
+            await settings_sync.stop()
+        for vertical in verticals:
+            await vertical.flush_store()
+        await dedup.flush()
+        await lifecycle.save()
+        if recorder is not None:
+            await recorder.flush()
+    
+    if load_stores:
+        dp.startup.register(load_storage)
+    dp.startup.register(translations.load)
+    dp.startup.register(dedup.load)
+    dp.startup.register(lifecycle.load)
+    dp.startup.register(start_maintenance)
+    dp.shutdown.register(flush_storage)
+    if recorder is not None:
+        # Outermost, so recorded timings include the other middlewares
+        dp.update.outer_middleware(recorder)
+    dp.update.outer_middleware(FirstUpdateMiddleware(startup_report))
+    dp.update.outer_middleware(lifecycle)
+    dp.update.outer_middleware(dedup)
+    # The first listed vertical serves the bot's updates
+    dp.update.outer_middleware(VerticalMiddleware(verticals[0]))
+    
+    names = ", ".join(vertical.name for vertical in verticals)
+    logger.info(f"Dispatcher created for '{names}' with {len(routers)} routers")
+    return dp
@@ -0,0 +1,105 @@
+# benchmarks/bench_callback_routing.py
+# Routing cost of callback queries as handlers are added: F.data.startswith filters checked one by one
+# vs the CallbackRoutes trie, through a full Dispatcher and for the lookup alone; plus payload sizes.
+# Usage: python benchmarks/bench_callback_routing.py [iterations]
+import asyncio
+import os
+import sys
+import time
+import timeit
+from datetime import date, time as clock
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from aiogram import Bot, Dispatcher, F, Router
+from aiogram.types import Update
+
+from keyboards.callbacks import TimePick
+from utils.callbacks import CallbackSchema, CallbackRoutes
+
+HANDLER_COUNTS = (8, 32, 128, 512)
+
+async def handler(callback):
+    return None
+
+def build_schemas(count: int):
+    return [
+        type(f"Pick{i}", (CallbackSchema,), {"__annotations__": {"item_id": int}}, prefix=f"pick{i}")
+        for i in range(count)
+    ]
+
+def filter_router(count: int) -> Router:
+    router = Router()
+    for i in range(count):
+        router.callback_query.register(handler, F.data.startswith(f"pick{i}_"))
+    return router
+
+def trie_router(count: int) -> Router:
+    router = Router()
+    callbacks = CallbackRoutes(router)
+    for schema in build_schemas(count):
+        callbacks.add(schema, handler)
+    return router
+
+def callback_update(bot: Bot, data: str) -> Update:
+    return Update.model_validate({
+        "update_id": 1,
+        "callback_query": {
+            "id": "1", "chat_instance": "1", "data": data,
+            "from": {"id": 1, "is_bot": False, "first_name": "Bench"}
+        }
+    }, context={"bot": bot})
+
+async def feed_cost(router: Router, data: str, iterations: int) -> float:
+    """Microseconds per Dispatcher.feed_update of one callback query"""
+    dp = Dispatcher()
+    dp.include_router(router)
+    bot = Bot("42:bench")
+    update = callback_update(bot, data)
+    for _ in range(100):
+        await dp.feed_update(bot, update)
+    started = time.perf_counter()
+    for _ in range(iterations):
+        await dp.feed_update(bot, update)
+    elapsed = time.perf_counter() - started
+    await bot.session.close()
+    return elapsed / iterations * 1e6
+
+def lookup_cost(count: int, data: str, iterations: int):
+    """Microseconds to find the handler: linear prefix checks vs the trie"""
+    prefixes = [f"pick{i}_" for i in range(count)]
+    callbacks = CallbackRoutes()
+    for schema in build_schemas(count):
+        callbacks.add(schema, handler)
+    
+    def linear():
+        for prefix in prefixes:
+            if data.startswith(prefix):
+                return int(data.split("_")[1])
+    
+    linear_us = timeit.timeit(linear, number=iterations) / iterations * 1e6
+    trie_us = timeit.timeit(lambda: callbacks.resolve(data), number=iterations) / iterations * 1e6
+    return linear_us, trie_us
+
+async def main():
+    iterations = int(sys.argv[1]) if len(sys.argv) > 1 else 2000
+    
+    print(f"{'handlers':>8} {'target':>7} {'filters µs':>11} {'trie µs':>9} {'lookup linear':>14} {'lookup trie':>12}")
+    for count in HANDLER_COUNTS:
+        for label, index in (("first", 0), ("last", count - 1)):
+            data = f"pick{index}_12345"
+            filters_us = await feed_cost(filter_router(count), data, iterations)
+            trie_us = await feed_cost(trie_router(count), data, iterations)
+            linear_lookup, trie_lookup = lookup_cost(count, data, iterations * 10)
+            print(f"{count:>8} {label:>7} {filters_us:>11.1f} {trie_us:>9.1f} {linear_lookup:>14.2f} {trie_lookup:>12.2f}")
+    
+    # Longest payload in the tree: a booking time slot
+    payload = TimePick(9999, date(2026, 12, 31), clock(17, 30))
+    old = f"time_{payload.service_id}_{payload.day.isoformat()}_{payload.slot.strftime('%H:%M')}"
+    print(f"\nBooking payload: {old!r} ({len(old)} bytes) -> {payload.pack()!r} ({len(payload.pack())} bytes)")
+    pack_us = timeit.timeit(payload.pack, number=iterations * 10) / (iterations * 10) * 1e6
+    unpack_us = timeit.timeit(lambda: TimePick.unpack(payload.pack()), number=iterations * 10) / (iterations * 10) * 1e6
+    print(f"pack {pack_us:.2f} µs, pack+unpack {unpack_us:.2f} µs")
+
+if __name__ == "__main__":
+    asyncio.run(main())
@@ -0,0 +1,81 @@
+# benchmarks/bench_codecs.py
+# Compare JSON codecs on a realistic data.json with 100k users.
+# Usage: python benchmarks/bench_codecs.py [users]
+import json
+import os
+import random
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from database.codecs import CODECS, JsonCodec, get_codec, iter_snapshot
+
+def build_data(users: int) -> dict:
+    """Database shaped like data.json: menu, carts, users, bookings, enrollments"""
+    rng = random.Random(42)
+    menu = {
+        category: [
+            {"id": i, "name": f"{category.title()} {i}", "price": round(rng.uniform(3, 30), 2),
+             "description": "Fresh ingredients, cooked to order"}
+            for i in range(start, start + 30)
+        ]
+        for category, start in (("pizza", 1), ("burgers", 31), ("drinks", 61))
+    }
+    orders, profiles, bookings, enrollments = {}, {}, {}, {}
+    for user_id in range(10_000_000, 10_000_000 + users):
+        key = str(user_id)
+        items = {str(rng.randint(1, 90)): rng.randint(1, 3) for _ in range(rng.randint(0, 4))}
+        orders[key] = {"items": items, "total": round(rng.uniform(0, 120), 2)}
+        profiles[key] = {"name": f"User {user_id}", "language": rng.choice(["en", "ru", "uz"])}
+        if user_id % 5 == 0:
+            bookings[str(len(bookings) + 1)] = {
+                "user_id": user_id, "service_id": rng.randint(1, 4), "date": "2026-10-20",
+                "time": "10:30", "status": "confirmed", "created_at": "2026-10-19T10:00:00"
+            }
+        if user_id % 7 == 0:
+            enrollments[key] = {"1": {"enrolled": True, "completed_lessons": 2,
+                                      "completed_lessons_ids": [1, 2], "progress_percentage": 16.7}}
+    return {"menu": menu, "orders": orders, "users": profiles, "bookings": bookings,
+            "enrollments": enrollments, "settings": {"delivery_fee": 2.5, "min_order": 15.0}}
+
+def timed(func, repeat: int = 3) -> float:
+    best = float("inf")
+    for _ in range(repeat):
+        start = time.perf_counter()
+        func()
+        best = min(best, time.perf_counter() - start)
+    return best
+
+def main():
+    users = int(sys.argv[1]) if len(sys.argv) > 1 else 100_000
+    data = build_data(users)
+    print(f"{users} users")
+    
+    legacy = json.dumps(data, indent=2, ensure_ascii=False)
+    dump_time = timed(lambda: json.dumps(data, indent=2, ensure_ascii=False))
+    load_time = timed(lambda: json.loads(legacy))
+    print(f"{'json indent=2 (old)':<22} dump {dump_time * 1000:8.1f} ms  load {load_time * 1000:8.1f} ms  size {len(legacy.encode()) / 1e6:6.1f} MB")
+    
+    for name in CODECS:
+        try:
+            codec = get_codec(name)
+        except ImportError:
+            print(f"{name:<22} not installed")
+            continue
+        encoded = codec.dumps(data)
+        dump_time = timed(lambda: codec.dumps(data))
+        load_time = timed(lambda: codec.loads(encoded))
+        print(f"{name:<22} dump {dump_time * 1000:8.1f} ms  load {load_time * 1000:8.1f} ms  size {len(encoded) / 1e6:6.1f} MB")
+    
+    with tempfile.NamedTemporaryFile("wb", suffix=".json", delete=False) as f:
+        f.write(JsonCodec().dumps(data))
+    try:
+        stream_time = timed(lambda: sum(1 for _ in iter_snapshot(f.name)))
+        print(f"{'iter_snapshot (stream)':<22} load {stream_time * 1000:8.1f} ms")
+    finally:
+        os.unlink(f.name)
+
+if __name__ == "__main__":
+    main()
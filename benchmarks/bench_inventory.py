@@ -0,0 +1,71 @@
+# benchmarks/bench_inventory.py
+# Many users competing for one low-stock product: reservations, checkouts and
+# abandoned carts run concurrently; checks that nothing is oversold.
+# Usage: python benchmarks/bench_inventory.py [users] [stock]
+import asyncio
+import os
+import random
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from database.enhanced_db_helper import EnhancedDatabaseHelper
+from database.inventory import OutOfStock
+
+async def shopper(db: EnhancedDatabaseHelper, user_id: int, rng: random.Random, latencies: list, outcome: dict):
+    started = time.perf_counter()
+    async with db.transaction(("cart", user_id)):
+        reserved = db.reserve_to_cart(user_id, 1, rng.randint(1, 2))
+    latencies.append(time.perf_counter() - started)
+    if not reserved:
+        outcome["rejected"] += 1
+        return
+    
+    # Time spent looking at the cart
+    await asyncio.sleep(rng.uniform(0, 0.01))
+    async with db.transaction(("cart", user_id)):
+        if rng.random() < 0.3:
+            db.clear_cart(user_id)
+            outcome["abandoned"] += 1
+            return
+        try:
+            order = db.place_order(user_id)
+        except OutOfStock:
+            outcome["out_of_stock"] += 1
+            return
+    outcome["sold"] += order["items"]["products_1"]
+
+async def run(users: int, stock: int):
+    with tempfile.TemporaryDirectory() as directory:
+        db = EnhancedDatabaseHelper(os.path.join(directory, "shop.json"), {
+            "products": {"clothing": [{"id": 1, "name": "Limited Hoodie", "price": 99.0, "stock": stock}]}
+        })
+        db.load()
+        rng = random.Random(7)
+        latencies = []
+        outcome = {"sold": 0, "rejected": 0, "abandoned": 0, "out_of_stock": 0}
+        
+        started = time.perf_counter()
+        await asyncio.gather(*(shopper(db, user_id, rng, latencies, outcome) for user_id in range(users)))
+        elapsed = time.perf_counter() - started
+        await db.flush()
+        
+        remaining = db.get_item_by_id("products", 1)["stock"]
+        latencies.sort()
+        print(f"{users} shoppers, stock {stock}: {elapsed * 1000:.0f} ms")
+        print(f"  {outcome}")
+        print(f"  stock left {remaining}, reserved {db.inventory.reserved.get(1, 0)}")
+        print(f"  reserve latency p50 {latencies[len(latencies) // 2] * 1e6:.0f} us, "
+              f"p99 {latencies[int(len(latencies) * 0.99)] * 1e6:.0f} us")
+        assert outcome["sold"] + remaining == stock, "stock does not add up"
+        assert remaining >= 0, "oversold"
+
+def main():
+    users = int(sys.argv[1]) if len(sys.argv) > 1 else 5000
+    stock = int(sys.argv[2]) if len(sys.argv) > 2 else 100
+    asyncio.run(run(users, stock))
+
+if __name__ == "__main__":
+    main()
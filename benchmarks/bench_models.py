@@ -0,0 +1,108 @@
+# benchmarks/bench_models.py
+# Bytes per user of carts, bookings and enrollments (JSON dicts vs slotted models),
+# and the cost of taking a save view: dicts rebuilt per save vs cached rows.
+# Usage: python benchmarks/bench_models.py [users]
+import gc
+import json
+import os
+import random
+import sys
+import timeit
+import tracemalloc
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from database.models import (
+    Booking, Cart, RowCache, bookings_from_json, carts_from_json, enrollment_rows, enrollments_from_json
+)
+
+def build_sections(users: int) -> str:
+    """JSON text of the orders/bookings/enrollments sections, as stored in data.json"""
+    rng = random.Random(42)
+    orders, bookings, enrollments = {}, {}, {}
+    for user_id in range(10_000_000, 10_000_000 + users):
+        items = {f"menu_{rng.randint(1, 90)}": rng.randint(1, 3) for _ in range(rng.randint(1, 4))}
+        orders[str(user_id)] = {"items": items, "total": round(rng.uniform(5, 120), 2), "item_type": "menu"}
+        if user_id % 5 == 0:
+            booking_id = str(len(bookings) + 1)
+            bookings[booking_id] = {
+                "id": int(booking_id), "user_id": user_id, "service_id": rng.randint(1, 4), "date": "2026-10-20",
+                "time": "10:30", "status": "confirmed", "created_at": "2026-10-19T10:00:00"
+            }
+        if user_id % 3 == 0:
+            enrollments[str(user_id)] = {"1": {
+                "enrolled": True, "enrolled_at": "2026-10-19T10:00:00", "completed_lessons": 2,
+                "completed_lessons_ids": [1, 2], "progress_percentage": 16.7
+            }}
+    return json.dumps({"orders": orders, "bookings": bookings, "enrollments": enrollments})
+
+def measure(build) -> int:
+    gc.collect()
+    tracemalloc.start()
+    result = build()
+    gc.collect()
+    size, _ = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    del result
+    return size
+
+def main():
+    users = int(sys.argv[1]) if len(sys.argv) > 1 else 100_000
+    text = build_sections(users)
+    
+    as_dicts = measure(lambda: json.loads(text))
+    
+    def as_models():
+        sections = json.loads(text)
+        return (
+            carts_from_json(sections.pop("orders")),
+            bookings_from_json(sections.pop("bookings")),
+            enrollments_from_json(sections.pop("enrollments"))
+        )
+    models = measure(as_models)
+    
+    print(f"{users} users (carts, bookings, enrollments)")
+    print(f"nested dicts  {as_dicts / 1e6:8.1f} MB  {as_dicts / users:7.0f} bytes/user")
+    print(f"models        {models / 1e6:8.1f} MB  {models / users:7.0f} bytes/user")
+    
+    carts, bookings, enrollments = as_models()
+    
+    def rebuild_dicts():
+        # Former to_json: every model converted to a nested dict on each save
+        return (
+            {str(user_id): {
+                "items": {f"{line.item_type}_{line.item_id}": line.quantity for line in cart.lines.values()},
+                "total": cart.total, "item_type": cart.item_type, "updated_at": cart.updated_at
+            } for user_id, cart in carts.items()},
+            {str(booking_id): {
+                "id": booking.id, "user_id": booking.user_id, "service_id": booking.service_id, "date": booking.date,
+                "time": booking.time, "status": booking.status, "created_at": booking.created_at
+            } for booking_id, booking in bookings.items()},
+            {str(user_id): {str(course_id): {
+                "enrolled": enrollment.enrolled, "enrolled_at": enrollment.enrolled_at,
+                "completed_lessons": enrollment.completed_lessons,
+                "completed_lessons_ids": enrollment.completed_lessons_ids,
+                "progress_percentage": enrollment.progress_percentage
+            } for course_id, enrollment in courses.items()} for user_id, courses in enrollments.items()}
+        )
+    
+    caches = RowCache(Cart.to_row), RowCache(Booking.to_row), RowCache(enrollment_rows)
+    sections = carts, bookings, enrollments
+    for cache, models in zip(caches, sections):
+        cache.reset(models)
+    
+    def cached_rows():
+        # One cart changes between saves, as after a typical update
+        caches[0].mark(next(iter(carts)))
+        return tuple(cache.view(models) for cache, models in zip(caches, sections))
+    
+    cached_rows()
+    rebuild_ms = min(timeit.repeat(rebuild_dicts, number=1, repeat=5)) * 1000
+    cached_ms = min(timeit.repeat(cached_rows, number=1, repeat=5)) * 1000
+    dict_bytes = len(json.dumps(rebuild_dicts(), separators=(",", ":")))
+    row_bytes = len(json.dumps(cached_rows(), separators=(",", ":")))
+    print(f"save view     dicts {rebuild_ms:8.1f} ms  rows {cached_ms:8.1f} ms (one cart changed)")
+    print(f"encoded       dicts {dict_bytes / users:8.0f} B/user  rows {row_bytes / users:5.0f} B/user")
+
+if __name__ == "__main__":
+    main()
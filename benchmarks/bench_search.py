@@ -0,0 +1,73 @@
+# benchmarks/bench_search.py
+# Catalog search index: build and import time, and query latency by match kind.
+# Usage: python benchmarks/bench_search.py [products]
+import os
+import random
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from database.search_index import CatalogIndex
+
+ADJECTIVES = ["classic", "organic", "cotton", "leather", "vintage", "premium", "slim", "wireless", "bamboo", "woolen",
+              "waterproof", "compact", "deluxe", "handmade", "ceramic", "stainless", "linen", "travel", "kids", "sport"]
+NOUNS = ["shirt", "jacket", "mug", "backpack", "lamp", "headphones", "sneakers", "wallet", "scarf", "bottle",
+         "notebook", "blanket", "watch", "kettle", "pillow", "umbrella", "sunglasses", "charger", "belt", "teapot"]
+
+def build_products(count: int, rng: random.Random):
+    products = []
+    for i in range(1, count + 1):
+        # Model codes give the vocabulary a realistic long tail of rare tokens
+        name = f"{rng.choice(ADJECTIVES)} {rng.choice(NOUNS)} {rng.choice(NOUNS)[:3]}{i % 5000}"
+        description = " ".join(rng.choice(ADJECTIVES + NOUNS) for _ in range(8))
+        products.append({"id": i, "name": name, "price": 9.99, "description": description})
+    return products
+
+def timed(function) -> float:
+    started = time.perf_counter()
+    function()
+    return (time.perf_counter() - started) * 1000
+
+def latencies(index: CatalogIndex, queries, repeat: int = 5):
+    samples = []
+    for _ in range(repeat):
+        for query in queries:
+            started = time.perf_counter()
+            index.search(query)
+            samples.append((time.perf_counter() - started) * 1000)
+    samples.sort()
+    return samples[len(samples) // 2], samples[int(len(samples) * 0.99)]
+
+def main():
+    count = int(sys.argv[1]) if len(sys.argv) > 1 else 50_000
+    rng = random.Random(42)
+    products = build_products(count, rng)
+    data = {"products": {"all": products}}
+    
+    build_ms = timed(lambda: CatalogIndex.from_data(data))
+    index = CatalogIndex.from_data(data)
+    print(f"{count} products, {len(index.vocabulary)} tokens: built in {build_ms:.0f} ms")
+    
+    # An import updating a tenth of the catalog, and one adding as many new items
+    updated = [{**item, "name": item["name"] + " v2"} for item in rng.sample(products, count // 10)]
+    added = build_products(count // 10, rng)
+    for offset, item in enumerate(added, count + 1):
+        item["id"] = offset
+        item["name"] += f" new{offset}"
+    print(f"import of {len(updated)} updated items: {timed(lambda: index.add_items('products', updated)):.0f} ms")
+    print(f"import of {len(added)} new items: {timed(lambda: index.add_items('products', added)):.0f} ms")
+    
+    queries = {
+        "exact": [rng.choice(NOUNS) for _ in range(50)],
+        "prefix": [rng.choice(NOUNS)[:3] for _ in range(50)],
+        "typo": [noun[:2] + noun[3:] for noun in (rng.choice(NOUNS) for _ in range(50)) if len(noun) > 4],
+        "two terms": [f"{rng.choice(ADJECTIVES)} {rng.choice(NOUNS)}" for _ in range(50)]
+    }
+    print(f"{'query':<10}{'p50 ms':>10}{'p99 ms':>10}")
+    for kind, terms in queries.items():
+        p50, p99 = latencies(index, terms)
+        print(f"{kind:<10}{p50:>10.3f}{p99:>10.3f}")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,91 @@
+# benchmarks/bench_templates.py
+# Rendering cost of list messages: the former f-string concatenation vs compiled locale templates.
+# Usage: python benchmarks/bench_templates.py [items]
+import os
+import sys
+import timeit
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+from utils.i18n import Translations
+
+def build_courses(count: int):
+    return [
+        {"id": i, "name": f"Course {i}", "lessons": 10 + i % 7, "duration": f"{4 + i % 6} weeks",
+         "price": 49.0 + i, "level": ("Beginner", "Intermediate", "Advanced")[i % 3]}
+        for i in range(1, count + 1)
+    ]
+
+def build_cart(count: int):
+    return [{"name": f"Item {i}", "price": 3.5 + i, "quantity": 1 + i % 3} for i in range(1, count + 1)]
+
+def courses_fstrings(courses):
+    text = "📚 <b>Available Courses:</b>\n\n"
+    for course in courses:
+        text += f"<b>{course['name']}</b>\n"
+        text += f"📊 Level: {course['level']}\n"
+        text += f"📖 {course['lessons']} lessons\n"
+        text += f"⏰ Duration: {course['duration']}\n"
+        text += f"💰 Price: ${course['price']:.2f}\n\n"
+    return text
+
+def courses_templates(t, courses):
+    return t["courses.title"] + t.join("courses.line", courses)
+
+def cart_fstrings(lines, delivery_fee=2.5):
+    text = "🛒 <b>Your Cart:</b>\n\n"
+    total = 0
+    for line in lines:
+        item_total = line["price"] * line["quantity"]
+        total += item_total
+        text += f"<b>{line['name']}</b>\n"
+        text += f"${line['price']:.2f} x {line['quantity']} = ${item_total:.2f}\n\n"
+    text += f"<b>Subtotal:</b> ${total:.2f}\n"
+    text += f"<b>Delivery:</b> ${delivery_fee:.2f}\n"
+    text += f"<b>Total:</b> ${total + delivery_fee:.2f}"
+    return text
+
+def cart_templates(t, lines, delivery_fee=2.5):
+    rows = [{**line, "line_total": line["price"] * line["quantity"]} for line in lines]
+    subtotal = sum(row["line_total"] for row in rows)
+    return "".join([
+        t["cart.title"],
+        t.join("cart.line", rows),
+        t("cart.totals", subtotal=subtotal, delivery=delivery_fee, total=subtotal + delivery_fee)
+    ])
+
+def per_call(function, number: int) -> float:
+    """Best of 5 runs, microseconds per call"""
+    return min(timeit.repeat(function, number=number, repeat=5)) / number * 1e6
+
+def main():
+    count = int(sys.argv[1]) if len(sys.argv) > 1 else 10
+    translations = Translations(os.path.join(ROOT, "locales"))
+    
+    start = timeit.default_timer()
+    translations.load()
+    print(f"Compiled {len(translations.locales)} locales in {(timeit.default_timer() - start) * 1000:.1f} ms")
+    t = translations.get("en")
+    
+    courses, cart = build_courses(count), build_cart(count)
+    user_name = "Jane Doe"
+    assert courses_templates(t, courses) == courses_fstrings(courses)
+    assert cart_templates(t, cart) == cart_fstrings(cart)
+    
+    number = max(1000, 200000 // count)
+    print(f"{count} items per message (µs per render)")
+    print(f"{'message':<10}{'f-strings':>12}{'templates':>12}{'ratio':>8}")
+    for name, old, new in (
+        ("courses", lambda: courses_fstrings(courses), lambda: courses_templates(t, courses)),
+        ("cart", lambda: cart_fstrings(cart), lambda: cart_templates(t, cart)),
+        ("welcome", lambda: f"👋 Welcome back, {user_name}!\n\nWhat would you like to do?",
+         lambda: t("welcome.back", user_name=user_name)),
+        ("static", lambda: "🍽️ <b>Choose a category:</b>", lambda: t["menu.choose_category"]),
+        ("lookup", lambda: translations.get("en"), lambda: translations.get("ru-RU")),
+    ):
+        old_us, new_us = per_call(old, number), per_call(new, number)
+        print(f"{name:<10}{old_us:>12.2f}{new_us:>12.2f}{new_us / old_us:>8.2f}")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,238 @@
+# benchmarks/replay.py
+# Replay a recording made with RECORD_UPDATES=1 through a fresh Dispatcher against a local stub Bot API
+# and a scratch copy of storage, then report handling latency per update kind.
+# Usage: python benchmarks/replay.py RECORDING [--speed 0|1] [--root CHECKOUT] [--json OUT] [--compare BASELINE]
+#   RECORDING is a recordings directory or one segment file. --speed 1 keeps the recorded pacing,
+#   0 (default) feeds updates as fast as possible. To compare two builds, run the replay in each
+#   checkout (or point --root at it), save one with --json and pass it to the other with --compare.
+import argparse
+import asyncio
+import json
+import os
+import shutil
+import sys
+import tempfile
+import time
+from collections import defaultdict
+from typing import Any, Dict, List, Optional
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+STUB_TOKEN = "42:replay"
+STUB_BOT = {"id": 42, "is_bot": True, "first_name": "Replay", "username": "replay_bot"}
+# Runtime files of the recorded process that must not leak into the replay
+SKIPPED_FILES = ("*.py", "__pycache__", "seen_updates.json", "lifecycle.json", "recordings", "*.tmp")
+
+def percentile(ordered: List[float], fraction: float) -> float:
+    if not ordered:
+        return 0.0
+    return ordered[min(int(len(ordered) * fraction), len(ordered) - 1)]
+
+def summarize(samples: List[float]) -> Dict[str, float]:
+    ordered = sorted(samples)
+    return {
+        "count": len(ordered),
+        "p50_ms": round(percentile(ordered, 0.5), 3),
+        "p90_ms": round(percentile(ordered, 0.9), 3),
+        "p99_ms": round(percentile(ordered, 0.99), 3),
+        "max_ms": round(ordered[-1] if ordered else 0.0, 3),
+        "mean_ms": round(sum(ordered) / len(ordered) if ordered else 0.0, 3)
+    }
+
+def update_kind(update: Dict[str, Any]) -> str:
+    """Group key: callback data prefix, command, or update type"""
+    if "callback_query" in update:
+        data = update["callback_query"].get("data", "")
+        return f"callback:{data.split('_')[0] if any(c.isdigit() for c in data) else data}"
+    message = update.get("message") or update.get("edited_message")
+    if message is not None:
+        text = message.get("text", "")
+        return f"command:{text.split()[0]}" if text.startswith("/") else "message"
+    return next((key for key in update if key != "update_id"), "unknown")
+
+def prepare_scratch(root: str, storage: str) -> str:
+    """Temporary working directory with a copy of the stores and a link to the locales"""
+    scratch = tempfile.mkdtemp(prefix="replay-")
+    shutil.copytree(storage, os.path.join(scratch, "database"), ignore=shutil.ignore_patterns(*SKIPPED_FILES))
+    if os.path.isdir(os.path.join(root, "locales")):
+        os.symlink(os.path.join(root, "locales"), os.path.join(scratch, "locales"))
+    return scratch
+
+async def start_stub_api(latency: float):
+    """Local Bot API answering every method with a plausible result"""
+    from aiohttp import web
+    
+    calls: Dict[str, int] = defaultdict(int)
+    message_ids = iter(range(1, 1 << 62))
+    
+    async def handle(request: web.Request) -> web.Response:
+        method = request.match_info["method"]
+        calls[method] += 1
+        if latency:
+            await asyncio.sleep(latency)
+        if method == "getMe":
+            result: Any = STUB_BOT
+        elif method.startswith("send") or method.startswith("edit"):
+            form = await request.post()
+            chat_id = int(form.get("chat_id", 1) or 1)
+            result = {
+                "message_id": next(message_ids), "date": int(time.time()),
+                "chat": {"id": chat_id, "type": "private" if chat_id > 0 else "supergroup"},
+                "from": STUB_BOT, "text": form.get("text", "")
+            }
+            # Inline message edits return True
+            if method.startswith("edit") and "inline_message_id" in form:
+                result = True
+        else:
+            result = True
+        return web.json_response({"ok": True, "result": result})
+    
+    app = web.Application()
+    app.router.add_post("/bot{token}/{method}", handle)
+    runner = web.AppRunner(app)
+    await runner.setup()
+    site = web.TCPSite(runner, "127.0.0.1", 0)
+    await site.start()
+    port = site._server.sockets[0].getsockname()[1]
+    return runner, f"http://127.0.0.1:{port}", calls
+
+def load_recording(path: str) -> List[Dict[str, Any]]:
+    from utils.recorder import iter_records, recording_files
+    
+    records = [record for name in recording_files(path) for record in iter_records(name)]
+    records.sort(key=lambda record: record["ts"])
+    return records
+
+async def replay(args) -> Dict[str, Any]:
+    from aiogram import Bot
+    from aiogram.client.default import DefaultBotProperties
+    from aiogram.client.telegram import TelegramAPIServer
+    from aiogram.enums import ParseMode
+    from aiogram.types import Update
+    
+    from app_factory import create_dispatcher
+    from config import config
+    from utils.http_session import create_session
+    
+    records = load_recording(args.recording)
+    if not records:
+        raise SystemExit(f"No records in {args.recording}")
+    
+    runner, base_url, calls = await start_stub_api(args.api_latency / 1000)
+    session = create_session(config)
+    session.api = TelegramAPIServer.from_base(base_url)
+    bot = Bot(token=STUB_TOKEN, session=session, default=DefaultBotProperties(parse_mode=ParseMode.HTML))
+    dp = create_dispatcher(args.business_type)
+    
+    # Startup and shutdown as in PollingRunner.run
+    data = {"dispatcher": dp, "bots": [bot], **dp.workflow_data}
+    await dp.emit_startup(bot=bot, **data)
+    
+    samples: Dict[str, List[float]] = defaultdict(list)
+    recorded: Dict[str, List[float]] = defaultdict(list)
+    errors: Dict[str, int] = defaultdict(int)
+    semaphore = asyncio.Semaphore(args.concurrency)
+    
+    async def feed(record: Dict[str, Any]):
+        kind = update_kind(record["update"])
+        update = Update.model_validate(record["update"], context={"bot": bot})
+        async with semaphore:
+            started = time.perf_counter()
+            try:
+                await dp.feed_update(bot, update, **data)
+            except Exception:
+                errors[kind] += 1
+            samples[kind].append((time.perf_counter() - started) * 1000)
+        recorded[kind].append(record["ms"])
+    
+    tasks = []
+    first_ts = records[0]["ts"]
+    started = time.perf_counter()
+    for record in records:
+        if args.speed > 0:
+            delay = (record["ts"] - first_ts) / args.speed - (time.perf_counter() - started)
+            if delay > 0:
+                await asyncio.sleep(delay)
+        tasks.append(asyncio.create_task(feed(record)))
+    await asyncio.gather(*tasks)
+    elapsed = time.perf_counter() - started
+    
+    await dp.emit_shutdown(bot=bot, **data)
+    await bot.session.close()
+    await runner.cleanup()
+    
+    everything = [sample for kind_samples in samples.values() for sample in kind_samples]
+    return {
+        "updates": len(records),
+        "elapsed_s": round(elapsed, 3),
+        "updates_per_s": round(len(records) / elapsed, 1) if elapsed else 0.0,
+        "speed": args.speed,
+        "api_calls": dict(calls),
+        "errors": dict(errors),
+        "total": summarize(everything),
+        "kinds": {
+            kind: {"replayed": summarize(samples[kind]), "recorded": summarize(recorded[kind])}
+            for kind in sorted(samples)
+        }
+    }
+
+def print_report(report: Dict[str, Any], baseline: Optional[Dict[str, Any]] = None):
+    print(f"{report['updates']} updates in {report['elapsed_s']} s ({report['updates_per_s']}/s), "
+          f"{sum(report['api_calls'].values())} Bot API calls, {sum(report['errors'].values())} errors")
+    header = f"{'kind':<28}{'count':>7}{'p50':>10}{'p90':>10}{'p99':>10}{'max':>10}{'rec p50':>10}"
+    if baseline:
+        header += f"{'base p50':>10}{'base p99':>10}{'Δ p50':>9}"
+    print(header)
+    rows = [("total", report["total"], None)] + [
+        (kind, stats["replayed"], stats["recorded"]) for kind, stats in report["kinds"].items()
+    ]
+    for kind, stats, recorded in rows:
+        line = (f"{kind:<28}{stats['count']:>7}{stats['p50_ms']:>10.2f}{stats['p90_ms']:>10.2f}"
+                f"{stats['p99_ms']:>10.2f}{stats['max_ms']:>10.2f}")
+        line += f"{recorded['p50_ms']:>10.2f}" if recorded else f"{'':>10}"
+        if baseline:
+            base = baseline["total"] if kind == "total" else baseline["kinds"].get(kind, {}).get("replayed")
+            if base:
+                change = (stats["p50_ms"] / base["p50_ms"] - 1) * 100 if base["p50_ms"] else 0.0
+                line += f"{base['p50_ms']:>10.2f}{base['p99_ms']:>10.2f}{change:>+8.1f}%"
+        print(line)
+
+def main():
+    parser = argparse.ArgumentParser(description="Replay recorded updates and report handling latency")
+    parser.add_argument("recording", help="recordings directory or segment file")
+    parser.add_argument("--speed", type=float, default=0.0, help="1 = recorded pacing, 0 = as fast as possible")
+    parser.add_argument("--root", default=ROOT, help="checkout whose handlers are replayed")
+    parser.add_argument("--storage", help="stores to copy (default: ROOT/database)")
+    parser.add_argument("--business-type", default=None, help="default: BUSINESS_TYPE or restaurant")
+    parser.add_argument("--concurrency", type=int, default=64, help="handlers running at once")
+    parser.add_argument("--api-latency", type=float, default=0.0, help="stub Bot API delay per call, ms")
+    parser.add_argument("--json", help="write the report to this file")
+    parser.add_argument("--compare", help="report of another build to compare with")
+    args = parser.parse_args()
+    
+    root = os.path.abspath(args.root)
+    args.recording = os.path.abspath(args.recording)
+    args.json = os.path.abspath(args.json) if args.json else None
+    scratch = prepare_scratch(root, os.path.abspath(args.storage or os.path.join(root, "database")))
+    baseline = None
+    if args.compare:
+        with open(args.compare, encoding="utf-8") as f:
+            baseline = json.load(f)
+    
+    # The replayed build reads its stores relative to the working directory
+    os.environ.update(BOT_TOKEN=STUB_TOKEN, ADMIN_ID="1", RECORD_UPDATES="0", TENANTS_FILE="")
+    sys.path.insert(0, root)
+    os.chdir(scratch)
+    try:
+        report = asyncio.run(replay(args))
+    finally:
+        shutil.rmtree(scratch, ignore_errors=True)
+    
+    report["root"] = root
+    print_report(report, baseline)
+    if args.json:
+        with open(args.json, "w", encoding="utf-8") as f:
+            json.dump(report, f, indent=2)
+
+if __name__ == "__main__":
+    main()
@@ -1,5 +1,6 @@
 import os
 from dataclasses import dataclass
+from typing import List, Optional
 from dotenv import load_dotenv
 
 # Load environment variables
@@ -9,20 +10,106 @@ load_dotenv()
 class BotConfig:
     token: str
     admin_id: int
+    business_type: str = "restaurant"
+    webhook_url: str = None
+    webhook_path: str = "/webhook"
+    webapp_host: str = "0.0.0.0"
+    webapp_port: int = 8000
+    webhook_secret: str = None
+    # "queue": acknowledge updates at once and process them from a bounded queue
+    webhook_ingress: str = "queue"
+    ingress_workers: int = 8
+    ingress_queue_size: int = 1000
+    # Bot API HTTP session tuning
+    http_pool_size: int = 100
+    http_pool_per_host: int = 0
+    http_keepalive: float = 30.0
+    http_dns_ttl: int = 3600
+    http_timeout: float = 60.0
+    # Background maintenance
+    cart_ttl_hours: float = 72.0
+    maintenance_interval: int = 600
+    # Redelivered update detection, kept across restarts
+    dedup_window: int = 10000
+    dedup_file: str = "database/seen_updates.json"
+    # Shutdown: seconds to wait for running handlers; offsets and drain time
+    drain_timeout: float = 25.0
+    lifecycle_file: str = "database/lifecycle.json"
+    # Long polling; allowed updates default to those the routers handle
+    polling_timeout: int = 30
+    polling_limit: int = 100
+    polling_concurrency: int = 64
+    polling_allowed_updates: Optional[List[str]] = None
+    # IANA name, e.g. "Asia/Tashkent"; booking days roll over at its midnight
+    business_timezone: str = "UTC"
+    # Seconds between checks for settings changed by other worker processes
+    settings_sync_interval: float = 5.0
+    # Opt-in anonymized update recording for offline replay (benchmarks/replay.py)
+    record_updates: bool = False
+    record_dir: str = "database/recordings"
+    # Keeps pseudonyms stable across restarts; random per process when unset
+    record_secret: str = None
 
 # Get configuration from environment
 def get_config() -> BotConfig:
-    token = os.getenv('BOT_TOKEN')
-    if not token:
+    # In multi-bot mode tokens and admins come from the tenants file
+    multi_bot = bool(os.getenv('TENANTS_FILE'))
+    
+    token = os.getenv('BOT_TOKEN', '')
+    if not token and not multi_bot:
         raise ValueError("BOT_TOKEN not found in environment variables")
     
-    admin_id = os.getenv('ADMIN_ID')
-    if not admin_id:
+    admin_id = os.getenv('ADMIN_ID', '0')
+    if not os.getenv('ADMIN_ID') and not multi_bot:
         raise ValueError("ADMIN_ID not found in environment variables")
     
     return BotConfig(
         token=token,
-        admin_id=int(admin_id)
+        admin_id=int(admin_id),
+        business_type=os.getenv('BUSINESS_TYPE', 'restaurant'),
+        webhook_url=os.getenv('WEBHOOK_URL'),
+        webapp_port=int(os.getenv('PORT', 8000)),
+        webhook_secret=os.getenv('WEBHOOK_SECRET'),
+        webhook_ingress=os.getenv('WEBHOOK_INGRESS', 'queue'),
+        ingress_workers=int(os.getenv('INGRESS_WORKERS', 8)),
+        ingress_queue_size=int(os.getenv('INGRESS_QUEUE_SIZE', 1000)),
+        http_pool_size=int(os.getenv('HTTP_POOL_SIZE', 100)),
+        http_pool_per_host=int(os.getenv('HTTP_POOL_PER_HOST', 0)),
+        http_keepalive=float(os.getenv('HTTP_KEEPALIVE', 30.0)),
+        http_dns_ttl=int(os.getenv('HTTP_DNS_TTL', 3600)),
+        http_timeout=float(os.getenv('HTTP_TIMEOUT', 60.0)),
+        cart_ttl_hours=float(os.getenv('CART_TTL_HOURS', 72.0)),
+        maintenance_interval=int(os.getenv('MAINTENANCE_INTERVAL', 600)),
+        dedup_window=int(os.getenv('DEDUP_WINDOW', 10000)),
+        dedup_file=os.getenv('DEDUP_FILE', 'database/seen_updates.json'),
+        drain_timeout=float(os.getenv('DRAIN_TIMEOUT', 25.0)),
+        lifecycle_file=os.getenv('LIFECYCLE_FILE', 'database/lifecycle.json'),
+        polling_timeout=int(os.getenv('POLLING_TIMEOUT', 30)),
+        polling_limit=int(os.getenv('POLLING_LIMIT', 100)),
+        polling_concurrency=int(os.getenv('POLLING_CONCURRENCY', 64)),
+        polling_allowed_updates=[
+            name.strip() for name in os.getenv('POLLING_ALLOWED_UPDATES', '').split(',') if name.strip()
+        ] or None,
+        business_timezone=os.getenv('BUSINESS_TIMEZONE', 'UTC'),
+        settings_sync_interval=float(os.getenv('SETTINGS_SYNC_INTERVAL', 5.0)),
+        record_updates=os.getenv('RECORD_UPDATES', '').lower() in ('1', 'true', 'yes'),
+        record_dir=os.getenv('RECORD_DIR', 'database/recordings'),
+        record_secret=os.getenv('RECORD_SECRET')
     )
 
-config = get_config()
\ No newline at end of file
+class LazyConfig:
+    """Configuration proxy that reads the environment on first use"""
+    
+    def __init__(self):
+        self._config: Optional[BotConfig] = None
+    
+    def load(self) -> BotConfig:
+        """Build the configuration if it hasn't been built yet"""
+        if self._config is None:
+            self._config = get_config()
+        return self._config
+    
+    def __getattr__(self, name: str):
+        return getattr(self.load(), name)
+
+config = LazyConfig()
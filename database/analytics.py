@@ -0,0 +1,130 @@
+# database/analytics.py
+import csv
+import io
+from array import array
+from datetime import datetime, timezone, tzinfo
+from typing import Dict, List, Optional, Sequence, Tuple
+
+from database.events import EVENT_KINDS
+
+try:
+    import numpy as np
+except ImportError:  # pragma: no cover - optional dependency
+    np = None
+
+def _select(columns: Dict[str, array], kind: str) -> Dict[str, Sequence]:
+    """Rows of one event kind (numpy arrays when numpy is installed)"""
+    code = EVENT_KINDS[kind]
+    if np is not None:
+        arrays = {name: np.frombuffer(column, dtype=column.typecode) if len(column) else np.array([])
+                  for name, column in columns.items()}
+        mask = arrays["kind"] == code
+        return {name: values[mask] for name, values in arrays.items()}
+    rows = [i for i, value in enumerate(columns["kind"]) if value == code]
+    return {name: [column[i] for i in rows] for name, column in columns.items()}
+
+def _offset_at(timestamp: int, tz: tzinfo) -> int:
+    return int(datetime.fromtimestamp(timestamp, tz).utcoffset().total_seconds())
+
+def _bucket(values: Sequence, size: int, modulo: Optional[int] = None, tz: tzinfo = timezone.utc) -> Sequence:
+    """(value + UTC offset of tz at value) // size, optionally % modulo, element-wise
+    
+    Offsets are looked up once per distinct hour, so DST changes are followed.
+    """
+    if np is not None:
+        seconds = np.asarray(values, dtype=np.int64)
+        hours, inverse = np.unique(seconds // 3600, return_inverse=True)
+        offsets = np.array([_offset_at(int(hour) * 3600, tz) for hour in hours], dtype=np.int64)
+        buckets = (seconds + offsets[inverse.reshape(-1)]) // size
+        return buckets % modulo if modulo else buckets
+    offsets: Dict[int, int] = {}
+    buckets = []
+    for value in values:
+        hour = int(value) // 3600
+        if hour not in offsets:
+            offsets[hour] = _offset_at(hour * 3600, tz)
+        buckets.append((int(value) + offsets[hour]) // size)
+    return [bucket % modulo for bucket in buckets] if modulo else buckets
+
+def _group(keys: List[Sequence], values: List[Sequence] = ()) -> Dict[Tuple, List[float]]:
+    """Group rows by key columns: key tuple -> [count, sum of each value column]"""
+    if not len(keys[0]):
+        return {}
+    if np is not None:
+        matrix = np.stack([np.asarray(key, dtype=np.int64) for key in keys], axis=1)
+        unique, inverse = np.unique(matrix, axis=0, return_inverse=True)
+        inverse = inverse.reshape(-1)
+        totals = [np.bincount(inverse)] + [np.bincount(inverse, weights=value) for value in values]
+        return {
+            tuple(int(part) for part in key): [float(total[i]) for total in totals]
+            for i, key in enumerate(unique)
+        }
+    groups: Dict[Tuple, List[float]] = {}
+    for row, key in enumerate(zip(*keys)):
+        group = groups.get(key)
+        if group is None:
+            group = groups[key] = [0] + [0.0] * len(values)
+        group[0] += 1
+        for position, value in enumerate(values, 1):
+            group[position] += value[row]
+    return groups
+
+def sales_by_item_hour(columns: Dict[str, array], tz: tzinfo = timezone.utc) -> Dict[Tuple[int, int], List[float]]:
+    """(item ID, hour of day in tz) -> [order lines, quantity, revenue]"""
+    checkout = _select(columns, "checkout")
+    return _group([checkout["ref"], _bucket(checkout["ts"], 3600, 24, tz)], [checkout["quantity"], checkout["value"]])
+
+def booking_utilization(columns: Dict[str, array], slots_per_day: int) -> Dict[int, Tuple[int, int, float]]:
+    """Service ID -> (bookings, days with bookings, share of those days' slots booked)"""
+    bookings = _select(columns, "booking")
+    # Slots are recorded as local wall-clock time, so days are UTC buckets
+    per_day = _group([bookings["ref"], _bucket(bookings["extra"], 86400)])
+    days: Dict[int, int] = {}
+    for service_id, _ in per_day:
+        days[service_id] = days.get(service_id, 0) + 1
+    return {
+        service_id: (int(count), days[service_id], count / (days[service_id] * slots_per_day))
+        for (service_id,), (count,) in _group([bookings["ref"]]).items()
+    }
+
+def course_funnel(columns: Dict[str, array], lesson_counts: Dict[int, int]) -> Dict[int, Tuple[int, int, int]]:
+    """Course ID -> (enrolled users, users with a completed lesson, users who completed every lesson)"""
+    enrollments = _select(columns, "enrollment")
+    funnel = {course_id: [0, 0, 0] for course_id in lesson_counts}
+    for (course_id, _), _ in _group([enrollments["ref"], enrollments["user_id"]]).items():
+        funnel.setdefault(course_id, [0, 0, 0])[0] += 1
+    
+    lessons = _select(columns, "lesson_complete")
+    distinct = _group([lessons["ref"], lessons["user_id"], lessons["extra"]])
+    per_user = _group([[key[0] for key in distinct], [key[1] for key in distinct]]) if distinct else {}
+    for (course_id, _), (completed, *_) in per_user.items():
+        stage = funnel.setdefault(course_id, [0, 0, 0])
+        stage[1] += 1
+        if completed >= lesson_counts.get(course_id, float("inf")):
+            stage[2] += 1
+    return {course_id: tuple(stage) for course_id, stage in funnel.items()}
+
+def build_report(columns: Dict[str, array], item_names: Dict[int, str], slots_per_day: int,
+                 lesson_counts: Dict[int, int], tz: tzinfo = timezone.utc) -> str:
+    """All reports as one CSV document with a section per report; hours are local to tz"""
+    out = io.StringIO()
+    writer = csv.writer(out)
+    
+    writer.writerow(["# Sales by item and hour"])
+    writer.writerow(["item_id", "item", "hour", "order_lines", "quantity", "revenue"])
+    for (item_id, hour), (lines, quantity, revenue) in sorted(sales_by_item_hour(columns, tz).items()):
+        writer.writerow([item_id, item_names.get(item_id, ""), hour, int(lines), int(quantity), f"{revenue:.2f}"])
+    
+    writer.writerow([])
+    writer.writerow(["# Booking utilization per service"])
+    writer.writerow(["service_id", "service", "bookings", "days", "utilization"])
+    for service_id, (count, days, utilization) in sorted(booking_utilization(columns, slots_per_day).items()):
+        writer.writerow([service_id, item_names.get(service_id, ""), count, days, f"{utilization:.1%}"])
+    
+    writer.writerow([])
+    writer.writerow(["# Course completion funnel"])
+    writer.writerow(["course_id", "course", "enrolled", "started", "completed"])
+    for course_id, (enrolled, started, completed) in sorted(course_funnel(columns, lesson_counts).items()):
+        writer.writerow([course_id, item_names.get(course_id, ""), enrolled, started, completed])
+    
+    return out.getvalue()
@@ -0,0 +1,156 @@
+# database/business_info.py
+import asyncio
+import logging
+import os
+from typing import Any, Callable, Dict, Iterable, Optional, Tuple
+
+from database.codecs import JsonCodec
+from database.snapshots import SnapshotWriter
+
+logger = logging.getLogger(__name__)
+
+# Editable fields and their values until an admin changes them
+DEFAULT_BUSINESS_INFO: Dict[str, str] = {
+    "phone": "+1 (555) 123-4567",
+    "email": "info@restaurant.com",
+    "website": "www.restaurant.com",
+    "facebook": "@restaurant",
+    "instagram": "@restaurant",
+    "twitter": "@restaurant",
+    "address": "123 Main Street\nCity Center, State 12345\n\nWe're located in the heart of downtown!",
+    "coordinates": "40.7128, -74.0060",
+    "hours": (
+        "Monday - Thursday: 11:00 AM - 10:00 PM\n"
+        "Friday - Saturday: 11:00 AM - 11:00 PM\n"
+        "Sunday: 12:00 PM - 9:00 PM\n\n"
+        "Kitchen closes 30 minutes before closing time"
+    )
+}
+
+def parse_coordinates(value: str) -> Optional[Tuple[float, float]]:
+    """(latitude, longitude) from "lat, lon"; None if empty or invalid"""
+    try:
+        latitude, longitude = (float(part) for part in value.split(","))
+    except ValueError:
+        return None
+    if not (-90 <= latitude <= 90 and -180 <= longitude <= 180):
+        return None
+    return latitude, longitude
+
+class BusinessInfo:
+    """Contact, location and hours of a store, kept in settings["business_info"]
+    
+    Reads are served from memory. An edit bumps the version, saves the store and
+    publishes {version, info} to a small file next to it, reading and writing
+    it in worker threads; other processes poll that file's mtime (see
+    SettingsSync) and adopt newer versions.
+    """
+    
+    def __init__(self, store: Any, path: str):
+        self.store = store
+        self.path = path
+        self.snapshots = SnapshotWriter(path, JsonCodec(), generations=1)
+        self.version = 0
+        self._info: Optional[Dict[str, str]] = None
+        self._published_mtime: Optional[float] = None
+    
+    def get(self) -> Dict[str, str]:
+        """Current business info (no I/O after the first call)"""
+        if self._info is None:
+            settings = self.store.data.get("settings", {})
+            self._info = {**DEFAULT_BUSINESS_INFO, **settings.get("business_info", {})}
+            self.version = settings.get("business_info_version", 0)
+        return self._info
+    
+    def _apply(self, info: Dict[str, str], version: int):
+        settings = self.store.data.setdefault("settings", {})
+        settings["business_info"] = info
+        settings["business_info_version"] = version
+        self._info = {**DEFAULT_BUSINESS_INFO, **info}
+        self.version = version
+    
+    def _read_published(self) -> Optional[Dict[str, Any]]:
+        return self.snapshots.load()
+    
+    async def update(self, field: str, value: Optional[str]) -> int:
+        """Set a field (None restores its default, "" hides it), save and publish; returns the new version"""
+        if field not in DEFAULT_BUSINESS_INFO:
+            raise ValueError(f"Unknown field: {field}")
+        if field == "coordinates" and value and parse_coordinates(value) is None:
+            raise ValueError("Coordinates must be 'latitude, longitude'")
+        
+        # Versions keep increasing across processes
+        published = await asyncio.to_thread(self._read_published)
+        
+        # No awaits from here to the save, so concurrent edits don't overwrite each other
+        self.get()
+        info = dict(self.store.data.get("settings", {}).get("business_info", {}))
+        if value is None:
+            info.pop(field, None)
+        else:
+            info[field] = value
+        version = max(self.version, published["version"] if published else 0) + 1
+        
+        self._apply(info, version)
+        self.store.save_data()
+        self.snapshots.save({"version": version, "info": info})
+        await self.snapshots.flush()
+        self._published_mtime = os.stat(self.path).st_mtime
+        logger.info(f"Business info '{field}' changed, version {version}")
+        return version
+    
+    def sync(self) -> bool:
+        """Adopt a version published by another process; True if one was applied"""
+        try:
+            mtime = os.stat(self.path).st_mtime
+        except FileNotFoundError:
+            return False
+        if mtime == self._published_mtime:
+            return False
+        self._published_mtime = mtime
+        
+        published = self._read_published()
+        self.get()
+        if published is None or published["version"] <= self.version:
+            return False
+        self._apply(published["info"], published["version"])
+        logger.info(f"Business info updated to version {self.version} from {self.path}")
+        return True
+
+class SettingsSync:
+    """Background task applying settings published by other worker processes"""
+    
+    def __init__(self, interval: float = 5.0):
+        self.interval = interval
+        self._task: Optional[asyncio.Task] = None
+        self.stats = {"checks": 0, "applied": 0}
+    
+    def start(self, get_stores: Callable[[], Iterable[Any]]):
+        if self._task is None or self._task.done():
+            self._task = asyncio.create_task(self._run(get_stores))
+    
+    async def stop(self):
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+    
+    async def _run(self, get_stores: Callable[[], Iterable[Any]]):
+        while True:
+            await asyncio.sleep(self.interval)
+            for store in get_stores():
+                business_info = getattr(store, "business_info", None)
+                if business_info is None:
+                    continue
+                try:
+                    self.stats["checks"] += 1
+                    if business_info.sync():
+                        self.stats["applied"] += 1
+                except (OSError, ValueError, KeyError) as e:
+                    logger.error(f"Settings sync of {business_info.path} failed: {e}")
+
+# Global settings sync task
+settings_sync = SettingsSync()
@@ -0,0 +1,209 @@
+# database/catalog_io.py
+import csv
+import io
+import json
+import math
+from dataclasses import dataclass, field
+from typing import Any, Callable, Dict, Iterable, Iterator, List, Optional, TextIO, Tuple
+
+from database.codecs import iter_json_array
+
+# Columns of exported CSV files, plus the TYPE_FIELDS of the item type;
+# other extra item fields are kept in JSON exports only
+CSV_FIELDS = ["id", "category", "name", "price", "description", "stock"]
+
+MAX_REPORTED_ERRORS = 20
+PROGRESS_EVERY = 1000
+
+Entry = Tuple[str, Dict[str, Any]]
+
+def _text(value: Any) -> str:
+    value = str(value).strip()
+    if not value:
+        raise ValueError
+    return value
+
+def _positive_int(value: Any) -> int:
+    value = int(value)
+    if value <= 0:
+        raise ValueError
+    return value
+
+# Fields the handlers of an item type rely on; required in imported rows
+TYPE_FIELDS: Dict[str, Dict[str, Callable[[Any], Any]]] = {
+    "courses": {"level": _text, "lessons": _positive_int, "duration": _text},
+    "services": {"duration": _positive_int}
+}
+
+def csv_fields(item_type: str) -> List[str]:
+    """CSV columns of an item type"""
+    return CSV_FIELDS + list(TYPE_FIELDS.get(item_type, {}))
+
+def upsert_items(section: Dict[str, List[Dict]], entries: Iterable[Entry]) -> List[Dict[str, Any]]:
+    """Insert or replace items in a {category: [items]} section in one pass
+    
+    Items with a known ID replace the existing item (moving category if needed);
+    items without an ID get the next free one.
+    """
+    locations: Dict[int, Tuple[str, int]] = {}
+    max_id = 0
+    for category, items in section.items():
+        for position, item in enumerate(items):
+            locations[item.get("id")] = (category, position)
+            max_id = max(max_id, item.get("id", 0))
+    
+    applied = []
+    removed: Dict[str, set] = {}
+    for category, item in entries:
+        if "id" not in item:
+            max_id += 1
+            item["id"] = max_id
+        else:
+            max_id = max(max_id, item["id"])
+        
+        location = locations.get(item["id"])
+        if location is not None and location[0] == category:
+            section[category][location[1]] = item
+        else:
+            if location is not None:
+                removed.setdefault(location[0], set()).add(location[1])
+            items = section.setdefault(category, [])
+            locations[item["id"]] = (category, len(items))
+            items.append(item)
+        applied.append(item)
+    
+    # Drop items that moved to another category
+    for category, positions in removed.items():
+        section[category] = [item for position, item in enumerate(section[category]) if position not in positions]
+    return applied
+
+@dataclass
+class ImportReport:
+    rows: int = 0
+    imported: int = 0
+    # IDs of sold-out items the import put back in stock
+    restocked: List[int] = field(default_factory=list)
+    errors: List[str] = field(default_factory=list)
+    error_count: int = 0
+    
+    def add_error(self, row: int, message: str):
+        self.error_count += 1
+        if len(self.errors) < MAX_REPORTED_ERRORS:
+            self.errors.append(f"Row {row}: {message}")
+
+def validate_row(row: Dict[str, Any], item_type: Optional[str] = None) -> Entry:
+    """Convert an imported row into (category, item), raising ValueError if invalid"""
+    # JSON documents may hold numbers, strings or lists where objects are expected
+    if not isinstance(row, dict):
+        raise ValueError(f"expected an object, got {type(row).__name__}")
+    category = str(row.get("category") or "").strip().lower()
+    name = str(row.get("name") or "").strip()
+    if not category:
+        raise ValueError("category is required")
+    if not name:
+        raise ValueError("name is required")
+    
+    try:
+        price = round(float(row.get("price")), 2)
+    except (TypeError, ValueError):
+        raise ValueError(f"invalid price {row.get('price')!r}")
+    if not math.isfinite(price):
+        raise ValueError(f"invalid price {row.get('price')!r}")
+    if price < 0:
+        raise ValueError("price must not be negative")
+    
+    item = {key: value for key, value in row.items() if value not in (None, "") and key != "category"}
+    item.update(name=name, price=price, description=str(row.get("description") or "").strip())
+    for key in ("id", "stock"):
+        if key in item:
+            try:
+                item[key] = int(item[key])
+            except (TypeError, ValueError, OverflowError):
+                raise ValueError(f"invalid {key} {item[key]!r}")
+    for key, convert in TYPE_FIELDS.get(item_type, {}).items():
+        if key not in item:
+            raise ValueError(f"{key} is required")
+        try:
+            item[key] = convert(item[key])
+        except (TypeError, ValueError, OverflowError):
+            raise ValueError(f"invalid {key} {item[key]!r}")
+    return category, item
+
+def iter_rows(f: TextIO, file_name: str) -> Iterator[Dict[str, Any]]:
+    """Stream rows from a CSV, JSON Lines or JSON array document"""
+    name = file_name.lower()
+    if name.endswith(".csv"):
+        yield from csv.DictReader(f)
+    elif name.endswith(".jsonl"):
+        for line in f:
+            if line.strip():
+                yield json.loads(line)
+    elif name.endswith(".json"):
+        yield from iter_json_array(f)
+    else:
+        raise ValueError("Unsupported file type, send .csv, .json or .jsonl")
+
+def validate_rows(
+    rows: Iterable[Dict[str, Any]],
+    item_type: Optional[str] = None,
+    progress: Optional[Callable[[int], None]] = None
+) -> Tuple[List[Entry], ImportReport]:
+    """Validate streamed rows; safe to run in a worker thread (doesn't touch storage)"""
+    report = ImportReport()
+    entries = []
+    for report.rows, row in enumerate(rows, 1):
+        try:
+            entries.append(validate_row(row, item_type))
+        except ValueError as e:
+            report.add_error(report.rows, str(e))
+        if progress and report.rows % PROGRESS_EVERY == 0:
+            progress(report.rows)
+    return entries, report
+
+def apply_import(store, item_type: str, entries: List[Entry], report: ImportReport) -> ImportReport:
+    """Apply validated entries in one batch with a single save
+    
+    Nothing is applied if any row was invalid.
+    """
+    if report.error_count == 0 and entries:
+        sold_out = {
+            item.get("id") for items in store.data.get(item_type, {}).values() for item in items
+            if item.get("stock") is not None and int(item["stock"]) <= 0
+        }
+        applied = store.add_items(item_type, entries)
+        report.imported = len(applied)
+        report.restocked = [
+            item["id"] for item in applied
+            if item["id"] in sold_out and (item.get("stock") is None or item["stock"] > 0)
+        ]
+    return report
+
+def import_catalog(
+    store,
+    item_type: str,
+    rows: Iterable[Dict[str, Any]],
+    progress: Optional[Callable[[int], None]] = None
+) -> ImportReport:
+    """Validate all rows, then apply them in one batch with a single save"""
+    entries, report = validate_rows(rows, item_type, progress)
+    return apply_import(store, item_type, entries, report)
+
+def iter_csv_export(data: Dict[str, Any], item_type: str) -> Iterator[bytes]:
+    """Stream a catalog section as CSV, one encoded row at a time"""
+    buffer = io.StringIO()
+    writer = csv.DictWriter(buffer, fieldnames=csv_fields(item_type), extrasaction="ignore")
+    writer.writeheader()
+    for category, items in data.get(item_type, {}).items():
+        for item in items:
+            writer.writerow({**item, "category": category})
+            yield buffer.getvalue().encode("utf-8")
+            buffer.seek(0)
+            buffer.truncate()
+    if buffer.tell():
+        yield buffer.getvalue().encode("utf-8")
+
+def iter_jsonl_export(data: Dict[str, Any], item_type: str, codec) -> Iterator[bytes]:
+    """Stream a catalog section as JSON Lines"""
+    for category, items in data.get(item_type, {}).items():
+        for item in items:
+            yield codec.dumps({"category": category, **item}) + b"\n"
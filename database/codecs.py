@@ -0,0 +1,180 @@
+# database/codecs.py
+import json
+import os
+from typing import Any, Dict, Iterator, Optional, TextIO, Tuple
+
+class JsonCodec:
+    """Compact stdlib JSON codec, always available"""
+    name = "json"
+    
+    def dumps(self, obj: Any) -> bytes:
+        return json.dumps(obj, ensure_ascii=False, separators=(",", ":")).encode("utf-8")
+    
+    def dumps_str(self, obj: Any) -> str:
+        return json.dumps(obj, ensure_ascii=False, separators=(",", ":"))
+    
+    def loads(self, data) -> Any:
+        return json.loads(data)
+
+class OrjsonCodec(JsonCodec):
+    """orjson codec (optional dependency)"""
+    name = "orjson"
+    
+    def __init__(self):
+        import orjson
+        self._orjson = orjson
+        self._options = orjson.OPT_NON_STR_KEYS
+    
+    def dumps(self, obj: Any) -> bytes:
+        return self._orjson.dumps(obj, option=self._options)
+    
+    def dumps_str(self, obj: Any) -> str:
+        return self.dumps(obj).decode("utf-8")
+    
+    def loads(self, data) -> Any:
+        return self._orjson.loads(data)
+
+class MsgspecCodec(JsonCodec):
+    """msgspec JSON codec (optional dependency)"""
+    name = "msgspec"
+    
+    def __init__(self):
+        import msgspec
+        self._encoder = msgspec.json.Encoder()
+        self._decoder = msgspec.json.Decoder()
+    
+    def dumps(self, obj: Any) -> bytes:
+        return self._encoder.encode(obj)
+    
+    def dumps_str(self, obj: Any) -> str:
+        return self.dumps(obj).decode("utf-8")
+    
+    def loads(self, data) -> Any:
+        return self._decoder.decode(data)
+
+# Preferred codecs, fastest first
+CODECS = {
+    "orjson": OrjsonCodec,
+    "msgspec": MsgspecCodec,
+    "json": JsonCodec
+}
+
+_codec_cache: Dict[str, JsonCodec] = {}
+
+def get_codec(name: Optional[str] = None) -> JsonCodec:
+    """Get a codec by name (JSON_CODEC env), or the fastest one installed"""
+    name = name or os.getenv("JSON_CODEC")
+    if name in _codec_cache:
+        return _codec_cache[name]
+    
+    candidates = [name] if name else list(CODECS)
+    for candidate in candidates:
+        codec_class = CODECS.get(candidate)
+        if codec_class is None:
+            raise ValueError(f"Unknown JSON codec: {candidate}")
+        try:
+            codec = codec_class()
+        except ImportError:
+            if name:
+                raise
+            continue
+        _codec_cache[name] = codec
+        return codec
+    return JsonCodec()
+
+class _JsonStream:
+    """Incremental reader for one JSON document in a text file"""
+    
+    def __init__(self, f: TextIO, chunk_size: int):
+        self.f = f
+        self.chunk_size = chunk_size
+        self.decoder = json.JSONDecoder()
+        self.buffer = ""
+        self.position = 0
+        self.eof = False
+        self.fill()
+    
+    def fill(self, size: int = 0):
+        chunk = self.f.read(size or self.chunk_size)
+        if not chunk:
+            self.eof = True
+        self.buffer = self.buffer[self.position:] + chunk
+        self.position = 0
+    
+    def skip_whitespace(self):
+        while True:
+            while self.position < len(self.buffer) and self.buffer[self.position] in " \t\r\n":
+                self.position += 1
+            if self.position < len(self.buffer) or self.eof:
+                return
+            self.fill()
+    
+    def peek(self) -> str:
+        self.skip_whitespace()
+        return self.buffer[self.position] if self.position < len(self.buffer) else ""
+    
+    def expect(self, chars: str) -> str:
+        char = self.peek()
+        if not char or char not in chars:
+            raise ValueError(f"Malformed JSON: expected one of {chars!r}")
+        self.position += 1
+        return char
+    
+    def value(self) -> Any:
+        self.skip_whitespace()
+        while True:
+            try:
+                value, end = self.decoder.raw_decode(self.buffer, self.position)
+            except json.JSONDecodeError:
+                if self.eof:
+                    raise
+                # Grow geometrically so a large value is re-parsed O(log n) times
+                self.fill(max(self.chunk_size, len(self.buffer)))
+                continue
+            # A number at the end of the buffer may continue in the next chunk
+            if end == len(self.buffer) and not self.eof:
+                self.fill()
+                continue
+            self.position = end
+            return value
+
+def iter_snapshot(path: str, chunk_size: int = 1 << 20) -> Iterator[Tuple[str, Any]]:
+    """Stream the top-level sections of a JSON object file as (key, value) pairs
+    
+    Only one section is decoded at a time, so a large snapshot never has to be
+    held as a single string alongside its parsed form.
+    """
+    with open(path, "r", encoding="utf-8") as f:
+        stream = _JsonStream(f, chunk_size)
+        # Skip the checksummed header line of snapshot files
+        if stream.buffer.startswith("NOTSPYDB"):
+            stream.position = stream.buffer.index("\n") + 1
+        stream.expect("{")
+        if stream.peek() == "}":
+            return
+        while True:
+            key = stream.value()
+            stream.expect(":")
+            yield key, stream.value()
+            if stream.expect(",}") == "}":
+                return
+
+def iter_json_array(f: TextIO, chunk_size: int = 1 << 16) -> Iterator[Any]:
+    """Stream the elements of a JSON array (or of an object's "items" array)"""
+    stream = _JsonStream(f, chunk_size)
+    if stream.peek() == "{":
+        stream.expect("{")
+        while True:
+            key = stream.value()
+            stream.expect(":")
+            if key == "items":
+                break
+            stream.value()
+            stream.expect(",")
+    stream.expect("[")
+    if stream.peek() == "]":
+        return
+    while True:
+        yield stream.value()
+        if stream.expect(",]") == "]":
+            return
@@ -1,17 +1,101 @@
-import json
+import copy
+import itertools
 import os
-from typing import Dict, List, Any
-from pathlib import Path
+import time
+from datetime import datetime
+from typing import Callable, Dict, Generator, List, Any, Optional, Tuple, Union
 
-class DatabaseHelper:
+from database.recent_keys import RecentKeys
+from database.tenancy import TenantAwareStore, tenant_db_file
+from database.transactions import Entity, TransactionMixin
+
+# Idempotency keys remembered per store (oldest are forgotten first)
+IDEMPOTENCY_WINDOW = 5000
+
+class DatabaseHelper(TransactionMixin):
     def __init__(self, db_file: str = "database/data.json"):
         self.db_file = db_file
-        self.data = self.load_data()
+        self._data = None
+        # Codec, snapshots, event log and business info are created (and their
+        # modules imported) on first use, so importing the store stays cheap
+        self._codec = None
+        self._snapshots = None
+        self._events = None
+        self._business_info = None
+        self._search_index = None
+        self._idempotency_keys = RecentKeys(IDEMPOTENCY_WINDOW)
+        # Versions for render caches: bumped on every cart / catalog change
+        self._versions = itertools.count(1)
+        self._catalog_version = 0
+        self._cart_versions: Dict[int, int] = {}
+    
+    @property
+    def data(self) -> Dict[str, Any]:
+        """Database contents, read from disk on first access"""
+        if self._data is None:
+            self.data = self.load_data()
+        return self._data
+    
+    @data.setter
+    def data(self, value: Dict[str, Any]):
+        self._idempotency_keys = RecentKeys(IDEMPOTENCY_WINDOW, value.pop("idempotency_keys", []))
+        self._data = value
+        self._search_index = None
+        self._cart_versions = {}
+        self._catalog_version = next(self._versions)
+    
+    def to_json(self) -> Dict[str, Any]:
+        """Database in the data.json layout"""
+        return {**self.data, "idempotency_keys": self._idempotency_keys.to_list()}
+    
+    def load(self) -> Dict[str, Any]:
+        """Load the database eagerly (called from dispatcher startup)"""
+        return self.data
+    
+    @property
+    def codec(self):
+        if self._codec is None:
+            from database.codecs import get_codec
+            self._codec = get_codec()
+        return self._codec
+    
+    @property
+    def snapshots(self):
+        if self._snapshots is None:
+            from database.snapshots import SnapshotWriter
+            self._snapshots = SnapshotWriter(self.db_file, self.codec)
+        return self._snapshots
+    
+    @property
+    def events(self):
+        if self._events is None:
+            from database.events import EventLog
+            self._events = EventLog(os.path.splitext(self.db_file)[0] + ".events")
+        return self._events
+    
+    @property
+    def business_info(self):
+        """Contact, location and hours; edits are published to other processes"""
+        if self._business_info is None:
+            from database.business_info import BusinessInfo
+            self._business_info = BusinessInfo(self, os.path.splitext(self.db_file)[0] + ".info.json")
+        return self._business_info
+    
+    @property
+    def search_index(self):
+        """Catalog search index, built on first use"""
+        if self._search_index is None:
+            from database.search_index import CatalogIndex
+            self._search_index = CatalogIndex.from_data(self.data)
+        return self._search_index
     
     def load_data(self) -> Dict[str, Any]:
+        # Newest snapshot generation that passes validation
+        data = self.snapshots.load()
+        if data is not None:
+            return data
         if os.path.exists(self.db_file):
-            with open(self.db_file, 'r', encoding='utf-8') as f:
-                return json.load(f)
+            raise ValueError(f"No valid snapshot of {self.db_file} found")
         
         # Default data structure
         default_data = {
@@ -44,14 +128,58 @@ class DatabaseHelper:
         return default_data
     
     def save_data(self):
-        self.save_data_dict(self.data)
+        if self._defer_save():
+            return
+        self.save_data_dict(self.to_json)
     
-    def save_data_dict(self, data: Dict[str, Any]):
-        # Create directory if it doesn't exist
-        Path(self.db_file).parent.mkdir(parents=True, exist_ok=True)
+    def save_data_dict(self, data: Union[Dict[str, Any], Callable[[], Dict[str, Any]]]):
+        # Atomic checksummed snapshot, written in the background inside the event loop
+        self.snapshots.save(data)
+    
+    async def flush(self):
+        """Wait for pending background saves"""
+        # Writers that were never created have nothing pending
+        if self._snapshots is not None:
+            await self._snapshots.flush()
+        if self._events is not None:
+            await self._events.flush()
+    
+    def claim_key(self, key: str) -> bool:
+        """Record an idempotency key; False if the operation already ran
         
-        with open(self.db_file, 'w', encoding='utf-8') as f:
-            json.dump(data, f, indent=2, ensure_ascii=False)
+        The key is persisted with the next save, i.e. together with the
+        mutation it guards.
+        """
+        self.load()
+        return self._idempotency_keys.add(key)
+    
+    def cart_version(self, user_id: int) -> Tuple[int, int]:
+        """Changes whenever the user's cart or the catalog it is priced from changes"""
+        return self._catalog_version, self._cart_versions.get(user_id, 0)
+    
+    def _cart_changed(self, user_id: int):
+        self._cart_versions[user_id] = next(self._versions)
+    
+    def _entity_state(self, entity: Entity) -> Any:
+        kind, user_id = entity
+        if kind == "cart":
+            return copy.deepcopy(self.data["orders"].get(str(user_id)))
+        if kind == "orders":
+            return len(self.data.get("placed_orders", []))
+        raise ValueError(f"Unknown entity kind: {kind}")
+    
+    def _restore_entity(self, entity: Entity, state: Any):
+        kind, user_id = entity
+        if kind == "cart":
+            self._cart_changed(user_id)
+            if state is None:
+                self.data["orders"].pop(str(user_id), None)
+            else:
+                self.data["orders"][str(user_id)] = state
+        elif kind == "orders":
+            orders = self.data.get("placed_orders", [])
+            orders[:] = [order for position, order in enumerate(orders)
+                         if position < state or order["user_id"] != user_id]
     
     def get_menu_category(self, category: str) -> List[Dict]:
         return self.data.get("menu", {}).get(category, [])
@@ -63,6 +191,17 @@ class DatabaseHelper:
                     return item
         return {}
     
+    def add_items(self, item_type: str, entries: List[Tuple[str, Dict[str, Any]]]) -> List[Dict]:
+        """Insert or update many (category, item) entries with a single save"""
+        from database.catalog_io import upsert_items
+        applied = upsert_items(self.data.setdefault(item_type, {}), entries)
+        
+        if self._search_index is not None:
+            self._search_index.add_items(item_type, applied)
+        self._catalog_version = next(self._versions)
+        self.save_data()
+        return applied
+    
     def add_to_cart(self, user_id: int, item_id: int, quantity: int = 1):
         user_str = str(user_id)
         if user_str not in self.data["orders"]:
@@ -72,8 +211,12 @@ class DatabaseHelper:
             self.data["orders"][user_str]["items"][str(item_id)] += quantity
         else:
             self.data["orders"][user_str]["items"][str(item_id)] = quantity
+        self.data["orders"][user_str]["updated_at"] = time.time()
         
         self.update_cart_total(user_id)
+        self._cart_changed(user_id)
+        self.emit_event("cart_add", user_id, item_id, quantity=quantity,
+                        value=self.get_item_by_id(item_id).get("price", 0) * quantity)
         self.save_data()
     
     def update_cart_total(self, user_id: int):
@@ -91,10 +234,64 @@ class DatabaseHelper:
         return self.data["orders"].get(str(user_id), {"items": {}, "total": 0})
     
     def clear_cart(self, user_id: int):
-        user_str = str(user_id)
-        if user_str in self.data["orders"]:
-            self.data["orders"][user_str] = {"items": {}, "total": 0}
+        # Empty carts are removed rather than kept as {"items": {}}
+        if self.data["orders"].pop(str(user_id), None) is not None:
+            self._cart_changed(user_id)
             self.save_data()
+    
+    def place_order(self, user_id: int) -> Optional[Dict[str, Any]]:
+        """Turn the user's cart into an order and clear the cart, with one save"""
+        with self.atomic(("cart", user_id), ("orders", user_id)):
+            cart = self.data["orders"].get(str(user_id))
+            if not cart or not cart["items"]:
+                return None
+            orders = self.data.setdefault("placed_orders", [])
+            order = {
+                "id": orders[-1]["id"] + 1 if orders else 1,
+                "user_id": user_id,
+                "items": dict(cart["items"]),
+                "total": cart["total"],
+                "created_at": datetime.now().isoformat()
+            }
+            orders.append(order)
+            for item_id, quantity in order["items"].items():
+                price = self.get_item_by_id(int(item_id)).get("price", 0)
+                self.emit_event("checkout", user_id, int(item_id), quantity=quantity,
+                                value=price * quantity, extra=order["id"])
+            self.clear_cart(user_id)
+        return order
+    
+    def sweep_carts(self, ttl: float, now: float, batch: int = 200) -> Generator[None, None, Tuple[int, int, int, int]]:
+        """Remove empty and idle carts, yielding every `batch` carts
+        
+        Returns (expired, emptied, stamped, skipped) counts. Carts saved before timestamps
+        existed are stamped on the first sweep and expire one TTL later; carts locked by
+        a transaction are skipped until the next sweep.
+        """
+        orders = self.data["orders"]
+        expired = emptied = stamped = skipped = 0
+        for position, user_str in enumerate(list(orders), 1):
+            cart = orders.get(user_str)
+            if cart is not None and self.locks.locked(("cart", int(user_str))):
+                skipped += 1
+            elif cart is not None:
+                if not cart.get("items"):
+                    del orders[user_str]
+                    self._cart_changed(int(user_str))
+                    emptied += 1
+                elif "updated_at" not in cart:
+                    cart["updated_at"] = now
+                    stamped += 1
+                elif now - cart["updated_at"] > ttl:
+                    del orders[user_str]
+                    self._cart_changed(int(user_str))
+                    expired += 1
+            if position % batch == 0:
+                yield
+        return expired, emptied, stamped, skipped
 
-# Global database instance
-db = DatabaseHelper()
\ No newline at end of file
+# Global database instance, namespaced per tenant in multi-bot mode
+db = TenantAwareStore(
+    DatabaseHelper(),
+    lambda tenant: DatabaseHelper(tenant_db_file(tenant, "database/data.json"))
+)
\ No newline at end of file
@@ -1,26 +1,165 @@
 # database/enhanced_db_helper.py
-import json
+import copy
+import itertools
 import os
-from typing import Dict, List, Any, Optional
-from datetime import datetime
-from pathlib import Path
+import time
+from typing import Dict, Generator, List, Any, Optional, Set, Tuple
+from datetime import datetime, timezone
 
-class EnhancedDatabaseHelper:
-    def __init__(self, db_file: str = "database/data.json"):
+from database.models import (
+    Booking, Cart, Enrollment, RowCache,
+    bookings_from_json, carts_from_json, enrollment_rows, enrollments_from_json
+)
+from database.recent_keys import RecentKeys
+from database.transactions import Entity, TransactionMixin
+
+# Idempotency keys remembered per store (oldest are forgotten first)
+IDEMPOTENCY_WINDOW = 5000
+
+class EnhancedDatabaseHelper(TransactionMixin):
+    def __init__(self, db_file: str = "database/data.json", default_data: Optional[Dict[str, Any]] = None):
         self.db_file = db_file
-        self.data = self.load_data()
+        self.default_data = default_data or {}
+        self._data = None
+        # Codec, snapshots, event log, preferences and inventory are created (and
+        # their modules imported) on first use, so importing the store stays cheap
+        self._codec = None
+        self._snapshots = None
+        self._events = None
+        self._preferences = None
+        self._inventory = None
+        self._search_index = None
+        self._item_index: Dict[str, Dict[int, Dict]] = {}
+        # Carts, bookings and enrollments live as models, keyed by integer IDs
+        self._carts: Dict[int, Cart] = {}
+        self._bookings: Dict[int, Booking] = {}
+        self._enrollments: Dict[int, Dict[int, Enrollment]] = {}
+        # Their stored rows, re-encoded only for the entries changed since the last save
+        self._cart_rows = RowCache(Cart.to_row)
+        self._booking_rows = RowCache(Booking.to_row)
+        self._enrollment_rows = RowCache(enrollment_rows)
+        # (service_id, date) -> booked times, built on first use
+        self._booked_slots: Optional[Dict[Tuple[int, str], Set[str]]] = None
+        self._idempotency_keys = RecentKeys(IDEMPOTENCY_WINDOW)
+        # Versions for render caches: bumped on every cart / catalog change
+        self._versions = itertools.count(1)
+        self._catalog_version = 0
+        self._cart_versions: Dict[int, int] = {}
+    
+    @property
+    def data(self) -> Dict[str, Any]:
+        """Database contents, read from disk on first access"""
+        if self._data is None:
+            self.data = self.load_data()
+        return self._data
+    
+    @data.setter
+    def data(self, value: Dict[str, Any]):
+        self._carts = carts_from_json(value.pop("orders", {}))
+        self._bookings = bookings_from_json(value.pop("bookings", {}))
+        self._enrollments = enrollments_from_json(value.pop("enrollments", {}))
+        self._cart_rows.reset(self._carts)
+        self._booking_rows.reset(self._bookings)
+        self._enrollment_rows.reset(self._enrollments)
+        self._idempotency_keys = RecentKeys(IDEMPOTENCY_WINDOW, value.pop("idempotency_keys", []))
+        self._data = value
+        self._search_index = None
+        self._item_index = {}
+        self._booked_slots = None
+        self._cart_versions = {}
+        self._catalog_version = next(self._versions)
+    
+    @property
+    def carts(self) -> Dict[int, Cart]:
+        self.load()
+        return self._carts
+    
+    @property
+    def bookings(self) -> Dict[int, Booking]:
+        self.load()
+        return self._bookings
+    
+    @property
+    def enrollments(self) -> Dict[int, Dict[int, Enrollment]]:
+        self.load()
+        return self._enrollments
+    
+    def to_json(self) -> Dict[str, Any]:
+        """View of the database in the data.json layout, taken on every save
+        
+        Models are stored as rows; only those changed since the last save
+        are converted again.
+        """
+        return {
+            **self.data,
+            "orders": self._cart_rows.view(self._carts),
+            "bookings": self._booking_rows.view(self._bookings),
+            "enrollments": self._enrollment_rows.view(self._enrollments),
+            "idempotency_keys": self._idempotency_keys.to_list()
+        }
+    
+    def load(self) -> Dict[str, Any]:
+        """Load the database eagerly (called from dispatcher startup)"""
+        return self.data
+    
+    @property
+    def codec(self):
+        if self._codec is None:
+            from database.codecs import get_codec
+            self._codec = get_codec()
+        return self._codec
+    
+    @property
+    def snapshots(self):
+        if self._snapshots is None:
+            from database.snapshots import SnapshotWriter
+            self._snapshots = SnapshotWriter(self.db_file, self.codec)
+        return self._snapshots
+    
+    @property
+    def events(self):
+        if self._events is None:
+            from database.events import EventLog
+            self._events = EventLog(os.path.splitext(self.db_file)[0] + ".events")
+        return self._events
+    
+    @property
+    def preferences(self):
+        """Preferences and wishlists; they change often, so they are written separately"""
+        if self._preferences is None:
+            from database.preferences import PreferenceStore
+            self._preferences = PreferenceStore(os.path.splitext(self.db_file)[0] + ".prefs.json", self.codec)
+        return self._preferences
+    
+    @property
+    def inventory(self):
+        """Stock tracked for products; reservations live in memory only"""
+        if self._inventory is None:
+            from database.inventory import Inventory
+            self._inventory = Inventory(lambda item_id: self.get_item_by_id("products", item_id))
+        return self._inventory
+    
+    @property
+    def search_index(self):
+        """Catalog search index, built on first use"""
+        if self._search_index is None:
+            from database.search_index import CatalogIndex
+            self._search_index = CatalogIndex.from_data(self.data)
+        return self._search_index
     
     def load_data(self) -> Dict[str, Any]:
-        """Load data from JSON file"""
+        """Load data from the newest valid snapshot"""
+        data = self.snapshots.load()
+        if data is not None:
+            return data
         if os.path.exists(self.db_file):
-            with open(self.db_file, 'r', encoding='utf-8') as f:
-                return json.load(f)
+            raise ValueError(f"No valid snapshot of {self.db_file} found")
         
         return self.get_default_data()
     
     def get_default_data(self) -> Dict[str, Any]:
         """Get default data structure"""
-        return {
+        data = {
             "business_type": "restaurant",  # restaurant, shop, booking, education
             "menu": {},
             "products": {},
@@ -37,14 +176,79 @@ class EnhancedDatabaseHelper:
                 "service_fee": 0.00
             }
         }
+        data.update(copy.deepcopy(self.default_data))
+        return data
     
     def save_data(self):
-        """Save data to JSON file"""
-        Path(self.db_file).parent.mkdir(parents=True, exist_ok=True)
-        with open(self.db_file, 'w', encoding='utf-8') as f:
-            json.dump(self.data, f, indent=2, ensure_ascii=False)
+        """Save data as an atomic checksummed snapshot"""
+        if self._defer_save():
+            return
+        self.snapshots.save(self.to_json)
+    
+    async def flush(self):
+        """Wait for pending background saves"""
+        # Writers that were never created have nothing pending
+        for writer in (self._snapshots, self._events, self._preferences):
+            if writer is not None:
+                await writer.flush()
+    
+    def _entity_state(self, entity: Entity) -> Any:
+        kind, user_id = entity
+        if kind == "cart":
+            return copy.deepcopy(self.carts.get(user_id))
+        if kind == "booking":
+            return {booking_id: copy.deepcopy(booking)
+                    for booking_id, booking in self.bookings.items() if booking.user_id == user_id}
+        if kind == "enrollment":
+            return copy.deepcopy(self.enrollments.get(user_id))
+        if kind == "orders":
+            return len(self.data.get("placed_orders", []))
+        raise ValueError(f"Unknown entity kind: {kind}")
+    
+    def _restore_entity(self, entity: Entity, state: Any):
+        kind, user_id = entity
+        if kind == "cart":
+            self._cart_changed(user_id)
+        elif kind == "enrollment":
+            self._enrollment_rows.mark(user_id)
+        if kind in ("cart", "enrollment"):
+            entities = self.carts if kind == "cart" else self.enrollments
+            if state is None:
+                entities.pop(user_id, None)
+            else:
+                entities[user_id] = state
+        elif kind == "booking":
+            for booking_id in [booking_id for booking_id, booking in self.bookings.items()
+                               if booking.user_id == user_id and booking_id not in state]:
+                del self.bookings[booking_id]
+                self._booking_rows.mark(booking_id)
+            self.bookings.update(state)
+            for booking_id in state:
+                self._booking_rows.mark(booking_id)
+            self._booked_slots = None
+        elif kind == "orders":
+            orders = self.data.get("placed_orders", [])
+            orders[:] = [order for position, order in enumerate(orders)
+                         if position < state or order["user_id"] != user_id]
+    
+    def cart_version(self, user_id: int) -> Tuple[int, int]:
+        """Changes whenever the user's cart or the catalog it is priced from changes"""
+        return self._catalog_version, self._cart_versions.get(user_id, 0)
+    
+    def _cart_changed(self, user_id: int):
+        self._cart_versions[user_id] = next(self._versions)
+        self._cart_rows.mark(user_id)
     
     # User management
+    def claim_key(self, key: str) -> bool:
+        """Record an idempotency key; False if the operation already ran
+        
+        The key is persisted with the next save, i.e. together with the
+        mutation it guards.
+        """
+        self.load()
+        return self._idempotency_keys.add(key)
+    
     def get_user(self, user_id: int) -> Dict[str, Any]:
         """Get user data"""
         user_str = str(user_id)
@@ -58,154 +262,277 @@ class EnhancedDatabaseHelper:
         self.data["users"][user_str] = user_data
         self.save_data()
     
+    def get_user_preferences(self, user_id: int) -> Dict[str, Any]:
+        """Get a copy of user's preferences"""
+        return self.preferences.get_preferences(user_id)
+    
+    def save_user_preferences(self, user_id: int, preferences: Dict[str, Any]):
+        """Replace user's preferences (written in the next batched flush)"""
+        self.preferences.save_preferences(user_id, preferences)
+    
+    def get_wishlist(self, user_id: int) -> List[int]:
+        """Get user's wishlisted item IDs, oldest first"""
+        return self.preferences.get_wishlist(user_id)
+    
+    def toggle_wishlist(self, user_id: int, item_id: int) -> bool:
+        """Add or remove an item; True if it is now on the wishlist"""
+        if self.preferences.remove_from_wishlist(user_id, item_id):
+            return False
+        return self.preferences.add_to_wishlist(user_id, item_id)
+    
+    def get_wishlist_watchers(self, item_ids: List[int]) -> Dict[int, List[int]]:
+        """User -> items among `item_ids` on their wishlist (e.g. back in stock)"""
+        return self.preferences.wishers(item_ids)
+    
     # Generic item management (works for menu, products, services, courses)
     def get_items_by_category(self, item_type: str, category: str) -> List[Dict]:
         """Get items by category"""
         return self.data.get(item_type, {}).get(category, [])
     
-    def get_item_by_id(self, item_type: str, item_id: int) -> Optional[Dict]:
-        """Get item by ID from any category"""
+    def build_index(self, item_type: str) -> Dict[int, Dict]:
+        """Build the ID -> item index for one item type"""
+        index = {}
         for category in self.data.get(item_type, {}).values():
             for item in category:
-                if item.get("id") == item_id:
-                    return item
-        return None
+                index[item.get("id")] = item
+        self._item_index[item_type] = index
+        return index
+    
+    def get_item_by_id(self, item_type: str, item_id: int) -> Optional[Dict]:
+        """Get item by ID from any category"""
+        index = self._item_index.get(item_type)
+        if index is None:
+            index = self.build_index(item_type)
+        return index.get(item_id)
     
     def add_item(self, item_type: str, category: str, item_data: Dict[str, Any]):
         """Add new item to category"""
-        if item_type not in self.data:
-            self.data[item_type] = {}
-        if category not in self.data[item_type]:
-            self.data[item_type][category] = []
-        
-        # Auto-generate ID if not provided
-        if "id" not in item_data:
-            max_id = 0
-            for cat_items in self.data[item_type].values():
-                for item in cat_items:
-                    max_id = max(max_id, item.get("id", 0))
-            item_data["id"] = max_id + 1
+        return self.add_items(item_type, [(category, item_data)])[0]["id"]
+    
+    def add_items(self, item_type: str, entries: List[Tuple[str, Dict[str, Any]]]) -> List[Dict]:
+        """Insert or update many (category, item) entries with a single save"""
+        from database.catalog_io import upsert_items
+        applied = upsert_items(self.data.setdefault(item_type, {}), entries)
         
-        self.data[item_type][category].append(item_data)
+        index = self._item_index.get(item_type)
+        if index is not None:
+            for item in applied:
+                index[item["id"]] = item
+        if self._search_index is not None:
+            self._search_index.add_items(item_type, applied)
+        self._catalog_version = next(self._versions)
         self.save_data()
-        return item_data["id"]
+        return applied
     
     # Cart/Order management
+    def get_cart(self, user_id: int, item_type: str = "menu") -> Cart:
+        """Get user's cart (not stored until something is added)"""
+        return self.carts.get(user_id) or Cart(user_id=user_id, item_type=item_type)
+    
     def add_to_cart(self, user_id: int, item_id: int, quantity: int = 1, item_type: str = "menu"):
         """Add item to user's cart"""
-        user_str = str(user_id)
-        if user_str not in self.data["orders"]:
-            self.data["orders"][user_str] = {"items": {}, "total": 0, "item_type": item_type}
-        
-        item_key = f"{item_type}_{item_id}"
-        if item_key in self.data["orders"][user_str]["items"]:
-            self.data["orders"][user_str]["items"][item_key] += quantity
-        else:
-            self.data["orders"][user_str]["items"][item_key] = quantity
+        cart = self.carts.get(user_id)
+        if cart is None:
+            cart = self.carts[user_id] = Cart(user_id=user_id, item_type=item_type)
         
+        cart.add(item_id, quantity, item_type)
+        cart.updated_at = time.time()
         self.update_cart_total(user_id, item_type)
+        self._cart_changed(user_id)
+        item = self.get_item_by_id(item_type, item_id) or {}
+        self.emit_event("cart_add", user_id, item_id, quantity=quantity, value=item.get("price", 0) * quantity)
         self.save_data()
     
     def update_cart_total(self, user_id: int, item_type: str = "menu"):
         """Update cart total"""
-        user_str = str(user_id)
+        cart = self.carts.get(user_id)
+        if cart is None:
+            return
         total = 0
-        if user_str in self.data["orders"]:
-            for item_key, quantity in self.data["orders"][user_str]["items"].items():
-                if item_key.startswith(f"{item_type}_"):
-                    item_id = int(item_key.split("_")[1])
-                    item = self.get_item_by_id(item_type, item_id)
-                    if item:
-                        total += item.get("price", 0) * quantity
+        for line in cart.lines.values():
+            if line.item_type == item_type:
+                item = self.get_item_by_id(item_type, line.item_id)
+                if item:
+                    total += item.get("price", 0) * line.quantity
+        cart.total = total
+    
+    def reserve_to_cart(self, user_id: int, item_id: int, quantity: int = 1, item_type: str = "products") -> bool:
+        """Reserve stock and add the item to the cart; False if not enough is left"""
+        if not self.inventory.reserve(user_id, item_id, quantity):
+            return False
+        self.add_to_cart(user_id, item_id, quantity, item_type)
+        return True
+    
+    def clear_cart(self, user_id: int):
+        """Empty user's cart"""
+        self.inventory.release_user(user_id)
+        if self.carts.pop(user_id, None) is not None:
+            self._cart_changed(user_id)
+            self.save_data()
+    
+    def place_order(self, user_id: int) -> Optional[Dict[str, Any]]:
+        """Turn the user's cart into an order and clear the cart, with one save
         
-        self.data["orders"][user_str]["total"] = total
+        Reserved stock is confirmed once the order is built, right before
+        it is recorded; raises OutOfStock (changing nothing) if some product
+        can no longer be supplied.
+        """
+        with self.atomic(("cart", user_id), ("orders", user_id)):
+            cart = self.carts.get(user_id)
+            if cart is None or not cart.lines:
+                return None
+            orders = self.data.setdefault("placed_orders", [])
+            order = {
+                "id": orders[-1]["id"] + 1 if orders else 1,
+                "user_id": user_id,
+                "items": cart.order_items(),
+                "total": cart.total,
+                "created_at": datetime.now().isoformat()
+            }
+            prices = {}
+            for key, line in cart.lines.items():
+                item = self.get_item_by_id(line.item_type, line.item_id) or {}
+                prices[key] = item.get("price", 0)
+            # Stock and reservations are not part of the rolled-back state, so nothing may fail after this
+            self.inventory.confirm(user_id, {
+                line.item_id: line.quantity for line in cart.lines.values() if line.item_type == "products"
+            })
+            orders.append(order)
+            for key, line in cart.lines.items():
+                self.emit_event("checkout", user_id, line.item_id, quantity=line.quantity,
+                                value=prices[key] * line.quantity, extra=order["id"])
+            self.clear_cart(user_id)
+        return order
+    
+    def sweep_carts(self, ttl: float, now: float, batch: int = 200) -> Generator[None, None, Tuple[int, int, int, int]]:
+        """Remove empty and idle carts, yielding every `batch` carts
+        
+        Returns (expired, emptied, stamped, skipped) counts. Carts saved before timestamps
+        existed are stamped on the first sweep and expire one TTL later; carts locked by
+        a transaction are skipped until the next sweep.
+        """
+        carts = self.carts
+        expired = emptied = stamped = skipped = 0
+        for position, user_id in enumerate(list(carts), 1):
+            cart = carts.get(user_id)
+            if cart is not None and self.locks.locked(("cart", user_id)):
+                skipped += 1
+            elif cart is not None:
+                if not cart.lines:
+                    del carts[user_id]
+                    self._cart_changed(user_id)
+                    self.inventory.release_user(user_id)
+                    emptied += 1
+                elif not cart.updated_at:
+                    cart.updated_at = now
+                    self._cart_changed(user_id)
+                    stamped += 1
+                elif now - cart.updated_at > ttl:
+                    del carts[user_id]
+                    self._cart_changed(user_id)
+                    self.inventory.release_user(user_id)
+                    expired += 1
+            if position % batch == 0:
+                yield
+        return expired, emptied, stamped, skipped
     
     # Booking management
+    def get_service_by_id(self, service_id: int) -> Optional[Dict]:
+        """Get service by ID"""
+        return self.get_item_by_id("services", service_id)
+    
     def save_booking(self, booking_data: Dict[str, Any]) -> int:
         """Save appointment booking"""
-        if "bookings" not in self.data:
-            self.data["bookings"] = {}
-        
         # Generate booking ID
-        booking_id = len(self.data["bookings"]) + 1
+        booking_id = max(self.bookings, default=0) + 1
         booking_data["id"] = booking_id
         booking_data["created_at"] = datetime.now().isoformat()
         
-        self.data["bookings"][str(booking_id)] = booking_data
+        booking = self.bookings[booking_id] = Booking.from_json(booking_data)
+        self._booking_rows.mark(booking_id)
+        if self._booked_slots is not None and booking.status != "cancelled":
+            self._booked_slots.setdefault((booking.service_id, booking.date), set()).add(booking.time)
+        service = self.get_service_by_id(booking.service_id) or {}
+        try:
+            # Wall-clock time of the slot, independent of the server's timezone
+            slot = int(datetime.strptime(f"{booking.date} {booking.time}", "%Y-%m-%d %H:%M")
+                       .replace(tzinfo=timezone.utc).timestamp())
+        except ValueError:
+            slot = 0
+        self.emit_event("booking", booking.user_id, booking.service_id, quantity=1,
+                        value=service.get("price", 0), extra=slot)
         self.save_data()
         return booking_id
     
-    def get_user_bookings(self, user_id: int) -> List[Dict]:
+    def get_booked_slots(self, service_id: int, date: str) -> Set[str]:
+        """Times already booked for a service on a date (YYYY-MM-DD)"""
+        if self._booked_slots is None:
+            booked_slots: Dict[Tuple[int, str], Set[str]] = {}
+            for booking in self.bookings.values():
+                if booking.status != "cancelled":
+                    booked_slots.setdefault((booking.service_id, booking.date), set()).add(booking.time)
+            self._booked_slots = booked_slots
+        return self._booked_slots.get((service_id, date), set())
+    
+    def get_user_bookings(self, user_id: int) -> List[Booking]:
         """Get all bookings for a user"""
-        user_bookings = []
-        for booking in self.data.get("bookings", {}).values():
-            if booking.get("user_id") == user_id:
-                user_bookings.append(booking)
-        return sorted(user_bookings, key=lambda x: x.get("date", ""))
+        user_bookings = [booking for booking in self.bookings.values() if booking.user_id == user_id]
+        return sorted(user_bookings, key=lambda booking: booking.date)
     
     # Course/Education management
     def get_course_by_id(self, course_id: int) -> Optional[Dict]:
         """Get course by ID"""
         return self.get_item_by_id("courses", course_id)
     
-    def get_user_course_progress(self, user_id: int, course_id: int) -> Dict:
+    def get_course_lessons(self, course_id: int) -> List[Dict]:
+        """Get the lessons of a course"""
+        course = self.get_course_by_id(course_id)
+        if not course:
+            return []
+        if "lesson_list" in course:
+            return course["lesson_list"]
+        return [
+            {"id": i, "title": f"Lesson {i}"}
+            for i in range(1, course.get("lessons", 0) + 1)
+        ]
+    
+    def get_user_enrollments(self, user_id: int) -> Dict[int, Enrollment]:
+        """Get user's enrollments by course ID"""
+        return self.enrollments.get(user_id, {})
+    
+    def get_user_course_progress(self, user_id: int, course_id: int) -> Enrollment:
         """Get user's progress in a course"""
-        user_str = str(user_id)
-        course_str = str(course_id)
-        
-        if "enrollments" not in self.data:
-            self.data["enrollments"] = {}
-        
-        if user_str not in self.data["enrollments"]:
-            self.data["enrollments"][user_str] = {}
-        
-        return self.data["enrollments"][user_str].get(course_str, {
-            "enrolled": False,
-            "completed_lessons": 0,
-            "completed_lessons_ids": [],
-            "progress_percentage": 0
-        })
+        enrollment = self.enrollments.get(user_id, {}).get(course_id)
+        return enrollment or Enrollment(course_id=course_id)
     
     def enroll_user_in_course(self, user_id: int, course_id: int):
         """Enroll user in a course"""
-        user_str = str(user_id)
-        course_str = str(course_id)
-        
-        if "enrollments" not in self.data:
-            self.data["enrollments"] = {}
-        
-        if user_str not in self.data["enrollments"]:
-            self.data["enrollments"][user_str] = {}
-        
-        self.data["enrollments"][user_str][course_str] = {
-            "enrolled": True,
-            "enrolled_at": datetime.now().isoformat(),
-            "completed_lessons": 0,
-            "completed_lessons_ids": [],
-            "progress_percentage": 0
-        }
-        
+        self.enrollments.setdefault(user_id, {})[course_id] = Enrollment(
+            course_id=course_id,
+            enrolled=True,
+            enrolled_at=datetime.now().isoformat()
+        )
+        self._enrollment_rows.mark(user_id)
+        self.emit_event("enrollment", user_id, course_id)
         self.save_data()
     
     def mark_lesson_complete(self, user_id: int, course_id: int, lesson_id: int):
         """Mark a lesson as completed"""
-        user_str = str(user_id)
-        course_str = str(course_id)
-        
         progress = self.get_user_course_progress(user_id, course_id)
         
-        if lesson_id not in progress["completed_lessons_ids"]:
-            progress["completed_lessons_ids"].append(lesson_id)
-            progress["completed_lessons"] = len(progress["completed_lessons_ids"])
+        if lesson_id not in progress.completed_lessons_ids:
+            progress.completed_lessons_ids.append(lesson_id)
+            self.emit_event("lesson_complete", user_id, course_id, extra=lesson_id)
             
             # Calculate progress percentage
             course = self.get_course_by_id(course_id)
             if course:
                 total_lessons = course.get("lessons", 1)
-                progress["progress_percentage"] = (progress["completed_lessons"] / total_lessons) * 100
+                progress.progress_percentage = (progress.completed_lessons / total_lessons) * 100
         
-        self.data["enrollments"][user_str][course_str] = progress
+        self.enrollments.setdefault(user_id, {})[course_id] = progress
+        self._enrollment_rows.mark(user_id)
         self.save_data()
 
 # Global enhanced database instance
-enhanced_db = EnhancedDatabaseHelper()
\ No newline at end of file
+enhanced_db = EnhancedDatabaseHelper()
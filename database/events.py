@@ -0,0 +1,165 @@
+# database/events.py
+import asyncio
+import glob
+import logging
+import os
+import struct
+import time
+from array import array
+from typing import Dict, Iterator, List, Optional
+
+logger = logging.getLogger(__name__)
+
+# Event kinds, stored as one byte
+EVENT_KINDS = {
+    "cart_add": 1,
+    "checkout": 2,
+    "booking": 3,
+    "enrollment": 4,
+    "lesson_complete": 5
+}
+
+# Column name -> array typecode; every block stores the columns in this order
+#   ref:   item, service or course ID
+#   extra: order ID (checkout), slot wall-clock time as a UTC timestamp (booking), lesson ID (lesson_complete)
+COLUMNS = (
+    ("ts", "d"),
+    ("kind", "B"),
+    ("user_id", "q"),
+    ("ref", "q"),
+    ("quantity", "i"),
+    ("value", "d"),
+    ("extra", "q")
+)
+
+BLOCK_MAGIC = b"EVB1"
+BLOCK_HEADER = struct.Struct("<4sI")
+
+def _empty_columns() -> Dict[str, array]:
+    return {name: array(typecode) for name, typecode in COLUMNS}
+
+def encode_block(columns: Dict[str, array]) -> bytes:
+    """Columns as one block: magic, row count, then each column's raw values"""
+    count = len(columns["ts"])
+    return BLOCK_HEADER.pack(BLOCK_MAGIC, count) + b"".join(
+        columns[name].tobytes() for name, _ in COLUMNS
+    )
+
+def iter_blocks(path: str) -> Iterator[Dict[str, array]]:
+    """Decode the blocks of a segment file; a truncated last block is skipped"""
+    with open(path, "rb") as f:
+        raw = f.read()
+    offset = 0
+    while offset + BLOCK_HEADER.size <= len(raw):
+        magic, count = BLOCK_HEADER.unpack_from(raw, offset)
+        if magic != BLOCK_MAGIC:
+            break
+        offset += BLOCK_HEADER.size
+        columns = {}
+        for name, typecode in COLUMNS:
+            column = array(typecode)
+            size = column.itemsize * count
+            if offset + size > len(raw):
+                return
+            column.frombytes(raw[offset:offset + size])
+            columns[name] = column
+            offset += size
+        yield columns
+
+class EventLog:
+    """Append-only event stream stored as columnar blocks in rotating segment files
+    
+    Events are buffered in typed arrays and written as one block every
+    `block_size` events (in a worker thread while the loop runs) and on
+    flush. A segment is closed once it exceeds `segment_bytes`; only the
+    newest `max_segments` are kept. A block that fails to be written is
+    logged and dropped, and the next block starts a new segment.
+    """
+    
+    def __init__(self, directory: str, block_size: int = 1024,
+                 segment_bytes: int = 4 * 1024 * 1024, max_segments: int = 32):
+        self.directory = directory
+        self.block_size = block_size
+        self.segment_bytes = segment_bytes
+        self.max_segments = max_segments
+        self._buffer = _empty_columns()
+        self._task: Optional[asyncio.Task] = None
+        self._segment: Optional[str] = None
+        self.dropped = 0
+    
+    def __len__(self) -> int:
+        return len(self._buffer["ts"])
+    
+    def emit(self, kind: str, user_id: int, ref: int, quantity: int = 0,
+             value: float = 0.0, extra: int = 0, ts: Optional[float] = None):
+        buffer = self._buffer
+        buffer["ts"].append(time.time() if ts is None else ts)
+        buffer["kind"].append(EVENT_KINDS[kind])
+        buffer["user_id"].append(user_id)
+        buffer["ref"].append(ref)
+        buffer["quantity"].append(quantity)
+        buffer["value"].append(value)
+        buffer["extra"].append(extra)
+        if len(buffer["ts"]) >= self.block_size:
+            self._write_buffer()
+    
+    def segments(self) -> List[str]:
+        """Segment files, oldest first"""
+        return sorted(glob.glob(os.path.join(self.directory, "events-*.bin")))
+    
+    def _take_block(self) -> Optional[bytes]:
+        if not len(self):
+            return None
+        block = encode_block(self._buffer)
+        self._buffer = _empty_columns()
+        return block
+    
+    def _append(self, block: bytes):
+        os.makedirs(self.directory, exist_ok=True)
+        if self._segment is None or not os.path.exists(self._segment) \
+                or os.path.getsize(self._segment) >= self.segment_bytes:
+            self._segment = os.path.join(self.directory, f"events-{time.time_ns()}.bin")
+            for old in self.segments()[:-self.max_segments + 1 or None]:
+                os.remove(old)
+        with open(self._segment, "ab") as f:
+            f.write(block)
+    
+    def _write_buffer(self):
+        block = self._take_block()
+        if block is None:
+            return
+        try:
+            loop = asyncio.get_running_loop()
+        except RuntimeError:
+            self._append(block)
+            return
+        previous = self._task
+        self._task = loop.create_task(self._append_after(previous, block))
+    
+    async def _append_after(self, previous: Optional[asyncio.Task], block: bytes):
+        # Blocks are appended in order; each one handles its own failure
+        if previous is not None:
+            await asyncio.wait([previous])
+        try:
+            await asyncio.to_thread(self._append, block)
+        except Exception as e:
+            count = BLOCK_HEADER.unpack_from(block)[1]
+            self.dropped += count
+            # The segment may end in a partial block, which hides anything after it
+            self._segment = None
+            logger.error(f"Writing {count} events to {self.directory} failed, dropped: {e}")
+    
+    async def flush(self):
+        """Write buffered events and wait for pending appends"""
+        self._write_buffer()
+        if self._task is not None:
+            await self._task
+    
+    def read_columns(self) -> Dict[str, array]:
+        """Every stored event (flushed ones only), concatenated per column"""
+        columns = _empty_columns()
+        for path in self.segments():
+            for block in iter_blocks(path):
+                for name, _ in COLUMNS:
+                    columns[name].extend(block[name])
+        return columns
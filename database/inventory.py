@@ -0,0 +1,150 @@
+# database/inventory.py
+import time
+from typing import Callable, Dict, List, Optional, Set, Tuple
+
+# (user_id, item_id)
+ReservationKey = Tuple[int, int]
+
+class OutOfStock(Exception):
+    """Raised when an order asks for more than is available"""
+    
+    def __init__(self, item_ids: List[int]):
+        super().__init__(f"Out of stock: {item_ids}")
+        self.item_ids = item_ids
+
+class TimerWheel:
+    """Hashed timer wheel: O(1) scheduling, expiry work proportional to due keys
+    
+    Keys land in the slot of their deadline; `advance` walks the slots
+    passed since the previous call. A key may be scheduled again later; the
+    caller checks on expiry whether it is really due.
+    """
+    
+    def __init__(self, tick: float = 1.0, slots: int = 512, now: Optional[float] = None):
+        self.tick = tick
+        self.slots: List[Set] = [set() for _ in range(slots)]
+        self._current = int((time.time() if now is None else now) // tick)
+    
+    def schedule(self, key, deadline: float):
+        tick = max(int(deadline // self.tick), self._current + 1)
+        self.slots[tick % len(self.slots)].add(key)
+    
+    def advance(self, now: float) -> List:
+        """Keys from every slot passed up to `now` (possibly not yet due)"""
+        target = int(now // self.tick)
+        due = []
+        # A full turn visits every slot once
+        for tick in range(self._current + 1, min(target, self._current + len(self.slots)) + 1):
+            slot = self.slots[tick % len(self.slots)]
+            if slot:
+                due.extend(slot)
+                slot.clear()
+        self._current = max(self._current, target)
+        return due
+
+class Inventory:
+    """Stock counters with time-limited reservations for carts
+    
+    `get_item(item_id)` returns the catalog dict whose "stock" field is the
+    on-hand count (no "stock" means unlimited). Reservations hold units
+    for `ttl` seconds from the last cart change; expired ones are released
+    lazily by the timer wheel before any availability check. All methods
+    are synchronous, so each runs atomically on the event loop.
+    """
+    
+    def __init__(self, get_item: Callable[[int], Optional[Dict]], ttl: float = 900.0):
+        self.get_item = get_item
+        self.ttl = ttl
+        self.wheel = TimerWheel(tick=1.0, slots=max(int(ttl) + 2, 64))
+        # (user_id, item_id) -> [quantity, expires_at]
+        self.reservations: Dict[ReservationKey, List[float]] = {}
+        self.reserved: Dict[int, int] = {}
+        self._by_user: Dict[int, Set[int]] = {}
+        self.stats: Dict[str, int] = {"reserved": 0, "rejected": 0, "expired": 0, "confirmed": 0}
+    
+    def expire(self, now: Optional[float] = None) -> int:
+        """Release reservations whose TTL has passed"""
+        now = time.time() if now is None else now
+        released = 0
+        for key in self.wheel.advance(now):
+            reservation = self.reservations.get(key)
+            if reservation is None:
+                continue
+            if reservation[1] > now:
+                self.wheel.schedule(key, reservation[1])
+                continue
+            self._drop(key)
+            released += 1
+        self.stats["expired"] += released
+        return released
+    
+    def available(self, item_id: int, now: Optional[float] = None) -> Optional[int]:
+        """Units that can still be reserved; None when stock is not tracked"""
+        self.expire(now)
+        item = self.get_item(item_id)
+        if not item or item.get("stock") is None:
+            return None
+        return max(int(item["stock"]) - self.reserved.get(item_id, 0), 0)
+    
+    def reserve(self, user_id: int, item_id: int, quantity: int = 1, now: Optional[float] = None) -> bool:
+        """Hold `quantity` more units for the user; False if not enough are left"""
+        now = time.time() if now is None else now
+        available = self.available(item_id, now)
+        if available is not None and available < quantity:
+            self.stats["rejected"] += 1
+            return False
+        
+        key = (user_id, item_id)
+        reservation = self.reservations.get(key)
+        if reservation is None:
+            reservation = self.reservations[key] = [0, 0.0]
+            self._by_user.setdefault(user_id, set()).add(item_id)
+        reservation[0] += quantity
+        reservation[1] = now + self.ttl
+        self.reserved[item_id] = self.reserved.get(item_id, 0) + quantity
+        self.wheel.schedule(key, reservation[1])
+        self.stats["reserved"] += 1
+        return True
+    
+    def _drop(self, key: ReservationKey):
+        quantity, _ = self.reservations.pop(key)
+        user_id, item_id = key
+        self.reserved[item_id] -= quantity
+        if not self.reserved[item_id]:
+            del self.reserved[item_id]
+        items = self._by_user.get(user_id)
+        if items is not None:
+            items.discard(item_id)
+            if not items:
+                del self._by_user[user_id]
+    
+    def release_user(self, user_id: int):
+        """Give back everything the user holds (cart cleared or expired)"""
+        for item_id in list(self._by_user.get(user_id, ())):
+            self._drop((user_id, item_id))
+    
+    def confirm(self, user_id: int, quantities: Dict[int, int], now: Optional[float] = None):
+        """Turn the user's reservations into sold stock, all items or none
+        
+        Lines whose reservation expired are re-reserved if stock allows.
+        Raises OutOfStock listing the items that cannot be fulfilled.
+        """
+        now = time.time() if now is None else now
+        self.expire(now)
+        short = []
+        for item_id, quantity in quantities.items():
+            held = self.reservations.get((user_id, item_id), (0,))[0]
+            available = self.available(item_id, now)
+            if available is not None and held < quantity and available < quantity - held:
+                short.append(item_id)
+        if short:
+            raise OutOfStock(short)
+        
+        for item_id, quantity in quantities.items():
+            if (user_id, item_id) in self.reservations:
+                self._drop((user_id, item_id))
+            item = self.get_item(item_id)
+            if item and item.get("stock") is not None:
+                item["stock"] = int(item["stock"]) - quantity
+        self.release_user(user_id)
+        self.stats["confirmed"] += 1
@@ -0,0 +1,171 @@
+# database/models.py
+import sys
+from dataclasses import dataclass, field
+from typing import Any, Callable, Dict, Hashable, List, Optional, Set, Tuple
+
+@dataclass(slots=True)
+class CartLine:
+    item_id: int
+    quantity: int
+    item_type: str = "menu"
+
+@dataclass(slots=True)
+class Cart:
+    """A user's cart; lines are keyed by integer item ID"""
+    user_id: int
+    item_type: str = "menu"
+    lines: Dict[int, CartLine] = field(default_factory=dict)
+    total: float = 0.0
+    updated_at: float = 0.0
+    
+    @classmethod
+    def from_json(cls, user_id: int, data: Any) -> "Cart":
+        """Cart from its stored row, or from the legacy dict layout"""
+        if isinstance(data, list):
+            item_type, total, updated_at, lines = data
+            cart = cls(user_id=user_id, item_type=sys.intern(item_type), total=total, updated_at=updated_at)
+            for item_id, quantity, line_type in lines:
+                cart.lines[item_id] = CartLine(item_id, quantity, sys.intern(line_type))
+            return cart
+        
+        cart = cls(
+            user_id=user_id,
+            item_type=sys.intern(data.get("item_type", "menu")),
+            total=data.get("total", 0),
+            updated_at=data.get("updated_at", 0.0)
+        )
+        for key, quantity in data.get("items", {}).items():
+            # Legacy keys are "<item_type>_<id>" (item types never contain "_")
+            item_type, _, item_id = key.rpartition("_")
+            item_id = int(item_id)
+            cart.lines[item_id] = CartLine(item_id, quantity, sys.intern(item_type) if item_type else cart.item_type)
+        return cart
+    
+    def to_row(self) -> Tuple:
+        """Stored form: (item_type, total, updated_at, ((item_id, quantity, item_type), ...))"""
+        return (
+            self.item_type, self.total, self.updated_at,
+            tuple((line.item_id, line.quantity, line.item_type) for line in self.lines.values())
+        )
+    
+    def order_items(self) -> Dict[str, int]:
+        """Quantities keyed "<item_type>_<id>", as recorded in placed orders"""
+        return {f"{line.item_type}_{line.item_id}": line.quantity for line in self.lines.values()}
+    
+    def add(self, item_id: int, quantity: int = 1, item_type: Optional[str] = None):
+        line = self.lines.get(item_id)
+        if line is None:
+            self.lines[item_id] = CartLine(item_id, quantity, item_type or self.item_type)
+        else:
+            line.quantity += quantity
+
+@dataclass(slots=True)
+class Booking:
+    id: int
+    user_id: int
+    service_id: int
+    date: str
+    time: str
+    status: str = "confirmed"
+    created_at: str = ""
+    
+    @classmethod
+    def from_json(cls, data: Any) -> "Booking":
+        """Booking from its stored row, or from a dict (legacy layout, new bookings)"""
+        if isinstance(data, list):
+            booking_id, user_id, service_id, date, time, status, created_at = data
+            return cls(booking_id, user_id, service_id, sys.intern(date), sys.intern(time), sys.intern(status), created_at)
+        return cls(
+            id=int(data["id"]),
+            user_id=int(data["user_id"]),
+            service_id=int(data["service_id"]),
+            # Low-cardinality strings are interned so bookings share them
+            date=sys.intern(data.get("date", "")),
+            time=sys.intern(data.get("time", "")),
+            status=sys.intern(data.get("status", "confirmed")),
+            created_at=data.get("created_at", "")
+        )
+    
+    def to_row(self) -> Tuple:
+        """Stored form: (id, user_id, service_id, date, time, status, created_at)"""
+        return self.id, self.user_id, self.service_id, self.date, self.time, self.status, self.created_at
+
+@dataclass(slots=True)
+class Enrollment:
+    """A user's progress in one course"""
+    course_id: int
+    enrolled: bool = False
+    enrolled_at: str = ""
+    completed_lessons_ids: List[int] = field(default_factory=list)
+    progress_percentage: float = 0.0
+    
+    @property
+    def completed_lessons(self) -> int:
+        return len(self.completed_lessons_ids)
+    
+    @classmethod
+    def from_json(cls, course_id: int, data: Any) -> "Enrollment":
+        """Enrollment from its stored row, or from the legacy dict layout"""
+        if isinstance(data, list):
+            enrolled, enrolled_at, completed_lessons_ids, progress_percentage = data
+            return cls(course_id, enrolled, enrolled_at, list(completed_lessons_ids), progress_percentage)
+        return cls(
+            course_id=course_id,
+            enrolled=data.get("enrolled", False),
+            enrolled_at=data.get("enrolled_at", ""),
+            completed_lessons_ids=list(data.get("completed_lessons_ids", [])),
+            progress_percentage=data.get("progress_percentage", 0.0)
+        )
+    
+    def to_row(self) -> Tuple:
+        """Stored form: (enrolled, enrolled_at, completed_lessons_ids, progress_percentage)"""
+        return self.enrolled, self.enrolled_at, tuple(self.completed_lessons_ids), self.progress_percentage
+
+# Converters from the JSON sections of data.json to model maps
+
+def carts_from_json(orders: Dict[str, Any]) -> Dict[int, Cart]:
+    return {int(user_id): Cart.from_json(int(user_id), cart) for user_id, cart in orders.items()}
+
+def bookings_from_json(bookings: Dict[str, Any]) -> Dict[int, Booking]:
+    return {int(booking_id): Booking.from_json(booking) for booking_id, booking in bookings.items()}
+
+def enrollments_from_json(enrollments: Dict[str, Any]) -> Dict[int, Dict[int, Enrollment]]:
+    return {
+        int(user_id): {int(course_id): Enrollment.from_json(int(course_id), progress) for course_id, progress in courses.items()}
+        for user_id, courses in enrollments.items()
+    }
+
+def enrollment_rows(courses: Dict[int, Enrollment]) -> Dict[int, Tuple]:
+    return {course_id: enrollment.to_row() for course_id, enrollment in courses.items()}
+
+class RowCache:
+    """Stored rows of a model map, rebuilt only for the keys marked as changed
+    
+    view() is copy-on-write: a returned dict is never modified afterwards, so
+    it can be encoded in another thread while the models keep changing.
+    """
+    
+    def __init__(self, to_row: Callable[[Any], Any]):
+        self.to_row = to_row
+        self._rows: Dict[Hashable, Any] = {}
+        self._changed: Set[Hashable] = set()
+    
+    def mark(self, key: Hashable):
+        self._changed.add(key)
+    
+    def reset(self, models: Dict[Hashable, Any]):
+        """Forget every row; all models are encoded with the next view"""
+        self._rows = {}
+        self._changed = set(models)
+    
+    def view(self, models: Dict[Hashable, Any]) -> Dict[Hashable, Any]:
+        if self._changed:
+            rows = dict(self._rows)
+            for key in self._changed:
+                model = models.get(key)
+                if model is None:
+                    rows.pop(key, None)
+                else:
+                    rows[key] = self.to_row(model)
+            self._rows, self._changed = rows, set()
+        return self._rows
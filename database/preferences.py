@@ -0,0 +1,143 @@
+# database/preferences.py
+import asyncio
+import logging
+from typing import Any, Dict, Iterable, List, Optional, Set
+
+from database.snapshots import SnapshotWriter
+
+logger = logging.getLogger(__name__)
+
+class PreferenceStore:
+    """Per-user preferences and wishlists, kept apart from the catalog file
+    
+    Changes only mark the store dirty; a flush writes everything at most
+    once every `flush_interval` seconds (immediately outside an event
+    loop). Each user keeps at most `max_preferences` keys and
+    `max_wishlist` items, the oldest being dropped first. An item -> users
+    index answers wishlist lookups by item without scanning every user.
+    """
+    
+    def __init__(self, path: str, codec, flush_interval: float = 5.0,
+                 max_preferences: int = 50, max_wishlist: int = 100):
+        self.snapshots = SnapshotWriter(path, codec, generations=2)
+        self.flush_interval = flush_interval
+        self.max_preferences = max_preferences
+        self.max_wishlist = max_wishlist
+        self._users: Optional[Dict[int, Dict[str, Any]]] = None
+        self._wishers: Dict[int, Set[int]] = {}
+        self._dirty = False
+        self._flush_task: Optional[asyncio.Task] = None
+    
+    @property
+    def users(self) -> Dict[int, Dict[str, Any]]:
+        return self.load()
+    
+    def load(self) -> Dict[int, Dict[str, Any]]:
+        """Read the saved records and build the item index on first use"""
+        if self._users is None:
+            saved = self.snapshots.load() or {}
+            self._users = {
+                int(user_id): {"preferences": record.get("preferences", {}), "wishlist": record.get("wishlist", [])}
+                for user_id, record in saved.items()
+            }
+            for user_id, record in self._users.items():
+                for item_id in record["wishlist"]:
+                    self._wishers.setdefault(item_id, set()).add(user_id)
+        return self._users
+    
+    def _record(self, user_id: int) -> Dict[str, Any]:
+        record = self.users.get(user_id)
+        if record is None:
+            record = self.users[user_id] = {"preferences": {}, "wishlist": []}
+        return record
+    
+    def to_json(self) -> Dict[str, Any]:
+        return {str(user_id): record for user_id, record in self.users.items()}
+    
+    # Preferences
+    def get_preferences(self, user_id: int) -> Dict[str, Any]:
+        record = self.users.get(user_id)
+        return dict(record["preferences"]) if record else {}
+    
+    def save_preferences(self, user_id: int, preferences: Dict[str, Any]):
+        stored = self._record(user_id)["preferences"]
+        for key, value in preferences.items():
+            # Re-inserting moves the key to the newest position
+            stored.pop(key, None)
+            stored[key] = value
+        for key in [key for key in stored if key not in preferences]:
+            del stored[key]
+        while len(stored) > self.max_preferences:
+            del stored[next(iter(stored))]
+        self._mark_dirty()
+    
+    # Wishlist
+    def get_wishlist(self, user_id: int) -> List[int]:
+        record = self.users.get(user_id)
+        return list(record["wishlist"]) if record else []
+    
+    def add_to_wishlist(self, user_id: int, item_id: int) -> bool:
+        """Add an item; False if it was already there"""
+        wishlist = self._record(user_id)["wishlist"]
+        if item_id in wishlist:
+            return False
+        wishlist.append(item_id)
+        self._wishers.setdefault(item_id, set()).add(user_id)
+        while len(wishlist) > self.max_wishlist:
+            self._unindex(wishlist.pop(0), user_id)
+        self._mark_dirty()
+        return True
+    
+    def remove_from_wishlist(self, user_id: int, item_id: int) -> bool:
+        """Remove an item; False if it wasn't there"""
+        record = self.users.get(user_id)
+        if record is None or item_id not in record["wishlist"]:
+            return False
+        record["wishlist"].remove(item_id)
+        self._unindex(item_id, user_id)
+        self._mark_dirty()
+        return True
+    
+    def _unindex(self, item_id: int, user_id: int):
+        wishers = self._wishers.get(item_id)
+        if wishers is not None:
+            wishers.discard(user_id)
+            if not wishers:
+                del self._wishers[item_id]
+    
+    def wishers(self, item_ids: Iterable[int]) -> Dict[int, List[int]]:
+        """User -> wishlisted items among `item_ids`, e.g. the ones back in stock"""
+        self.load()
+        notify: Dict[int, List[int]] = {}
+        for item_id in item_ids:
+            for user_id in self._wishers.get(item_id, ()):
+                notify.setdefault(user_id, []).append(item_id)
+        return notify
+    
+    # Write-back
+    def _mark_dirty(self):
+        self._dirty = True
+        try:
+            loop = asyncio.get_running_loop()
+        except RuntimeError:
+            self.write()
+            return
+        if self._flush_task is None or self._flush_task.done():
+            self._flush_task = loop.create_task(self._flush_later())
+    
+    async def _flush_later(self):
+        await asyncio.sleep(self.flush_interval)
+        self.write()
+    
+    def write(self):
+        """Save now if anything changed (in the background inside the loop)"""
+        if self._dirty:
+            self._dirty = False
+            self.snapshots.save(self.to_json)
+    
+    async def flush(self):
+        """Write pending changes and wait for the write"""
+        if self._flush_task is not None and not self._flush_task.done():
+            self._flush_task.cancel()
+        self.write()
+        await self.snapshots.flush()
@@ -0,0 +1,45 @@
+# database/recent_keys.py
+from typing import Any, Dict, Hashable, Iterable, List, Optional
+
+class RecentKeys:
+    """Fixed-size ring buffer of recent keys with O(1) membership checks
+    
+    Once full, each new key evicts the oldest one.
+    """
+    
+    def __init__(self, size: int, initial: Iterable[Hashable] = ()):
+        self.size = size
+        self._ring: List[Optional[Hashable]] = [None] * size
+        self._positions: Dict[Hashable, int] = {}
+        self._next = 0
+        for key in initial:
+            self.add(key)
+    
+    def __contains__(self, key: Hashable) -> bool:
+        return key in self._positions
+    
+    def __len__(self) -> int:
+        return len(self._positions)
+    
+    def add(self, key: Hashable) -> bool:
+        """Remember a key; False if it is already in the window"""
+        if key in self._positions:
+            return False
+        oldest = self._ring[self._next]
+        if oldest is not None:
+            del self._positions[oldest]
+        self._ring[self._next] = key
+        self._positions[key] = self._next
+        self._next = (self._next + 1) % self.size
+        return True
+    
+    def discard(self, key: Hashable):
+        """Forget a key so it is accepted again"""
+        position = self._positions.pop(key, None)
+        if position is not None:
+            self._ring[position] = None
+    
+    def to_list(self) -> List[Any]:
+        """Keys from oldest to newest"""
+        ordered = self._ring[self._next:] + self._ring[:self._next]
+        return [key for key in ordered if key is not None]
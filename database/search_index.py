@@ -0,0 +1,159 @@
+# database/search_index.py
+import heapq
+import re
+from bisect import bisect_left, insort
+from contextlib import contextmanager
+from typing import Any, Dict, Iterable, Iterator, List, Sequence, Set, Tuple
+
+ITEM_TYPES = ("menu", "products", "services", "courses")
+
+# Score of a query term hitting an item token
+EXACT_SCORE = 3.0
+PREFIX_SCORE = 2.0
+FUZZY_SCORE = 1.0
+NAME_BONUS = 2.0
+
+# Bounds that keep short or vague queries cheap
+MAX_PREFIX_EXPANSION = 64
+MIN_FUZZY_LENGTH = 4
+
+# Batches of at least this many items sort the vocabulary once instead of
+# inserting each new token (an O(V) list insert)
+BATCH_SIZE = 64
+
+_TOKEN_RE = re.compile(r"\w+", re.UNICODE)
+
+def tokenize(text: str) -> List[str]:
+    return _TOKEN_RE.findall(text.lower())
+
+def _deletes(token: str) -> Set[str]:
+    """All strings one deletion away from a token"""
+    return {token[:i] + token[i + 1:] for i in range(len(token))}
+
+DocKey = Tuple[str, int]
+
+class CatalogIndex:
+    """In-memory inverted index over item names and descriptions
+    
+    Matching is exact, prefix (bisect over the sorted vocabulary) and
+    one-edit typo tolerant (symmetric delete dictionary). Bulk indexing runs
+    in batch(), which rebuilds the vocabulary once at the end.
+    """
+    
+    def __init__(self):
+        self.items: Dict[DocKey, Dict[str, Any]] = {}
+        self.postings: Dict[str, Dict[DocKey, float]] = {}
+        self.vocabulary: List[str] = []
+        self.deletes: Dict[str, Set[str]] = {}
+        self._doc_tokens: Dict[DocKey, Set[str]] = {}
+        self._batched = False
+    
+    @classmethod
+    def from_data(cls, data: Dict[str, Any], item_types: Iterable[str] = ITEM_TYPES) -> "CatalogIndex":
+        index = cls()
+        with index.batch():
+            for item_type in item_types:
+                for items in data.get(item_type, {}).values():
+                    for item in items:
+                        index.add(item_type, item)
+        return index
+    
+    @contextmanager
+    def batch(self) -> Iterator[None]:
+        """Leave the vocabulary unsorted while the block indexes items, then sort it once"""
+        self._batched = True
+        try:
+            yield
+        finally:
+            self._batched = False
+            self.vocabulary = sorted(self.postings)
+    
+    def add_items(self, item_type: str, items: Sequence[Dict[str, Any]]):
+        """Index (or re-index) many items, e.g. the result of an import"""
+        if len(items) < BATCH_SIZE:
+            for item in items:
+                self.add(item_type, item)
+            return
+        with self.batch():
+            for item in items:
+                self.add(item_type, item)
+    
+    def add(self, item_type: str, item: Dict[str, Any]):
+        """Index an item (re-indexes it if already present)"""
+        key = (item_type, item["id"])
+        if key in self.items:
+            self.remove(item_type, item["id"])
+        
+        weights: Dict[str, float] = {}
+        for token in tokenize(item.get("name", "")):
+            weights[token] = 1.0 + NAME_BONUS
+        for token in tokenize(item.get("description", "")):
+            weights.setdefault(token, 1.0)
+        
+        self.items[key] = item
+        self._doc_tokens[key] = set(weights)
+        for token, weight in weights.items():
+            postings = self.postings.get(token)
+            if postings is None:
+                postings = self.postings[token] = {}
+                if not self._batched:
+                    insort(self.vocabulary, token)
+                if len(token) >= MIN_FUZZY_LENGTH:
+                    for variant in _deletes(token):
+                        self.deletes.setdefault(variant, set()).add(token)
+            postings[key] = weight
+    
+    def remove(self, item_type: str, item_id: int):
+        key = (item_type, item_id)
+        if self.items.pop(key, None) is None:
+            return
+        for token in self._doc_tokens.pop(key):
+            postings = self.postings[token]
+            del postings[key]
+            if not postings:
+                del self.postings[token]
+                if not self._batched:
+                    del self.vocabulary[bisect_left(self.vocabulary, token)]
+                if len(token) >= MIN_FUZZY_LENGTH:
+                    for variant in _deletes(token):
+                        tokens = self.deletes[variant]
+                        tokens.discard(token)
+                        if not tokens:
+                            del self.deletes[variant]
+    
+    def _expand(self, term: str) -> Dict[str, float]:
+        """Vocabulary tokens matching a query term, with their match score"""
+        matches: Dict[str, float] = {}
+        
+        start = bisect_left(self.vocabulary, term)
+        for token in self.vocabulary[start:start + MAX_PREFIX_EXPANSION]:
+            if not token.startswith(term):
+                break
+            matches[token] = EXACT_SCORE if token == term else PREFIX_SCORE
+        
+        if len(term) >= MIN_FUZZY_LENGTH:
+            # Tokens within one edit: shared deletes, a token equal to a delete of the term, or vice versa
+            candidates = set(self.deletes.get(term, ()))
+            for variant in _deletes(term):
+                if variant in self.postings:
+                    candidates.add(variant)
+                candidates.update(self.deletes.get(variant, ()))
+            for token in candidates:
+                matches.setdefault(token, FUZZY_SCORE)
+        return matches
+    
+    def search(self, query: str, limit: int = 10) -> List[Tuple[str, Dict[str, Any]]]:
+        """Top items for a query as (item_type, item) pairs, best first"""
+        scores: Dict[DocKey, float] = {}
+        for term in tokenize(query):
+            term_scores: Dict[DocKey, float] = {}
+            for token, match_score in self._expand(term).items():
+                for key, weight in self.postings[token].items():
+                    score = match_score * weight
+                    if score > term_scores.get(key, 0.0):
+                        term_scores[key] = score
+            for key, score in term_scores.items():
+                scores[key] = scores.get(key, 0.0) + score
+        
+        best = heapq.nlargest(limit, scores.items(), key=lambda entry: entry[1])
+        return [(key[0], self.items[key]) for key, _ in best]
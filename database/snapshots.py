@@ -0,0 +1,189 @@
+# database/snapshots.py
+import asyncio
+import logging
+import os
+import tempfile
+import zlib
+from typing import Any, Callable, Dict, Optional, Union
+
+logger = logging.getLogger(__name__)
+
+# Snapshot header: magic, CRC32 and length of the payload that follows
+MAGIC = b"NOTSPYDB1"
+
+def encode_header(payload: bytes) -> bytes:
+    return b"%s %08x %d\n" % (MAGIC, zlib.crc32(payload), len(payload))
+
+def decode_snapshot(raw: bytes) -> Optional[bytes]:
+    """Return the payload of a snapshot, or None if it is truncated or corrupt"""
+    if not raw.startswith(MAGIC):
+        # Legacy plain JSON file written before snapshots had a header
+        return raw if raw.lstrip().startswith(b"{") else None
+    
+    newline = raw.find(b"\n")
+    if newline < 0:
+        return None
+    try:
+        _, checksum, length = raw[:newline].split(b" ")
+        checksum, length = int(checksum, 16), int(length)
+    except ValueError:
+        return None
+    
+    payload = raw[newline + 1:]
+    if len(payload) != length or zlib.crc32(payload) != checksum:
+        return None
+    return payload
+
+def generation_path(path: str, generation: int) -> str:
+    return path if generation == 0 else f"{path}.{generation}"
+
+def _fsync_dir(directory: str):
+    if os.name != "posix":
+        return
+    fd = os.open(directory, os.O_RDONLY)
+    try:
+        os.fsync(fd)
+    finally:
+        os.close(fd)
+
+def write_snapshot(path: str, payload: bytes, generations: int = 3):
+    """Atomically replace a snapshot, keeping older generations as path.1, path.2, ..."""
+    directory = os.path.dirname(path) or "."
+    os.makedirs(directory, exist_ok=True)
+    
+    fd, tmp_path = tempfile.mkstemp(prefix=os.path.basename(path) + ".", suffix=".tmp", dir=directory)
+    try:
+        with os.fdopen(fd, "wb") as f:
+            f.write(encode_header(payload))
+            f.write(payload)
+            f.flush()
+            os.fsync(f.fileno())
+        
+        # Shift older generations; the oldest one is overwritten
+        for generation in range(generations - 1, 0, -1):
+            older = generation_path(path, generation - 1)
+            if os.path.exists(older):
+                os.replace(older, generation_path(path, generation))
+        os.replace(tmp_path, path)
+    except BaseException:
+        if os.path.exists(tmp_path):
+            os.unlink(tmp_path)
+        raise
+    _fsync_dir(directory)
+
+def read_snapshot(path: str, generations: int = 3, parse: Optional[Callable[[bytes], Any]] = None) -> Any:
+    """Payload of the newest valid generation, or None if there is none
+    
+    With `parse`, the parsed payload is returned and a generation that fails
+    to parse (e.g. a truncated legacy file without checksum) counts as damaged.
+    """
+    for generation in range(generations):
+        candidate = generation_path(path, generation)
+        if not os.path.exists(candidate):
+            continue
+        with open(candidate, "rb") as f:
+            payload = decode_snapshot(f.read())
+        if payload is not None and parse is not None:
+            try:
+                payload = parse(payload)
+            except ValueError as e:
+                logger.error(f"Snapshot {candidate} could not be decoded: {e}")
+                payload = None
+        if payload is not None:
+            if generation:
+                logger.warning(f"{path} is damaged, recovered from generation {candidate}")
+            return payload
+        logger.error(f"Snapshot {candidate} failed validation, trying an older generation")
+    return None
+
+class SnapshotWriter:
+    """Persists a database dict as checksummed snapshots
+    
+    Outside an event loop saves are written immediately. Inside a running loop
+    they are coalesced: only a cheap view of the data is taken on the loop
+    (stores pass a callable returning shallow copies of their sections), and
+    it is encoded, written, fsynced and renamed in a worker thread. The codecs
+    encode in C without releasing the GIL, so nested values are read in one
+    step and the view stays consistent. A failed encode or write stays pending
+    and is retried with backoff; after `max_retries` it waits for the next
+    save or flush.
+    """
+    
+    def __init__(self, path: str, codec, generations: int = 3, max_retries: int = 5, retry_delay: float = 0.5):
+        self.path = path
+        self.codec = codec
+        self.generations = generations
+        self.max_retries = max_retries
+        self.retry_delay = retry_delay
+        self._pending: Any = None
+        self._task: Optional[asyncio.Task] = None
+        self.writes = 0
+        self.failures = 0
+    
+    @property
+    def dirty(self) -> bool:
+        """Whether a save has not reached the disk yet"""
+        return self._pending is not None
+    
+    def load(self) -> Optional[Dict[str, Any]]:
+        return read_snapshot(self.path, self.generations, parse=self.codec.loads)
+    
+    def write(self, data: Union[Dict[str, Any], Callable[[], Dict[str, Any]]]):
+        """Write a snapshot synchronously"""
+        if callable(data):
+            data = data()
+        write_snapshot(self.path, self.codec.dumps(data), self.generations)
+        self.writes += 1
+    
+    def _encode_and_write(self, view: Any):
+        write_snapshot(self.path, self.codec.dumps(view), self.generations)
+    
+    def save(self, data: Union[Dict[str, Any], Callable[[], Dict[str, Any]]]):
+        """Write now, or schedule a background write when an event loop is running
+        
+        `data` may be a callable building the dict (or a view of it); it is
+        called on the loop right before the encode.
+        """
+        try:
+            loop = asyncio.get_running_loop()
+        except RuntimeError:
+            self.write(data)
+            return
+        
+        self._pending = data
+        if self._task is None or self._task.done():
+            self._task = loop.create_task(self._write_pending())
+    
+    async def _write_pending(self):
+        attempts = 0
+        while self._pending is not None:
+            # Let the rest of the current burst of mutations happen first
+            await asyncio.sleep(0)
+            data, self._pending = self._pending, None
+            try:
+                view = data() if callable(data) else data
+                await asyncio.to_thread(self._encode_and_write, view)
+            except Exception as e:
+                # Keep the data unless a newer save has replaced it meanwhile
+                if self._pending is None:
+                    self._pending = data
+                self.failures += 1
+                attempts += 1
+                if attempts > self.max_retries:
+                    logger.error(f"Writing {self.path} failed {attempts} times ({e}), kept pending for the next save")
+                    return
+                delay = min(self.retry_delay * 2 ** (attempts - 1), 30.0)
+                logger.error(f"Writing {self.path} failed ({e}), retrying in {delay:.1f}s")
+                await asyncio.sleep(delay)
+                continue
+            attempts = 0
+            self.writes += 1
+    
+    async def flush(self):
+        """Wait until every scheduled save has reached the disk (or failed its retries)"""
+        while self._task is not None and not self._task.done():
+            await self._task
+        if self.dirty:
+            # Writes gave up earlier: one more round of retries
+            self._task = asyncio.create_task(self._write_pending())
+            await self._task
@@ -0,0 +1,47 @@
+# database/tenancy.py
+import os
+from contextvars import ContextVar
+from typing import Any, Callable, Dict, Optional
+
+# Name of the tenant whose update is being processed (None in single-bot mode)
+current_tenant: ContextVar[Optional[str]] = ContextVar("current_tenant", default=None)
+
+TENANTS_DIR = "database/tenants"
+
+def tenant_db_file(tenant: str, db_file: str) -> str:
+    """Path of a tenant's copy of a database file"""
+    return os.path.join(TENANTS_DIR, tenant, os.path.basename(db_file))
+
+class TenantAwareStore:
+    """Store proxy that forwards to the current tenant's own store"""
+    
+    # Attributes of the proxy itself; everything else lives on the tenant's store
+    _OWN_ATTRIBUTES = frozenset({"default_store", "factory", "stores"})
+    
+    def __init__(self, default_store: Any, factory: Callable[[str], Any]):
+        self.default_store = default_store
+        self.factory = factory
+        self.stores: Dict[str, Any] = {}
+    
+    def for_tenant(self, tenant: Optional[str]) -> Any:
+        """Get (creating on first use) the store of a tenant"""
+        if tenant is None:
+            return self.default_store
+        store = self.stores.get(tenant)
+        if store is None:
+            store = self.stores[tenant] = self.factory(tenant)
+        return store
+    
+    def all_stores(self):
+        """Default store followed by every tenant store created so far"""
+        return [self.default_store, *self.stores.values()]
+    
+    def __getattr__(self, name: str):
+        return getattr(self.for_tenant(current_tenant.get()), name)
+    
+    def __setattr__(self, name: str, value: Any):
+        # e.g. `db.data = ...` must replace the tenant's data, not shadow it on the proxy
+        if name in self._OWN_ATTRIBUTES:
+            object.__setattr__(self, name, value)
+        else:
+            setattr(self.for_tenant(current_tenant.get()), name, value)
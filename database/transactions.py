@@ -0,0 +1,140 @@
+# database/transactions.py
+import asyncio
+from contextlib import asynccontextmanager, contextmanager
+from contextvars import ContextVar
+from typing import Any, AsyncIterator, Dict, Hashable, Iterator, List, Optional, Tuple
+
+# An entity is (kind, key), e.g. ("cart", user_id)
+Entity = Tuple[str, Hashable]
+
+class EntityLocks:
+    """Async locks created on demand per entity and dropped when unused"""
+    
+    def __init__(self):
+        self._locks: Dict[Hashable, asyncio.Lock] = {}
+        self._users: Dict[Hashable, int] = {}
+    
+    def __len__(self) -> int:
+        return len(self._locks)
+    
+    def locked(self, entity: Hashable) -> bool:
+        """Whether a transaction holds or waits for the entity"""
+        return entity in self._locks
+    
+    @asynccontextmanager
+    async def hold(self, *entities: Hashable) -> AsyncIterator[None]:
+        """Hold the locks of all entities; acquired in a fixed order to avoid deadlocks"""
+        ordered = sorted(set(entities), key=repr)
+        for entity in ordered:
+            self._users[entity] = self._users.get(entity, 0) + 1
+            if entity not in self._locks:
+                self._locks[entity] = asyncio.Lock()
+        
+        acquired = []
+        try:
+            for entity in ordered:
+                await self._locks[entity].acquire()
+                acquired.append(entity)
+            yield
+        finally:
+            for entity in reversed(acquired):
+                self._locks[entity].release()
+            for entity in ordered:
+                self._users[entity] -= 1
+                if not self._users[entity]:
+                    del self._users[entity]
+                    del self._locks[entity]
+
+class Batch:
+    """Saves and events deferred by the atomic blocks of one transaction"""
+    
+    def __init__(self, store: Any):
+        self.store = store
+        self.depth = 0
+        self.dirty = False
+        self.events: List[Tuple] = []
+
+# Open batch of the running task; tasks copy their context, so concurrent
+# transactions never see each other's batch
+current_batch: ContextVar[Optional[Batch]] = ContextVar("current_batch", default=None)
+
+class TransactionMixin:
+    """Atomic groups of mutations for a store, persisted with a single save
+    
+    The store implements `_entity_state(entity)` and
+    `_restore_entity(entity, state)` for the entities it supports, and its
+    `save_data` calls `_defer_save()` first. Analytics events emitted inside
+    an atomic block are only written once the outermost block succeeds.
+    """
+    
+    _locks: EntityLocks = None
+    events = None
+    
+    @property
+    def locks(self) -> EntityLocks:
+        if self._locks is None:
+            self._locks = EntityLocks()
+        return self._locks
+    
+    def _batch(self) -> Optional[Batch]:
+        batch = current_batch.get()
+        return batch if batch is not None and batch.store is self else None
+    
+    def _defer_save(self) -> bool:
+        """True (and remember the save) when inside an atomic block"""
+        batch = self._batch()
+        if batch is not None:
+            batch.dirty = True
+            return True
+        return False
+    
+    def emit_event(self, kind: str, user_id: int, ref: int, **fields: Any):
+        """Append an analytics event (deferred until the atomic block commits)"""
+        if self.events is None:
+            return
+        batch = self._batch()
+        if batch is not None:
+            batch.events.append((kind, user_id, ref, fields))
+        else:
+            self.events.emit(kind, user_id, ref, **fields)
+    
+    @contextmanager
+    def atomic(self, *entities: Entity) -> Iterator[Any]:
+        """Group mutations into one save; the entities are restored if the block fails"""
+        self.load()
+        saved = [(entity, self._entity_state(entity)) for entity in entities]
+        batch, token = self._batch(), None
+        if batch is None:
+            batch = Batch(self)
+            token = current_batch.set(batch)
+        mark = len(batch.events)
+        batch.depth += 1
+        try:
+            yield self
+        except BaseException:
+            for entity, state in reversed(saved):
+                self._restore_entity(entity, state)
+            # Only the events of the failed block are dropped
+            del batch.events[mark:]
+            batch.dirty = True
+            raise
+        finally:
+            batch.depth -= 1
+            if token is not None:
+                current_batch.reset(token)
+                for kind, user_id, ref, fields in batch.events:
+                    self.events.emit(kind, user_id, ref, **fields)
+                if batch.dirty:
+                    self.save_data()
+    
+    @asynccontextmanager
+    async def transaction(self, *entities: Entity) -> AsyncIterator[Any]:
+        """Lock the entities, then run the block atomically
+        
+        The block may await; other transactions on the same entities wait
+        for it, and the saves and events of concurrent transactions are
+        kept apart. Transactions on the same entity must not be nested.
+        """
+        async with self.locks.hold(*entities):
+            with self.atomic(*entities):
+                yield self
@@ -1,33 +1,79 @@
-from aiogram import Router, F
-from aiogram.filters import Command
-from aiogram.types import Message, CallbackQuery, InlineKeyboardMarkup, InlineKeyboardButton
+import asyncio
+import csv
+import html
+import io
+import logging
+import tempfile
+import time
+from typing import List, Optional
+
+from aiogram import Bot, Router, F
+from aiogram.exceptions import TelegramAPIError
+from aiogram.filters import Command, CommandObject
+from aiogram.fsm.context import FSMContext
+from aiogram.fsm.state import State, StatesGroup
+from aiogram.types import BufferedInputFile, Message, CallbackQuery, InlineKeyboardMarkup, InlineKeyboardButton
 
 from config import config
-from database.db_helper import db
+from database.analytics import build_report
+from database.business_info import DEFAULT_BUSINESS_INFO
+from database.catalog_io import TYPE_FIELDS, apply_import, csv_fields, iter_csv_export, iter_jsonl_export, iter_rows, validate_rows
+from utils.booking_calendar import TIME_SLOTS, business_zone
+from utils.callbacks import CallbackRoutes
+from utils.input_files import IterInputFile
+from utils.maintenance import maintenance
+from utils.profiler import profiler
+from utils.tenants import get_current_tenant
+from utils.verticals import Vertical, get_vertical
+
+logger = logging.getLogger(__name__)
 
 router = Router()
+callbacks = CallbackRoutes(router)
+
+# Longest /profile session an admin can request, in seconds
+MAX_PROFILE_SECONDS = 60
 
 def is_admin(user_id: int) -> bool:
     """Check if user is admin"""
+    tenant = get_current_tenant()
+    if tenant is not None:
+        return user_id == tenant.admin_id
     return user_id == config.admin_id
 
+def from_admin(event: Message) -> bool:
+    """Filter for messages sent by the admin"""
+    return event.from_user is not None and is_admin(event.from_user.id)
+
+class CatalogImport(StatesGroup):
+    # Set by the catalog manager: the admin's next document is imported
+    waiting_for_document = State()
+
+def admin_keyboard(vertical: Vertical) -> InlineKeyboardMarkup:
+    """Admin panel buttons; settings only for stores with business info"""
+    catalog = "🍽️ Manage Menu" if vertical.item_type == "menu" else f"🗂️ Manage {vertical.item_type.title()}"
+    manage = [InlineKeyboardButton(text=catalog, callback_data="admin_menu")]
+    if has_business_info(vertical):
+        manage.append(InlineKeyboardButton(text="⚙️ Settings", callback_data="admin_settings"))
+    return InlineKeyboardMarkup(inline_keyboard=[
+        [
+            InlineKeyboardButton(text="📊 Statistics", callback_data="admin_stats"),
+            InlineKeyboardButton(text="📝 Orders", callback_data="admin_orders")
+        ],
+        manage
+    ])
+
+def has_business_info(vertical: Vertical) -> bool:
+    return hasattr(vertical.store, "business_info")
+
 @router.message(Command("admin"))
-async def admin_panel(message: Message):
+async def admin_panel(message: Message, vertical: Optional[Vertical] = None):
     """Show admin panel"""
     if not is_admin(message.from_user.id):
         await message.answer("❌ Access denied!")
         return
     
-    keyboard = InlineKeyboardMarkup(inline_keyboard=[
-        [
-            InlineKeyboardButton(text="📊 Statistics", callback_data="admin_stats"),
-            InlineKeyboardButton(text="📝 Orders", callback_data="admin_orders")
-        ],
-        [
-            InlineKeyboardButton(text="🍽️ Manage Menu", callback_data="admin_menu"),
-            InlineKeyboardButton(text="⚙️ Settings", callback_data="admin_settings")
-        ]
-    ])
+    keyboard = admin_keyboard(vertical or get_vertical("restaurant"))
     
     await message.answer(
         "🔧 <b>Admin Panel</b>\n\n"
@@ -35,31 +81,156 @@ async def admin_panel(message: Message):
         reply_markup=keyboard
     )
 
-@router.callback_query(F.data == "admin_stats")
-async def show_stats(callback: CallbackQuery):
+@router.message(Command("profile"))
+async def profile_bot(message: Message, command: CommandObject):
+    """Sample the event loop for a while and send the stacks as a document"""
+    if not is_admin(message.from_user.id):
+        await message.answer("❌ Access denied!")
+        return
+    
+    try:
+        seconds = int(command.args or 10)
+    except ValueError:
+        await message.answer("Usage: /profile &lt;seconds&gt;")
+        return
+    seconds = max(1, min(seconds, MAX_PROFILE_SECONDS))
+    
+    if profiler.running:
+        await message.answer("⏳ A profiling session is already running.")
+        return
+    
+    await message.answer(f"🔬 Profiling for {seconds} s...")
+    profiler.start()
+    try:
+        await asyncio.sleep(seconds)
+    finally:
+        profiler.stop()
+    
+    summary = profiler.summary()
+    caption = (
+        f"🔬 <b>Profile</b>: {summary['samples']} samples in {summary['duration_s']} s "
+        f"every {summary['interval_ms']} ms, overhead {summary['overhead_pct']}%\n\n"
+    )
+    for handler, count in summary["handlers"][:10]:
+        caption += f"• {html.escape(handler)}: {count / max(summary['samples'], 1):.0%}\n"
+    
+    await message.answer_document(
+        BufferedInputFile(profiler.collapsed().encode(), filename=f"profile-{int(time.time())}.folded"),
+        caption=caption[:1024]
+    )
+
+@router.message(Command("report"))
+async def analytics_report(message: Message, vertical: Optional[Vertical] = None):
+    """Aggregate the event log in a worker thread and send the result as CSV"""
+    if not is_admin(message.from_user.id):
+        await message.answer("❌ Access denied!")
+        return
+    
+    vertical = vertical or get_vertical("restaurant")
+    store = vertical.store
+    await message.answer("📈 Building report...")
+    
+    events = store.events
+    await events.flush()
+    item_names = {
+        item["id"]: item.get("name", "")
+        for items in store.data.get(vertical.item_type, {}).values()
+        for item in items
+    }
+    lesson_counts = {
+        course["id"]: course.get("lessons", 0)
+        for courses in store.data.get("courses", {}).values()
+        for course in courses
+    }
+    report = await asyncio.to_thread(
+        lambda: build_report(events.read_columns(), item_names, len(TIME_SLOTS), lesson_counts, business_zone())
+    )
+    
+    await message.answer_document(
+        BufferedInputFile(report.encode(), filename=f"report-{vertical.name}-{int(time.time())}.csv"),
+        caption=f"📈 <b>Report</b> ({vertical.name})"
+    )
+
+@callbacks.route("admin_stats")
+async def show_stats(callback: CallbackQuery, vertical: Optional[Vertical] = None,
+                     ingress=None, dedup=None, lifecycle=None, polling=None):
     """Show bot statistics"""
     if not is_admin(callback.from_user.id):
         await callback.answer("❌ Access denied!", show_alert=True)
         return
     
-    # Calculate statistics
-    total_users = len(db.data.get("orders", {}))
-    active_carts = sum(1 for user_data in db.data.get("orders", {}).values() 
-                      if user_data.get("items"))
+    vertical = vertical or get_vertical("restaurant")
+    store = vertical.store
+    catalog = store.data.get(vertical.item_type, {})
+    label = vertical.item_type.title()
+    
+    # Calculate statistics; the restaurant store keeps carts as JSON, the others as models
+    if hasattr(store, "carts"):
+        carts = store.carts
+        active_carts = sum(1 for cart in carts.values() if cart.lines)
+    else:
+        carts = store.data.get("orders", {})
+        active_carts = sum(1 for user_data in carts.values() if user_data.get("items"))
+    total_users = len(carts)
     
     stats_text = f"""
-📊 <b>Bot Statistics</b>
+📊 <b>Bot Statistics</b> ({vertical.name})
 
 👥 <b>Total Users:</b> {total_users}
 📦 <b>Active Carts:</b> {active_carts}
-🍽️ <b>Menu Items:</b> {sum(len(category) for category in db.data.get("menu", {}).values())}
+🗂️ <b>{label} Items:</b> {sum(len(category) for category in catalog.values())}
 
-<b>Menu Categories:</b>
+<b>{label} Categories:</b>
 """
     
-    for category, items in db.data.get("menu", {}).items():
+    for category, items in catalog.items():
         stats_text += f"• {category.title()}: {len(items)} items\n"
     
+    jobs = maintenance.stats
+    stats_text += (
+        f"\n<b>Maintenance:</b>\n"
+        f"• Runs: {jobs['runs']} (last: {jobs['last_run'] or 'never'}, {jobs['last_duration_ms']} ms)\n"
+        f"• Carts expired: {jobs['carts_expired']}, empty removed: {jobs['carts_emptied']}, "
+        f"in use skipped: {jobs['carts_skipped']}\n"
+        f"• Compactions: {jobs['compactions']}, longest slice: {jobs['max_slice_ms']} ms\n"
+    )
+    
+    if dedup is not None:
+        stats_text += f"\n<b>Redelivered updates skipped:</b> {dedup.stats['duplicates']}\n"
+    
+    if lifecycle is not None:
+        stats_text += (
+            f"<b>In-flight updates:</b> {lifecycle.in_flight}, "
+            f"last shutdown drain: {lifecycle.stats['previous_drain_ms'] or 'n/a'} ms\n"
+        )
+    
+    if polling is not None:
+        info = polling.as_dict()
+        stats_text += (
+            f"\n<b>Polling:</b>\n"
+            f"• Updates: {info['updates']} in {info['requests']} requests, running: {info['running']}\n"
+            f"• Message lag p50/p95: {info['server_lag']['p50_ms']}/{info['server_lag']['p95_ms']} ms\n"
+            f"• Queue lag p50/p95: {info['queue_lag']['p50_ms']}/{info['queue_lag']['p95_ms']} ms\n"
+        )
+    
+    if ingress is not None:
+        queue = ingress.queue_info()
+        stats_text += (
+            f"\n<b>Webhook queue:</b>\n"
+            f"• Depth: {queue['depth']}/{queue['capacity']}, workers: {queue['workers']}\n"
+            f"• Accepted: {queue['accepted']}, duplicates: {queue['duplicates']}, shed: {queue['shed']}\n"
+        )
+    
+    http_stats = getattr(callback.bot.session, "stats", None)
+    if http_stats is not None:
+        http = http_stats.as_dict()
+        stats_text += (
+            f"\n<b>Bot API connections:</b>\n"
+            f"• Requests: {http['requests']}, reused: {http['reused']} ({http['reuse_ratio']:.0%})\n"
+            f"• New connections: {http['created']}, avg connect: {http['avg_connect_ms']} ms\n"
+            f"• Pool waits: {http['queued']}, avg wait: {http['avg_queue_wait_ms']} ms\n"
+        )
+    
     keyboard = InlineKeyboardMarkup(inline_keyboard=[
         [InlineKeyboardButton(text="⬅️ Back to Admin", callback_data="admin_back")]
     ])
@@ -67,27 +238,208 @@ async def show_stats(callback: CallbackQuery):
     await callback.message.edit_text(stats_text, reply_markup=keyboard)
     await callback.answer()
 
-@router.callback_query(F.data == "admin_back")
-async def admin_back(callback: CallbackQuery):
+@callbacks.route("admin_back")
+async def admin_back(callback: CallbackQuery, state: FSMContext, vertical: Optional[Vertical] = None):
     """Go back to admin panel"""
     if not is_admin(callback.from_user.id):
         await callback.answer("❌ Access denied!", show_alert=True)
         return
     
+    await state.clear()
+    keyboard = admin_keyboard(vertical or get_vertical("restaurant"))
+    
+    await callback.message.edit_text(
+        "🔧 <b>Admin Panel</b>\n\n"
+        "What would you like to manage?",
+        reply_markup=keyboard
+    )
+    await callback.answer()
+
+def settings_text(info: dict, version: int) -> str:
+    """Current business info with editing instructions"""
+    text = f"⚙️ <b>Settings</b> (version {version})\n\n"
+    for field, value in info.items():
+        text += f"<b>{field}</b>: {html.escape(value) or '—'}\n"
+    text += (
+        "\nTo change a field send <code>/set field value</code>, e.g.\n"
+        "<code>/set phone +1 (555) 987-6543</code>\n"
+        "Values may span several lines. <code>/set field -</code> hides a field, "
+        "<code>/set field</code> restores the default."
+    )
+    return text
+
+@callbacks.route("admin_settings")
+async def show_settings(callback: CallbackQuery, vertical: Optional[Vertical] = None):
+    """Show the editable business info"""
+    if not is_admin(callback.from_user.id):
+        await callback.answer("❌ Access denied!", show_alert=True)
+        return
+    
+    vertical = vertical or get_vertical("restaurant")
+    if not has_business_info(vertical):
+        await callback.answer(f"⚙️ No editable business info for {vertical.name}", show_alert=True)
+        return
+    
+    keyboard = InlineKeyboardMarkup(inline_keyboard=[
+        [InlineKeyboardButton(text="⬅️ Back to Admin", callback_data="admin_back")]
+    ])
+    
+    business_info = vertical.store.business_info
+    await callback.message.edit_text(
+        settings_text(business_info.get(), business_info.version),
+        reply_markup=keyboard
+    )
+    await callback.answer()
+
+@router.message(Command("set"))
+async def update_setting(message: Message, command: CommandObject, vertical: Optional[Vertical] = None):
+    """Change one business info field; served from memory and published to other workers"""
+    if not is_admin(message.from_user.id):
+        await message.answer("❌ Access denied!")
+        return
+    
+    vertical = vertical or get_vertical("restaurant")
+    if not has_business_info(vertical):
+        await message.answer(f"⚙️ No editable business info for {vertical.name}")
+        return
+    
+    field, value = ((command.args or "").split(maxsplit=1) + ["", ""])[:2]
+    if not field:
+        await message.answer(f"Usage: /set &lt;field&gt; &lt;value&gt;\nFields: {', '.join(DEFAULT_BUSINESS_INFO)}")
+        return
+    
+    try:
+        value = value.strip()
+        version = await vertical.store.business_info.update(field, "" if value == "-" else value or None)
+    except ValueError as e:
+        await message.answer(f"❌ {html.escape(str(e))}")
+        return
+    
+    await message.answer(f"✅ <b>{field}</b> updated (version {version})")
+
+@callbacks.route("admin_menu")
+async def manage_catalog(callback: CallbackQuery, state: FSMContext, vertical: Optional[Vertical] = None):
+    """Show catalog import/export options and wait for a document to import"""
+    if not is_admin(callback.from_user.id):
+        await callback.answer("❌ Access denied!", show_alert=True)
+        return
+    
+    vertical = vertical or get_vertical("restaurant")
+    await state.set_state(CatalogImport.waiting_for_document)
     keyboard = InlineKeyboardMarkup(inline_keyboard=[
         [
-            InlineKeyboardButton(text="📊 Statistics", callback_data="admin_stats"),
-            InlineKeyboardButton(text="📝 Orders", callback_data="admin_orders")
+            InlineKeyboardButton(text="📤 Export CSV", callback_data="admin_export_csv"),
+            InlineKeyboardButton(text="📤 Export JSONL", callback_data="admin_export_jsonl")
         ],
-        [
-            InlineKeyboardButton(text="🍽️ Manage Menu", callback_data="admin_menu"),
-            InlineKeyboardButton(text="⚙️ Settings", callback_data="admin_settings")
-        ]
+        [InlineKeyboardButton(text="⬅️ Back to Admin", callback_data="admin_back")]
     ])
+    columns = f"Columns: <code>{', '.join(csv_fields(vertical.item_type))}</code>\n"
+    required = TYPE_FIELDS.get(vertical.item_type)
+    if required:
+        columns += f"Required for {vertical.item_type}: <code>{', '.join(required)}</code>\n"
     
     await callback.message.edit_text(
-        "🔧 <b>Admin Panel</b>\n\n"
-        "What would you like to manage?",
+        f"🍽️ <b>Manage Catalog</b> ({vertical.item_type})\n\n"
+        "To import, send a <b>.csv</b>, <b>.json</b> or <b>.jsonl</b> document.\n"
+        f"{columns}"
+        "Rows with an existing <code>id</code> are updated, others are added.\n"
+        "Nothing is imported if any row is invalid.",
         reply_markup=keyboard
     )
-    await callback.answer()
\ No newline at end of file
+    await callback.answer()
+
+@callbacks.route("admin_export_csv", "admin_export_jsonl")
+async def export_catalog(callback: CallbackQuery, vertical: Optional[Vertical] = None):
+    """Send the catalog as a streamed document"""
+    if not is_admin(callback.from_user.id):
+        await callback.answer("❌ Access denied!", show_alert=True)
+        return
+    
+    vertical = vertical or get_vertical("restaurant")
+    store = vertical.store
+    if callback.data == "admin_export_csv":
+        chunks = iter_csv_export(store.data, vertical.item_type)
+        filename = f"{vertical.item_type}.csv"
+    else:
+        chunks = iter_jsonl_export(store.data, vertical.item_type, store.codec)
+        filename = f"{vertical.item_type}.jsonl"
+    
+    await callback.answer("📤 Exporting...")
+    await callback.message.answer_document(IterInputFile(chunks, filename=filename))
+
+@router.message(CatalogImport.waiting_for_document, F.document, from_admin)
+async def import_catalog(message: Message, state: FSMContext, vertical: Optional[Vertical] = None):
+    """Import catalog items from a document uploaded in the catalog manager"""
+    vertical = vertical or get_vertical("restaurant")
+    file_name = message.document.file_name or ""
+    title = html.escape(file_name)
+    status = await message.answer(f"📥 Importing <b>{title}</b>...")
+    
+    rows_done = 0
+    
+    def progress(rows: int):
+        nonlocal rows_done
+        rows_done = rows
+    
+    async def report_progress():
+        reported = 0
+        while True:
+            await asyncio.sleep(2)
+            if rows_done != reported:
+                reported = rows_done
+                await status.edit_text(f"📥 Importing <b>{title}</b>... {reported} rows checked")
+    
+    def parse(source) -> tuple:
+        with io.TextIOWrapper(source, encoding="utf-8-sig", newline="") as text:
+            return validate_rows(iter_rows(text, file_name), vertical.item_type, progress)
+    
+    # Spool the upload to disk and parse it as a stream in a worker thread
+    with tempfile.TemporaryFile() as source:
+        await message.bot.download(message.document, destination=source)
+        reporter = asyncio.create_task(report_progress())
+        try:
+            entries, report = await asyncio.to_thread(parse, source)
+        except (ValueError, csv.Error) as e:
+            await status.edit_text(f"❌ Import failed: {html.escape(str(e))}")
+            return
+        finally:
+            reporter.cancel()
+    
+    # Applied on the event loop: one batch, one save
+    apply_import(vertical.store, vertical.item_type, entries, report)
+    
+    if report.error_count:
+        text = (
+            f"❌ <b>Import rejected</b>: {report.error_count} invalid of {report.rows} rows\n\n"
+            + html.escape("\n".join(report.errors))
+        )
+    else:
+        # A rejected file may be fixed and sent again; an applied one ends the upload
+        await state.clear()
+        text = f"✅ <b>Imported {report.imported} items</b> from {report.rows} rows"
+        if report.restocked:
+            notified = await notify_restocked(message.bot, vertical, report.restocked)
+            text += f"\n🔔 {len(report.restocked)} back in stock, {notified} wishlist users notified"
+    await status.edit_text(text)
+
+async def notify_restocked(bot: Bot, vertical: Vertical, item_ids: List[int]) -> int:
+    """Tell the users who wishlisted the items that they are back in stock; returns users reached"""
+    store = vertical.store
+    if not hasattr(store, "get_wishlist_watchers"):
+        return 0
+    
+    notified = 0
+    for user_id, wished in store.get_wishlist_watchers(item_ids).items():
+        names = [
+            html.escape(item["name"]) for item in
+            (store.get_item_by_id(vertical.item_type, item_id) for item_id in wished) if item
+        ]
+        if not names:
+            continue
+        text = "🔔 <b>Back in stock</b> from your wishlist:\n" + "\n".join(f"• {name}" for name in names)
+        try:
+            await bot.send_message(user_id, text)
+            notified += 1
+        except TelegramAPIError as e:
+            logger.warning(f"Restock notice to {user_id} failed: {e}")
+    return notified
@@ -1,154 +1,152 @@
 # handlers/booking.py
-from aiogram import Router, F
+from aiogram import Router
 from aiogram.types import CallbackQuery, InlineKeyboardMarkup, InlineKeyboardButton
-from datetime import datetime, timedelta
+from datetime import datetime
+
+from keyboards.callbacks import DatePick, ServicePick, TimePick
+from utils.booking_calendar import TIME_SLOTS, BookingCalendar
+from utils.callbacks import CallbackRoutes
+from utils.i18n import get_locale
+from utils.render_cache import RenderedView, show_view
+from utils.verticals import get_vertical
 
 router = Router()
+callbacks = CallbackRoutes(router)
+db = get_vertical("booking").store
+
+# Next 14 days, Monday to Saturday, in the business timezone (BUSINESS_TIMEZONE)
+calendar = BookingCalendar(TIME_SLOTS, days=14, closed_weekdays=(6,))
 
-@router.callback_query(F.data == "book_appointment")
+@callbacks.route("book_appointment")
 async def show_services(callback: CallbackQuery):
     """Show available services"""
+    t = get_locale(callback.from_user)
     services = [
-        {"id": 1, "name": "Haircut", "duration": 30, "price": 25.00},
-        {"id": 2, "name": "Hair Coloring", "duration": 90, "price": 80.00},
-        {"id": 3, "name": "Manicure", "duration": 45, "price": 35.00},
-        {"id": 4, "name": "Facial Treatment", "duration": 60, "price": 60.00}
+        service
+        for category in db.data.get("services", {}).values()
+        for service in category
     ]
     
-    text = "💇‍♀️ <b>Select a Service:</b>\n\n"
-    keyboard_buttons = []
-    
-    for service in services:
-        text += f"<b>{service['name']}</b>\n"
-        text += f"⏱️ {service['duration']} min | 💰 ${service['price']:.2f}\n\n"
-        
-        keyboard_buttons.append([
-            InlineKeyboardButton(
-                text=f"📅 Book {service['name']}", 
-                callback_data=f"service_{service['id']}"
-            )
-        ])
-    
+    text = t["booking.select_service"] + t.join("booking.service_line", services)
+    keyboard_buttons = [
+        [InlineKeyboardButton(text=t("button.book_service", name=service["name"]), callback_data=ServicePick(service["id"]).pack())]
+        for service in services
+    ]
     keyboard_buttons.append([
-        InlineKeyboardButton(text="⬅️ Back", callback_data="back")
+        InlineKeyboardButton(text=t["button.back"], callback_data="back")
     ])
     
     keyboard = InlineKeyboardMarkup(inline_keyboard=keyboard_buttons)
     await callback.message.edit_text(text, reply_markup=keyboard)
     await callback.answer()
 
-@router.callback_query(F.data.startswith("service_"))
-async def show_calendar(callback: CallbackQuery):
+@callbacks.route(ServicePick)
+async def show_calendar(callback: CallbackQuery, callback_data: ServicePick):
     """Show available dates"""
-    service_id = int(callback.data.split("_")[1])
-    
-    # Generate next 14 days
-    keyboard_buttons = []
-    today = datetime.now()
-    
-    for i in range(14):
-        date = today + timedelta(days=i)
-        if date.weekday() < 6:  # Monday to Saturday only
-            keyboard_buttons.append([
-                InlineKeyboardButton(
-                    text=date.strftime("%A, %B %d"),
-                    callback_data=f"date_{service_id}_{date.strftime('%Y-%m-%d')}"
-                )
-            ])
-    
-    keyboard_buttons.append([
-        InlineKeyboardButton(text="⬅️ Back to Services", callback_data="book_appointment")
-    ])
+    t = get_locale(callback.from_user)
+    service_id = callback_data.service_id
     
-    keyboard = InlineKeyboardMarkup(inline_keyboard=keyboard_buttons)
-    
-    await callback.message.edit_text(
-        "📅 <b>Select a Date:</b>",
-        reply_markup=keyboard
-    )
+    keyboard = calendar.day_keyboard(t, service_id, lambda day: db.get_booked_slots(service_id, day))
+    await show_view(callback.message, RenderedView.build(t["booking.select_date"], keyboard))
     await callback.answer()
 
-@router.callback_query(F.data.startswith("date_"))
-async def show_time_slots(callback: CallbackQuery):
+@callbacks.route(DatePick)
+async def show_time_slots(callback: CallbackQuery, callback_data: DatePick):
     """Show available time slots"""
-    parts = callback.data.split("_")
-    service_id, selected_date = int(parts[1]), parts[2]
+    t = get_locale(callback.from_user)
+    service_id, selected_date = callback_data.service_id, callback_data.day.isoformat()
     
-    # Generate time slots (9 AM to 6 PM)
-    time_slots = []
-    start_hour = 9
-    end_hour = 18
+    keyboard = calendar.slot_keyboard(t, service_id, selected_date, db.get_booked_slots(service_id, selected_date))
+    if keyboard is None:
+        # Date buttons from a keyboard shown before midnight
+        await callback.answer(t["booking.date_unavailable"], show_alert=True)
+        return
     
-    for hour in range(start_hour, end_hour):
-        for minute in [0, 30]:  # Every 30 minutes
-            time_str = f"{hour:02d}:{minute:02d}"
-            time_slots.append(time_str)
-    
-    keyboard_buttons = []
-    text = f"🕐 <b>Available Times for {selected_date}:</b>\n\n"
-    
-    # Create rows of 3 time slots each
-    for i in range(0, len(time_slots), 3):
-        row = []
-        for j in range(3):
-            if i + j < len(time_slots):
-                time_slot = time_slots[i + j]
-                row.append(
-                    InlineKeyboardButton(
-                        text=time_slot,
-                        callback_data=f"time_{service_id}_{selected_date}_{time_slot}"
-                    )
-                )
-        keyboard_buttons.append(row)
-    
-    keyboard_buttons.append([
-        InlineKeyboardButton(text="⬅️ Back to Dates", callback_data=f"service_{service_id}")
-    ])
-    
-    keyboard = InlineKeyboardMarkup(inline_keyboard=keyboard_buttons)
-    await callback.message.edit_text(text, reply_markup=keyboard)
+    text = t("booking.times_title", date=selected_date)
+    await show_view(callback.message, RenderedView.build(text, keyboard))
     await callback.answer()
 
-@router.callback_query(F.data.startswith("time_"))
-async def confirm_booking(callback: CallbackQuery):
+@callbacks.route("slot_taken", "day_full")
+async def slot_unavailable(callback: CallbackQuery):
+    """Booked time or fully booked date tapped"""
+    await callback.answer(get_locale(callback.from_user)("booking.slot_taken"), show_alert=True)
+
+@callbacks.route(TimePick)
+async def confirm_booking(callback: CallbackQuery, callback_data: TimePick):
     """Confirm appointment booking"""
-    parts = callback.data.split("_")
-    service_id, selected_date, selected_time = int(parts[1]), parts[2], parts[3]
+    t = get_locale(callback.from_user)
+    service_id = callback_data.service_id
+    selected_date, selected_time = callback_data.day.isoformat(), callback_data.slot.strftime("%H:%M")
     
     # Get service details
-    service = db.get_service_by_id(service_id)  # You'd implement this method
-    
-    # Create booking
-    booking_data = {
-        "user_id": callback.from_user.id,
-        "service_id": service_id,
-        "date": selected_date,
-        "time": selected_time,
-        "status": "confirmed",
-        "created_at": datetime.now().isoformat()
-    }
+    service = db.get_service_by_id(service_id)
+    if not service:
+        await callback.answer(t["booking.service_not_found"], show_alert=True)
+        return
+    
+    if not calendar.is_bookable(selected_date) or calendar.is_past(selected_date, selected_time):
+        await callback.answer(t["booking.date_unavailable"], show_alert=True)
+        return
+    
+    user_id = callback.from_user.id
+    async with db.transaction(("booking", user_id)):
+        # A redelivered callback must not book the slot twice
+        first_delivery = db.claim_key(f"callback:{callback.id}")
+        # Checked and saved without awaiting, so two users cannot take the same slot
+        slot_free = selected_time not in db.get_booked_slots(service_id, selected_date)
+        if first_delivery and slot_free:
+            db.save_booking({
+                "user_id": user_id,
+                "service_id": service_id,
+                "date": selected_date,
+                "time": selected_time,
+                "status": "confirmed",
+                "created_at": datetime.now().isoformat()
+            })
+    
+    if not first_delivery:
+        await callback.answer()
+        return
+    if not slot_free:
+        await callback.answer(t["booking.slot_taken"], show_alert=True)
+        return
+    
+    confirmation_text = t(
+        "booking.confirmed", client=callback.from_user.full_name, service=service["name"],
+        date=selected_date, time=selected_time, price=service["price"]
+    )
     
-    # Save booking (implement this method)
-    db.save_booking(booking_data)
+    keyboard = InlineKeyboardMarkup(inline_keyboard=[
+        [InlineKeyboardButton(text=t["button.book_another"], callback_data="book_appointment")],
+        [InlineKeyboardButton(text=t["button.main_menu"], callback_data="back")]
+    ])
     
-    confirmation_text = f"""
-✅ <b>Appointment Confirmed!</b>
-
-👤 <b>Client:</b> {callback.from_user.full_name}
-💇‍♀️ <b>Service:</b> {service['name']}
-📅 <b>Date:</b> {selected_date}
-🕐 <b>Time:</b> {selected_time}
-💰 <b>Price:</b> ${service['price']:.2f}
-
-📞 We'll send you a reminder 24 hours before your appointment.
+    await callback.message.edit_text(confirmation_text, reply_markup=keyboard)
+    await callback.answer()
 
-<b>Need to reschedule?</b> Use /mybookings command.
-    """
+@callbacks.route("my_bookings")
+async def show_my_bookings(callback: CallbackQuery):
+    """Show user's bookings"""
+    t = get_locale(callback.from_user)
+    bookings = db.get_user_bookings(callback.from_user.id)
+    
+    if not bookings:
+        text = t["booking.none"]
+    else:
+        default_name = t["booking.default_service"]
+        text = t["booking.list_title"] + t.join("booking.list_line", [
+            {
+                "name": (db.get_service_by_id(booking.service_id) or {}).get("name", default_name),
+                "date": booking.date,
+                "time": booking.time
+            }
+            for booking in bookings
+        ])
     
     keyboard = InlineKeyboardMarkup(inline_keyboard=[
-        [InlineKeyboardButton(text="📅 Book Another", callback_data="book_appointment")],
-        [InlineKeyboardButton(text="🏠 Main Menu", callback_data="back")]
+        [InlineKeyboardButton(text=t["button.book_appointment"], callback_data="book_appointment")],
+        [InlineKeyboardButton(text=t["button.back"], callback_data="back")]
     ])
     
-    await callback.message.edit_text(confirmation_text, reply_markup=keyboard)
-    await callback.answer()
\ No newline at end of file
+    await callback.message.edit_text(text, reply_markup=keyboard)
+    await callback.answer()
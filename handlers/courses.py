@@ -1,138 +1,218 @@
 # handlers/courses.py
-from aiogram import Router, F
+from aiogram import Router
 from aiogram.types import CallbackQuery, InlineKeyboardMarkup, InlineKeyboardButton
 
+from keyboards.callbacks import CourseEnroll, CourseLessons, CoursePick, CoursePreview, CourseProgress, LessonDone, LessonPick
+from utils.callbacks import CallbackRoutes
+from utils.i18n import get_locale
+from utils.verticals import get_vertical
+
 router = Router()
+callbacks = CallbackRoutes(router)
+db = get_vertical("education").store
 
-@router.callback_query(F.data == "courses")
+@callbacks.route("courses")
 async def show_courses(callback: CallbackQuery):
     """Show available courses"""
+    t = get_locale(callback.from_user)
     courses = [
-        {
-            "id": 1, 
-            "name": "Python Programming", 
-            "lessons": 12, 
-            "duration": "6 weeks",
-            "price": 99.00,
-            "level": "Beginner"
-        },
-        {
-            "id": 2, 
-            "name": "Web Development", 
-            "lessons": 15, 
-            "duration": "8 weeks",
-            "price": 149.00,
-            "level": "Intermediate"
-        },
-        {
-            "id": 3, 
-            "name": "Data Science", 
-            "lessons": 20, 
-            "duration": "10 weeks",
-            "price": 199.00,
-            "level": "Advanced"
-        }
+        course
+        for category in db.data.get("courses", {}).values()
+        for course in category
     ]
     
-    text = "📚 <b>Available Courses:</b>\n\n"
-    keyboard_buttons = []
-    
-    for course in courses:
-        text += f"<b>{course['name']}</b>\n"
-        text += f"📊 Level: {course['level']}\n"
-        text += f"📖 {course['lessons']} lessons\n"
-        text += f"⏰ Duration: {course['duration']}\n"
-        text += f"💰 Price: ${course['price']:.2f}\n\n"
-        
-        keyboard_buttons.append([
-            InlineKeyboardButton(
-                text=f"📖 View {course['name']}",
-                callback_data=f"course_{course['id']}"
-            )
-        ])
-    
+    text = t["courses.title"] + t.join("courses.line", courses)
+    keyboard_buttons = [
+        [InlineKeyboardButton(text=t("button.view_course", name=course["name"]), callback_data=CoursePick(course["id"]).pack())]
+        for course in courses
+    ]
     keyboard_buttons.append([
-        InlineKeyboardButton(text="⬅️ Back", callback_data="back")
+        InlineKeyboardButton(text=t["button.back"], callback_data="back")
     ])
     
     keyboard = InlineKeyboardMarkup(inline_keyboard=keyboard_buttons)
     await callback.message.edit_text(text, reply_markup=keyboard)
     await callback.answer()
 
-@router.callback_query(F.data.startswith("course_"))
-async def show_course_details(callback: CallbackQuery):
+@callbacks.route(CoursePick)
+async def show_course_details(callback: CallbackQuery, callback_data: CoursePick):
     """Show detailed course information"""
-    course_id = int(callback.data.split("_")[1])
-    
-    # Get course details and user progress
-    course = db.get_course_by_id(course_id)
+    t = get_locale(callback.from_user)
+    course = db.get_course_by_id(callback_data.course_id)
+    if not course:
+        await callback.answer(t["courses.not_found"], show_alert=True)
+        return
+    await edit_course_details(callback, course)
+    await callback.answer()
+
+async def edit_course_details(callback: CallbackQuery, course: dict):
+    """Show the course with the user's progress in the callback's message"""
+    t = get_locale(callback.from_user)
+    course_id = course["id"]
     user_progress = db.get_user_course_progress(callback.from_user.id, course_id)
     
-    text = f"""
-📚 <b>{course['name']}</b>
-
-📊 <b>Level:</b> {course['level']}
-📖 <b>Lessons:</b> {course['lessons']}
-⏰ <b>Duration:</b> {course['duration']}
-💰 <b>Price:</b> ${course['price']:.2f}
-
-<b>📈 Your Progress:</b>
-Completed: {user_progress.get('completed_lessons', 0)}/{course['lessons']} lessons
-Progress: {(user_progress.get('completed_lessons', 0) / course['lessons'] * 100):.1f}%
-
-<b>📝 Course Description:</b>
-{course.get('description', 'Learn the fundamentals and advance your skills.')}
-    """
+    text = t(
+        "courses.details", name=course["name"], level=course["level"], lessons=course["lessons"],
+        duration=course["duration"], price=course["price"], completed=user_progress.completed_lessons,
+        progress=user_progress.completed_lessons / course["lessons"] * 100,
+        description=course.get("description") or t["courses.default_description"]
+    )
     
     keyboard_buttons = []
     
-    if user_progress.get('enrolled', False):
+    if user_progress.enrolled:
         keyboard_buttons.extend([
-            [InlineKeyboardButton(text="▶️ Continue Learning", callback_data=f"lessons_{course_id}")],
-            [InlineKeyboardButton(text="📊 View Progress", callback_data=f"progress_{course_id}")]
+            [InlineKeyboardButton(text=t["button.continue_learning"], callback_data=CourseLessons(course_id).pack())],
+            [InlineKeyboardButton(text=t["button.view_progress"], callback_data=CourseProgress(course_id).pack())]
         ])
     else:
         keyboard_buttons.append([
-            InlineKeyboardButton(text="🎓 Enroll Now", callback_data=f"enroll_{course_id}")
+            InlineKeyboardButton(text=t["button.enroll"], callback_data=CourseEnroll(course_id).pack())
         ])
     
     keyboard_buttons.extend([
-        [InlineKeyboardButton(text="📖 Preview Lessons", callback_data=f"preview_{course_id}")],
-        [InlineKeyboardButton(text="⬅️ Back to Courses", callback_data="courses")]
+        [InlineKeyboardButton(text=t["button.preview_lessons"], callback_data=CoursePreview(course_id).pack())],
+        [InlineKeyboardButton(text=t["button.back_to_courses"], callback_data="courses")]
     ])
     
     keyboard = InlineKeyboardMarkup(inline_keyboard=keyboard_buttons)
     await callback.message.edit_text(text, reply_markup=keyboard)
-    await callback.answer()
 
-@router.callback_query(F.data.startswith("lessons_"))
-async def show_lessons(callback: CallbackQuery):
-    """Show course lessons"""
-    course_id = int(callback.data.split("_")[1])
+@callbacks.route(CourseEnroll)
+async def enroll(callback: CallbackQuery, callback_data: CourseEnroll):
+    """Enroll the user in a course and show it with the lessons unlocked"""
+    t = get_locale(callback.from_user)
+    user_id = callback.from_user.id
+    course = db.get_course_by_id(callback_data.course_id)
+    if not course:
+        await callback.answer(t["courses.not_found"], show_alert=True)
+        return
     
+    async with db.transaction(("enrollment", user_id)):
+        if not db.get_user_course_progress(user_id, course["id"]).enrolled:
+            db.enroll_user_in_course(user_id, course["id"])
+    await callback.answer(t("courses.enrolled", name=course["name"]))
+    await edit_course_details(callback, course)
+
+@callbacks.route(CourseLessons)
+async def show_lessons(callback: CallbackQuery, callback_data: CourseLessons):
+    """Show course lessons"""
+    await edit_lessons(callback, callback_data.course_id)
+    await callback.answer()
+
+def is_unlocked(lessons: list, position: int, completed: list) -> bool:
+    """The first lesson, completed lessons and the one after the last completed are open"""
+    return position == 0 or lessons[position]["id"] in completed or lessons[position - 1]["id"] in completed
+
+async def edit_lessons(callback: CallbackQuery, course_id: int):
+    """Show the course's lessons in the callback's message"""
+    t = get_locale(callback.from_user)
     lessons = db.get_course_lessons(course_id)
     user_progress = db.get_user_course_progress(callback.from_user.id, course_id)
-    completed_lessons = user_progress.get('completed_lessons_ids', [])
+    completed_lessons = user_progress.completed_lessons_ids
     
-    text = f"📖 <b>Course Lessons:</b>\n\n"
+    rows = []
     keyboard_buttons = []
     
     for i, lesson in enumerate(lessons, 1):
         status = "✅" if lesson['id'] in completed_lessons else "🔒" if i > 1 and lessons[i-2]['id'] not in completed_lessons else "▶️"
-        text += f"{status} <b>Lesson {i}:</b> {lesson['title']}\n"
+        rows.append({"status": status, "number": i, "title": lesson["title"]})
         
-        if lesson['id'] in completed_lessons or (i == 1) or (i > 1 and lessons[i-2]['id'] in completed_lessons):
+        if is_unlocked(lessons, i - 1, completed_lessons):
             keyboard_buttons.append([
                 InlineKeyboardButton(
-                    text=f"📖 {lesson['title']}", 
-                    callback_data=f"lesson_{course_id}_{lesson['id']}"
+                    text=t("button.lesson", title=lesson["title"]),
+                    callback_data=LessonPick(course_id, lesson["id"]).pack()
                 )
             ])
+    text = t["courses.lessons_title"] + t.join("courses.lesson_line", rows)
     
     keyboard_buttons.append([
-        InlineKeyboardButton(text="⬅️ Back to Course", callback_data=f"course_{course_id}")
+        InlineKeyboardButton(text=t["button.back_to_course"], callback_data=CoursePick(course_id).pack())
     ])
     
     keyboard = InlineKeyboardMarkup(inline_keyboard=keyboard_buttons)
     await callback.message.edit_text(text, reply_markup=keyboard)
-    await callback.answer()
\ No newline at end of file
+
+async def find_open_lesson(callback: CallbackQuery, course_id: int, lesson_id: int):
+    """(position, lesson) if the user may open it; otherwise answers why not and returns None"""
+    t = get_locale(callback.from_user)
+    progress = db.get_user_course_progress(callback.from_user.id, course_id)
+    if not progress.enrolled:
+        await callback.answer(t["courses.enroll_first"], show_alert=True)
+        return None
+    
+    lessons = db.get_course_lessons(course_id)
+    position = next((i for i, lesson in enumerate(lessons) if lesson["id"] == lesson_id), None)
+    if position is None:
+        await callback.answer(t["courses.not_found"], show_alert=True)
+        return None
+    if not is_unlocked(lessons, position, progress.completed_lessons_ids):
+        await callback.answer(t["courses.lesson_locked"], show_alert=True)
+        return None
+    return position, lessons[position]
+
+@callbacks.route(LessonPick)
+async def show_lesson(callback: CallbackQuery, callback_data: LessonPick):
+    """Show a lesson with a button to mark it completed"""
+    t = get_locale(callback.from_user)
+    course_id, lesson_id = callback_data.course_id, callback_data.lesson_id
+    found = await find_open_lesson(callback, course_id, lesson_id)
+    if found is None:
+        return
+    position, lesson = found
+    
+    text = t(
+        "courses.lesson", number=position + 1, title=lesson["title"],
+        content=lesson.get("content") or t["courses.default_lesson_content"]
+    )
+    keyboard_buttons = []
+    if lesson_id not in db.get_user_course_progress(callback.from_user.id, course_id).completed_lessons_ids:
+        keyboard_buttons.append([
+            InlineKeyboardButton(text=t["button.complete_lesson"], callback_data=LessonDone(course_id, lesson_id).pack())
+        ])
+    keyboard_buttons.append([
+        InlineKeyboardButton(text=t["button.continue_learning"], callback_data=CourseLessons(course_id).pack())
+    ])
+    
+    await callback.message.edit_text(text, reply_markup=InlineKeyboardMarkup(inline_keyboard=keyboard_buttons))
+    await callback.answer()
+
+@callbacks.route(LessonDone)
+async def complete_lesson(callback: CallbackQuery, callback_data: LessonDone):
+    """Mark a lesson completed and go back to the lesson list"""
+    t = get_locale(callback.from_user)
+    user_id = callback.from_user.id
+    course_id, lesson_id = callback_data.course_id, callback_data.lesson_id
+    
+    async with db.transaction(("enrollment", user_id)):
+        found = await find_open_lesson(callback, course_id, lesson_id)
+        if found is None:
+            return
+        db.mark_lesson_complete(user_id, course_id, lesson_id)
+    await callback.answer(t["courses.lesson_completed"])
+    await edit_lessons(callback, course_id)
+
+@callbacks.route("progress")
+async def show_progress(callback: CallbackQuery):
+    """Show user's progress in enrolled courses"""
+    t = get_locale(callback.from_user)
+    enrollments = db.get_user_enrollments(callback.from_user.id)
+    
+    rows = []
+    for course_id, progress in enrollments.items():
+        course = db.get_course_by_id(course_id)
+        if course and progress.enrolled:
+            rows.append({"name": course["name"], "progress": progress.progress_percentage})
+    text = t["courses.progress_title"] + t.join("courses.progress_line", rows)
+    
+    if not enrollments:
+        text += t["courses.no_enrollments"]
+    
+    keyboard = InlineKeyboardMarkup(inline_keyboard=[
+        [InlineKeyboardButton(text=t["button.courses"], callback_data="courses")],
+        [InlineKeyboardButton(text=t["button.back"], callback_data="back")]
+    ])
+    
+    await callback.message.edit_text(text, reply_markup=keyboard)
+    await callback.answer()
@@ -1,61 +1,65 @@
-from aiogram import Router, F
+import html
+from typing import Dict
+
+from aiogram import Router
 from aiogram.types import CallbackQuery, InlineKeyboardMarkup, InlineKeyboardButton
 
+from database.business_info import parse_coordinates
 from database.db_helper import db
-from keyboards.main_keyboard import get_main_keyboard, get_back_keyboard
+from keyboards.callbacks import AddItem, CategoryPick
+from keyboards.main_keyboard import get_back_keyboard
+from utils.callbacks import CallbackRoutes
+from utils.i18n import Locale, get_locale
+from utils.render_cache import RenderCache, RenderedView, show_view
 
 # Create router instance
 router = Router()
+callbacks = CallbackRoutes(router)
 
-@router.callback_query(F.data == "menu")
+@callbacks.route("menu")
 async def show_menu_categories(callback: CallbackQuery):
     """Show menu categories"""
+    t = get_locale(callback.from_user)
     keyboard = InlineKeyboardMarkup(inline_keyboard=[
         [
-            InlineKeyboardButton(text="🍕 Pizza", callback_data="category_pizza"),
-            InlineKeyboardButton(text="🍔 Burgers", callback_data="category_burgers")
+            InlineKeyboardButton(text=t["button.pizza"], callback_data=CategoryPick("pizza").pack()),
+            InlineKeyboardButton(text=t["button.burgers"], callback_data=CategoryPick("burgers").pack())
         ],
         [
-            InlineKeyboardButton(text="🥤 Drinks", callback_data="category_drinks"),
-            InlineKeyboardButton(text="🛒 Cart", callback_data="cart")
+            InlineKeyboardButton(text=t["button.drinks"], callback_data=CategoryPick("drinks").pack()),
+            InlineKeyboardButton(text=t["button.cart"], callback_data="cart")
         ],
         [
-            InlineKeyboardButton(text="⬅️ Back", callback_data="back")
+            InlineKeyboardButton(text=t["button.back"], callback_data="back")
         ]
     ])
     
     await callback.message.edit_text(
-        "🍽️ <b>Choose a category:</b>",
+        t["menu.choose_category"],
         reply_markup=keyboard
     )
     await callback.answer()
 
-@router.callback_query(F.data.startswith("category_"))
-async def show_category_items(callback: CallbackQuery):
+@callbacks.route(CategoryPick)
+async def show_category_items(callback: CallbackQuery, callback_data: CategoryPick):
     """Show items in selected category"""
-    category = callback.data.split("_")[1]
+    t = get_locale(callback.from_user)
+    category = callback_data.category
     items = db.get_menu_category(category)
     
     if not items:
-        await callback.answer("This category is empty!", show_alert=True)
+        await callback.answer(t["menu.category_empty"], show_alert=True)
         return
     
-    keyboard_buttons = []
-    text = f"🍽️ <b>{category.title()}</b>\n\n"
-    
-    for item in items:
-        text += f"<b>{item['name']}</b> - ${item['price']:.2f}\n"
-        text += f"<i>{item['description']}</i>\n\n"
-        
-        keyboard_buttons.append([
-            InlineKeyboardButton(
-                text=f"➕ Add {item['name']}", 
-                callback_data=f"add_{item['id']}"
-            )
-        ])
+    title = t(f"category.{category}") if f"category.{category}" in t else category.title()
+    text = t("menu.category_title", category=title) + t.join("menu.category_item", items)
     
+    keyboard_buttons = [
+        [InlineKeyboardButton(text=t("button.add_item", name=item["name"]), callback_data=AddItem(item["id"]).pack())]
+        for item in items
+    ]
     keyboard_buttons.append([
-        InlineKeyboardButton(text="⬅️ Back to Menu", callback_data="menu")
+        InlineKeyboardButton(text=t["button.back_to_menu"], callback_data="menu")
     ])
     
     keyboard = InlineKeyboardMarkup(inline_keyboard=keyboard_buttons)
@@ -63,173 +67,194 @@ async def show_category_items(callback: CallbackQuery):
     await callback.message.edit_text(text, reply_markup=keyboard)
     await callback.answer()
 
-@router.callback_query(F.data.startswith("add_"))
-async def add_to_cart(callback: CallbackQuery):
+@callbacks.route(AddItem)
+async def add_to_cart(callback: CallbackQuery, callback_data: AddItem):
     """Add item to cart"""
-    item_id = int(callback.data.split("_")[1])
+    t = get_locale(callback.from_user)
+    item_id = callback_data.item_id
     item = db.get_item_by_id(item_id)
     
     if not item:
-        await callback.answer("Item not found!", show_alert=True)
+        await callback.answer(t["menu.item_not_found"], show_alert=True)
         return
     
-    db.add_to_cart(callback.from_user.id, item_id)
+    user_id = callback.from_user.id
+    async with db.transaction(("cart", user_id)):
+        # A redelivered callback must not add the item twice
+        first_delivery = db.claim_key(f"callback:{callback.id}")
+        if first_delivery:
+            db.add_to_cart(user_id, item_id)
     
-    await callback.answer(f"✅ {item['name']} added to cart!", show_alert=True)
-
-@router.callback_query(F.data == "cart")
-async def show_cart(callback: CallbackQuery):
-    """Show user's cart"""
-    cart = db.get_cart(callback.from_user.id)
+    if not first_delivery:
+        await callback.answer()
+        return
     
+    await callback.answer(t("menu.added", name=item["name"]), show_alert=True)
+
+# Rendered carts per (bot, user), rebuilt only when the cart version changes
+cart_views = RenderCache()
+
+def render_cart(cart: dict, delivery_fee: float, t: Locale) -> RenderedView:
+    """Build the cart message"""
     if not cart["items"]:
-        await callback.message.edit_text(
-            "🛒 <b>Your cart is empty</b>\n\n"
-            "Add some items from the menu!",
-            reply_markup=InlineKeyboardMarkup(inline_keyboard=[
-                [InlineKeyboardButton(text="🍽️ Browse Menu", callback_data="menu")],
-                [InlineKeyboardButton(text="⬅️ Back", callback_data="back")]
+        return RenderedView.build(
+            t["cart.empty"],
+            InlineKeyboardMarkup(inline_keyboard=[
+                [InlineKeyboardButton(text=t["button.browse_menu"], callback_data="menu")],
+                [InlineKeyboardButton(text=t["button.back"], callback_data="back")]
             ])
         )
-        await callback.answer()
-        return
-    
-    text = "🛒 <b>Your Cart:</b>\n\n"
-    total = 0
     
+    lines = []
     for item_id, quantity in cart["items"].items():
         item = db.get_item_by_id(int(item_id))
         if item:
-            item_total = item["price"] * quantity
-            total += item_total
-            text += f"<b>{item['name']}</b>\n"
-            text += f"${item['price']:.2f} x {quantity} = ${item_total:.2f}\n\n"
+            lines.append({
+                "name": item["name"], "price": item["price"],
+                "quantity": quantity, "line_total": item["price"] * quantity
+            })
+    subtotal = sum(line["line_total"] for line in lines)
     
-    delivery_fee = db.data.get("settings", {}).get("delivery_fee", 2.50)
-    text += f"<b>Subtotal:</b> ${total:.2f}\n"
-    text += f"<b>Delivery:</b> ${delivery_fee:.2f}\n"
-    text += f"<b>Total:</b> ${total + delivery_fee:.2f}"
+    text = "".join([
+        t["cart.title"],
+        t.join("cart.line", lines),
+        t("cart.totals", subtotal=subtotal, delivery=delivery_fee, total=subtotal + delivery_fee)
+    ])
     
     keyboard = InlineKeyboardMarkup(inline_keyboard=[
         [
-            InlineKeyboardButton(text="✅ Checkout", callback_data="checkout"),
-            InlineKeyboardButton(text="🗑️ Clear Cart", callback_data="clear_cart")
+            InlineKeyboardButton(text=t["button.checkout"], callback_data="checkout"),
+            InlineKeyboardButton(text=t["button.clear_cart"], callback_data="clear_cart")
         ],
         [
-            InlineKeyboardButton(text="🍽️ Add More Items", callback_data="menu"),
-            InlineKeyboardButton(text="⬅️ Back", callback_data="back")
+            InlineKeyboardButton(text=t["button.add_more"], callback_data="menu"),
+            InlineKeyboardButton(text=t["button.back"], callback_data="back")
         ]
     ])
+    return RenderedView.build(text, keyboard)
+
+def get_cart_view(callback: CallbackQuery) -> RenderedView:
+    """Cached cart message of the user, re-rendered after cart or price changes"""
+    user_id = callback.from_user.id
+    t = get_locale(callback.from_user)
+    delivery_fee = db.data.get("settings", {}).get("delivery_fee", 2.50)
+    key = (callback.bot.id, user_id)
+    version = (db.cart_version(user_id), delivery_fee, t.code)
     
-    await callback.message.edit_text(text, reply_markup=keyboard)
+    view = cart_views.get(key, version)
+    if view is None:
+        view = render_cart(db.get_cart(user_id), delivery_fee, t)
+        cart_views.put(key, version, view)
+    return view
+
+@callbacks.route("cart")
+async def show_cart(callback: CallbackQuery):
+    """Show user's cart"""
+    # Skips the edit when the message already shows this cart
+    await show_view(callback.message, get_cart_view(callback))
     await callback.answer()
 
-@router.callback_query(F.data == "clear_cart")
+@callbacks.route("clear_cart")
 async def clear_cart(callback: CallbackQuery):
     """Clear user's cart"""
-    db.clear_cart(callback.from_user.id)
-    await callback.answer("🗑️ Cart cleared!", show_alert=True)
-    await show_cart(callback)
+    async with db.transaction(("cart", callback.from_user.id)):
+        db.clear_cart(callback.from_user.id)
+    await callback.answer(get_locale(callback.from_user)("cart.cleared"), show_alert=True)
+    await show_view(callback.message, get_cart_view(callback))
 
-@router.callback_query(F.data == "checkout")
+@callbacks.route("checkout")
 async def checkout(callback: CallbackQuery):
     """Process checkout"""
-    cart = db.get_cart(callback.from_user.id)
+    t = get_locale(callback.from_user)
+    user_id = callback.from_user.id
+    # Creating the order and clearing the cart are saved together
+    async with db.transaction(("cart", user_id)):
+        first_delivery = db.claim_key(f"callback:{callback.id}")
+        order = db.place_order(user_id) if first_delivery else None
     
-    if not cart["items"]:
-        await callback.answer("Your cart is empty!", show_alert=True)
+    if not first_delivery:
+        await callback.answer()
+        return
+    if order is None:
+        await callback.answer(t["cart.is_empty"], show_alert=True)
         return
     
     # Here you would integrate with payment systems
     # For now, we'll just show order confirmation
     
-    order_text = "🎉 <b>Order Confirmed!</b>\n\n"
-    order_text += "📞 We'll call you shortly to confirm delivery details.\n"
-    order_text += "⏱️ Estimated delivery: 30-45 minutes\n\n"
-    order_text += "<b>Order Summary:</b>\n"
-    
-    for item_id, quantity in cart["items"].items():
+    lines = []
+    for item_id, quantity in order["items"].items():
         item = db.get_item_by_id(int(item_id))
         if item:
-            order_text += f"• {item['name']} x{quantity}\n"
+            lines.append({"name": item["name"], "quantity": quantity})
     
     delivery_fee = db.data.get("settings", {}).get("delivery_fee", 2.50)
-    order_text += f"\n<b>Total: ${cart['total'] + delivery_fee:.2f}</b>"
-    
-    # Clear the cart after order
-    db.clear_cart(callback.from_user.id)
+    order_text = "".join([
+        t["order.confirmed"],
+        t.join("order.line", lines),
+        t("order.total", total=order["total"] + delivery_fee)
+    ])
     
     keyboard = InlineKeyboardMarkup(inline_keyboard=[
-        [InlineKeyboardButton(text="🏠 Main Menu", callback_data="back")]
+        [InlineKeyboardButton(text=t["button.main_menu"], callback_data="back")]
     ])
     
     await callback.message.edit_text(order_text, reply_markup=keyboard)
     await callback.answer()
 
-@router.callback_query(F.data == "contact")
-async def show_contact(callback: CallbackQuery):
-    """Show contact information"""
-    contact_text = """
-📞 <b>Contact Information</b>
+# Rendered contact, location and hours pages per (bot, page, locale), rebuilt when the info version changes
+info_views = RenderCache(max_entries=1000)
+
+CONTACT_FIELDS = ("phone", "email", "website")
+SOCIAL_FIELDS = ("facebook", "instagram", "twitter")
 
-📱 Phone: +1 (555) 123-4567
-📧 Email: info@restaurant.com
-🌐 Website: www.restaurant.com
+def render_info(page: str, info: Dict[str, str], t: Locale) -> RenderedView:
+    """Build the contact, location or hours message from the business info"""
+    values = {field: html.escape(value) for field, value in info.items()}
+    if page == "contact":
+        socials = "".join([t(f"info.{field}", value=values[field]) for field in SOCIAL_FIELDS if values[field]])
+        text = "".join([
+            t["info.contact_title"],
+            *[t(f"info.{field}", value=values[field]) for field in CONTACT_FIELDS if values[field]],
+            t["info.social_title"] + socials if socials else ""
+        ])
+    elif page == "location":
+        text = t("info.location", address=values["address"])
+    else:
+        text = t("info.hours", hours=values["hours"])
+    return RenderedView.build(text, get_back_keyboard(t))
 
-<b>Follow us:</b>
-📘 Facebook: @restaurant
-📷 Instagram: @restaurant
-🐦 Twitter: @restaurant
-    """
+def get_info_view(callback: CallbackQuery, page: str) -> RenderedView:
+    """Cached info page; zero I/O, business info is kept in memory"""
+    t = get_locale(callback.from_user)
+    business_info = db.business_info
+    info = business_info.get()
+    key = (callback.bot.id, page, t.code)
     
-    await callback.message.edit_text(
-        contact_text,
-        reply_markup=get_back_keyboard()
-    )
+    view = info_views.get(key, business_info.version)
+    if view is None:
+        view = render_info(page, info, t)
+        info_views.put(key, business_info.version, view)
+    return view
+
+@callbacks.route("contact")
+async def show_contact(callback: CallbackQuery):
+    """Show contact information"""
+    await show_view(callback.message, get_info_view(callback, "contact"))
     await callback.answer()
 
-@router.callback_query(F.data == "location")
+@callbacks.route("location")
 async def show_location(callback: CallbackQuery):
     """Show restaurant location"""
-    await callback.message.edit_text(
-        "📍 <b>Our Location</b>\n\n"
-        "123 Main Street\n"
-        "City Center, State 12345\n\n"
-        "We're located in the heart of downtown!",
-        reply_markup=get_back_keyboard()
-    )
+    await show_view(callback.message, get_info_view(callback, "location"))
     # Send actual location
-    await callback.message.answer_location(
-        latitude=40.7128,  # Replace with actual coordinates
-        longitude=-74.0060
-    )
+    coordinates = parse_coordinates(db.business_info.get()["coordinates"])
+    if coordinates is not None:
+        await callback.message.answer_location(latitude=coordinates[0], longitude=coordinates[1])
     await callback.answer()
 
-@router.callback_query(F.data == "hours")
+@callbacks.route("hours")
 async def show_hours(callback: CallbackQuery):
     """Show opening hours"""
-    hours_text = """
-⏰ <b>Opening Hours</b>
-
-<b>Monday - Thursday:</b> 11:00 AM - 10:00 PM
-<b>Friday - Saturday:</b> 11:00 AM - 11:00 PM
-<b>Sunday:</b> 12:00 PM - 9:00 PM
-
-<b>Kitchen closes 30 minutes before closing time</b>
-    """
-    
-    await callback.message.edit_text(
-        hours_text,
-        reply_markup=get_back_keyboard()
-    )
+    await show_view(callback.message, get_info_view(callback, "hours"))
     await callback.answer()
-
-@router.callback_query(F.data == "back")
-async def go_back(callback: CallbackQuery):
-    """Go back to main menu"""
-    await callback.message.edit_text(
-        f"👋 Welcome back, {callback.from_user.full_name}!\n\n"
-        f"What would you like to do?",
-        reply_markup=get_main_keyboard()
-    )
-    await callback.answer()
\ No newline at end of file
@@ -0,0 +1,107 @@
+# handlers/search.py
+import html
+from typing import Optional
+
+from aiogram import Router
+from aiogram.filters import Command, CommandObject
+from aiogram.types import (
+    Message, InlineQuery, InlineQueryResultArticle, InputTextMessageContent,
+    InlineKeyboardMarkup, InlineKeyboardButton
+)
+
+from keyboards.callbacks import AddItem, CoursePick, ProductPick, ServicePick
+from utils.i18n import Locale, get_locale
+from utils.verticals import Vertical, get_vertical
+
+router = Router()
+
+# Callback that opens (or orders) an item of each type
+ITEM_CALLBACKS = {
+    "menu": AddItem,
+    "products": ProductPick,
+    "services": ServicePick,
+    "courses": CoursePick
+}
+
+SEARCH_LIMIT = 10
+
+# /start payload of the links in inline results: item-<item_type>-<id>
+ITEM_LINK_PREFIX = "item-"
+
+def search_catalog(vertical: Optional[Vertical], query: str, limit: int = SEARCH_LIMIT):
+    vertical = vertical or get_vertical("restaurant")
+    return vertical.store.search_index.search(query, limit)
+
+def item_title(item: dict, t: Locale) -> str:
+    return t("search.item", name=item["name"], price=item.get("price", 0))
+
+def item_text(item: dict, t: Locale) -> str:
+    return t(
+        "search.item_text", name=html.escape(item["name"]), price=item.get("price", 0),
+        description=html.escape(item.get("description", ""))
+    )
+
+def item_button(item_type: str, item: dict, t: Locale) -> InlineKeyboardButton:
+    return InlineKeyboardButton(text=item_title(item, t), callback_data=ITEM_CALLBACKS[item_type](item["id"]).pack())
+
+def item_link_button(bot_username: str, item_type: str, item: dict, t: Locale) -> InlineKeyboardButton:
+    """Deep link opening the item in a private chat with the bot
+    
+    Inline messages have no `callback.message` to edit, so their buttons
+    cannot use the item callbacks directly.
+    """
+    return InlineKeyboardButton(
+        text=item_title(item, t),
+        url=f"https://t.me/{bot_username}?start={ITEM_LINK_PREFIX}{item_type}-{item['id']}"
+    )
+
+def find_linked_item(vertical: Optional[Vertical], payload: str):
+    """(item_type, item) of a /start item link payload, or None"""
+    if not payload.startswith(ITEM_LINK_PREFIX):
+        return None
+    item_type, _, item_id = payload[len(ITEM_LINK_PREFIX):].rpartition("-")
+    if item_type not in ITEM_CALLBACKS or not item_id.isdigit():
+        return None
+    vertical = vertical or get_vertical("restaurant")
+    item = vertical.store.search_index.items.get((item_type, int(item_id)))
+    return (item_type, item) if item else None
+
+@router.inline_query()
+async def inline_search(inline_query: InlineQuery, vertical: Optional[Vertical] = None):
+    """Answer @bot <query> (inline mode must be enabled with BotFather)"""
+    query = inline_query.query.strip()
+    t = get_locale(inline_query.from_user)
+    results = []
+    
+    if query:
+        bot_username = (await inline_query.bot.me()).username
+        for item_type, item in search_catalog(vertical, query):
+            results.append(InlineQueryResultArticle(
+                id=f"{item_type}_{item['id']}",
+                title=item_title(item, t),
+                description=item.get("description", ""),
+                input_message_content=InputTextMessageContent(message_text=item_text(item, t)),
+                reply_markup=InlineKeyboardMarkup(inline_keyboard=[[item_link_button(bot_username, item_type, item, t)]])
+            ))
+    
+    # Results are in the user's language, so they are not shared between users
+    await inline_query.answer(results, cache_time=60, is_personal=True)
+
+@router.message(Command("search"))
+async def search_command(message: Message, command: CommandObject, vertical: Optional[Vertical] = None):
+    """Handle /search <query>"""
+    t = get_locale(message.from_user)
+    if not command.args:
+        await message.answer(t["search.usage"])
+        return
+    
+    found = search_catalog(vertical, command.args)
+    query = html.escape(command.args)
+    if not found:
+        await message.answer(t("search.nothing_found", query=query))
+        return
+    
+    keyboard = InlineKeyboardMarkup(inline_keyboard=[
+        [item_button(item_type, item, t)] for item_type, item in found
+    ])
+    await message.answer(t("search.results", query=query), reply_markup=keyboard)
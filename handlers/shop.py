@@ -1,19 +1,60 @@
 # handlers/shop.py
-from aiogram import Router, F
+from aiogram import Router
 from aiogram.types import CallbackQuery, InlineKeyboardMarkup, InlineKeyboardButton
 
+from database.inventory import OutOfStock
+from database.models import Cart
+from keyboards.callbacks import ProductPick, ShopAdd, SizePick, WishlistToggle
+from utils.callbacks import CallbackRoutes
+from utils.render_cache import RenderCache, RenderedView, show_view
+from utils.verticals import get_vertical
+
 router = Router()
+callbacks = CallbackRoutes(router)
+db = get_vertical("shop").store
 
-@router.callback_query(F.data.startswith("product_"))
-async def show_product_details(callback: CallbackQuery):
+@callbacks.route("shop")
+async def show_products(callback: CallbackQuery):
+    """Show products from all categories"""
+    text = "🛍️ <b>Our Products:</b>\n\n"
+    keyboard_buttons = []
+    
+    for category, products in db.data.get("products", {}).items():
+        text += f"<b>{category.title()}</b>: {len(products)} items\n"
+        for product in products:
+            keyboard_buttons.append([
+                InlineKeyboardButton(
+                    text=f"{product['name']} - ${product['price']:.2f}",
+                    callback_data=ProductPick(product["id"]).pack()
+                )
+            ])
+    
+    keyboard_buttons.append([
+        InlineKeyboardButton(text="⬅️ Back", callback_data="back")
+    ])
+    
+    keyboard = InlineKeyboardMarkup(inline_keyboard=keyboard_buttons)
+    await callback.message.edit_text(text, reply_markup=keyboard)
+    await callback.answer()
+
+@callbacks.route(ProductPick)
+async def show_product_details(callback: CallbackQuery, callback_data: ProductPick):
     """Show detailed product information"""
-    product_id = int(callback.data.split("_")[1])
-    product = db.get_item_by_id(product_id)
+    product_id = callback_data.product_id
+    product = db.get_item_by_id("products", product_id)
     
     if not product:
         await callback.answer("Product not found!", show_alert=True)
         return
     
+    available = db.inventory.available(product_id)
+    if available is None:
+        stock_text = "Available"
+    elif available:
+        stock_text = f"{available} left"
+    else:
+        stock_text = "Out of stock"
+    
     # Product details with images, sizes, colors
     text = f"""
 🛍️ <b>{product['name']}</b>
@@ -23,18 +64,18 @@ async def show_product_details(callback: CallbackQuery):
 
 <b>Available Sizes:</b> S, M, L, XL
 <b>Available Colors:</b> Red, Blue, Black, White
-<b>Stock:</b> {product.get('stock', 'Available')}
+<b>Stock:</b> {stock_text}
     """
     
     keyboard = InlineKeyboardMarkup(inline_keyboard=[
         [
-            InlineKeyboardButton(text="Size S", callback_data=f"size_{product_id}_S"),
-            InlineKeyboardButton(text="Size M", callback_data=f"size_{product_id}_M"),
-            InlineKeyboardButton(text="Size L", callback_data=f"size_{product_id}_L")
+            InlineKeyboardButton(text="Size S", callback_data=SizePick(product_id, "S").pack()),
+            InlineKeyboardButton(text="Size M", callback_data=SizePick(product_id, "M").pack()),
+            InlineKeyboardButton(text="Size L", callback_data=SizePick(product_id, "L").pack())
         ],
         [
-            InlineKeyboardButton(text="🛒 Add to Cart", callback_data=f"add_{product_id}"),
-            InlineKeyboardButton(text="❤️ Wishlist", callback_data=f"wishlist_{product_id}")
+            InlineKeyboardButton(text="🛒 Add to Cart", callback_data=ShopAdd(product_id).pack()),
+            InlineKeyboardButton(text="❤️ Wishlist", callback_data=WishlistToggle(product_id).pack())
         ],
         [
             InlineKeyboardButton(text="⬅️ Back", callback_data="shop")
@@ -44,15 +85,146 @@ async def show_product_details(callback: CallbackQuery):
     await callback.message.edit_text(text, reply_markup=keyboard)
     await callback.answer()
 
-@router.callback_query(F.data.startswith("size_"))
-async def select_size(callback: CallbackQuery):
+@callbacks.route(ShopAdd)
+async def add_to_cart(callback: CallbackQuery, callback_data: ShopAdd):
+    """Reserve one unit of a product and put it in the cart"""
+    product_id = callback_data.product_id
+    product = db.get_item_by_id("products", product_id)
+    
+    if not product:
+        await callback.answer("Product not found!", show_alert=True)
+        return
+    
+    user_id = callback.from_user.id
+    async with db.transaction(("cart", user_id)):
+        # A redelivered callback must not reserve a second unit
+        first_delivery = db.claim_key(f"callback:{callback.id}")
+        reserved = first_delivery and db.reserve_to_cart(user_id, product_id)
+    
+    if not first_delivery:
+        await callback.answer()
+    elif reserved:
+        minutes = int(db.inventory.ttl // 60)
+        await callback.answer(f"✅ {product['name']} added to cart! Reserved for {minutes} min.", show_alert=True)
+    else:
+        await callback.answer(f"😔 Sorry, {product['name']} is out of stock.", show_alert=True)
+
+# Rendered shop carts per (bot, user), rebuilt only when the cart version changes
+cart_views = RenderCache()
+
+def render_cart(cart: Cart) -> RenderedView:
+    """Build the shop cart message"""
+    if not cart.lines:
+        return RenderedView.build(
+            "🛒 <b>Your cart is empty</b>",
+            InlineKeyboardMarkup(inline_keyboard=[
+                [InlineKeyboardButton(text="🛍️ Shop", callback_data="shop")],
+                [InlineKeyboardButton(text="⬅️ Back", callback_data="back")]
+            ])
+        )
+    
+    text = "🛒 <b>Your Cart:</b>\n\n"
+    for line in cart.lines.values():
+        product = db.get_item_by_id(line.item_type, line.item_id)
+        if product:
+            text += f"<b>{product['name']}</b>\n"
+            text += f"${product['price']:.2f} x {line.quantity} = ${product['price'] * line.quantity:.2f}\n\n"
+    text += f"<b>Total:</b> ${cart.total:.2f}"
+    
+    keyboard = InlineKeyboardMarkup(inline_keyboard=[
+        [
+            InlineKeyboardButton(text="✅ Checkout", callback_data="shop_checkout"),
+            InlineKeyboardButton(text="🗑️ Clear Cart", callback_data="shop_clear")
+        ],
+        [InlineKeyboardButton(text="⬅️ Back", callback_data="shop")]
+    ])
+    return RenderedView.build(text, keyboard)
+
+def get_cart_view(callback: CallbackQuery) -> RenderedView:
+    """Cached cart message of the user, re-rendered after cart or price changes"""
+    user_id = callback.from_user.id
+    key = (callback.bot.id, user_id)
+    version = db.cart_version(user_id)
+    
+    view = cart_views.get(key, version)
+    if view is None:
+        view = render_cart(db.get_cart(user_id, "products"))
+        cart_views.put(key, version, view)
+    return view
+
+@callbacks.route("shop_cart")
+async def show_cart(callback: CallbackQuery):
+    """Show the shop cart"""
+    # Skips the edit when the message already shows this cart
+    await show_view(callback.message, get_cart_view(callback))
+    await callback.answer()
+
+@callbacks.route("shop_clear")
+async def clear_cart(callback: CallbackQuery):
+    """Clear the shop cart and release its reservations"""
+    async with db.transaction(("cart", callback.from_user.id)):
+        db.clear_cart(callback.from_user.id)
+    await callback.answer("🗑️ Cart cleared!", show_alert=True)
+    await show_view(callback.message, get_cart_view(callback))
+
+@callbacks.route("shop_checkout")
+async def checkout(callback: CallbackQuery):
+    """Confirm reserved stock and place the order"""
+    user_id = callback.from_user.id
+    out_of_stock = []
+    async with db.transaction(("cart", user_id)):
+        first_delivery = db.claim_key(f"callback:{callback.id}")
+        order = None
+        if first_delivery:
+            try:
+                order = db.place_order(user_id)
+            except OutOfStock as e:
+                out_of_stock = [db.get_item_by_id("products", item_id) or {} for item_id in e.item_ids]
+    
+    if not first_delivery:
+        await callback.answer()
+        return
+    if out_of_stock:
+        names = ", ".join(product.get("name", "?") for product in out_of_stock)
+        await callback.answer(f"😔 No longer in stock: {names}. Please update your cart.", show_alert=True)
+        return
+    if order is None:
+        await callback.answer("Your cart is empty!", show_alert=True)
+        return
+    
+    keyboard = InlineKeyboardMarkup(inline_keyboard=[
+        [InlineKeyboardButton(text="🏠 Main Menu", callback_data="back")]
+    ])
+    await callback.message.edit_text(
+        f"🎉 <b>Order #{order['id']} Confirmed!</b>\n\n"
+        f"<b>Total: ${order['total']:.2f}</b>",
+        reply_markup=keyboard
+    )
+    await callback.answer()
+
+@callbacks.route(SizePick)
+async def select_size(callback: CallbackQuery, callback_data: SizePick):
     """Handle size selection"""
-    parts = callback.data.split("_")
-    product_id, size = int(parts[1]), parts[2]
+    product_id, size = callback_data.product_id, callback_data.size
     
     # Store user's size preference
     user_preferences = db.get_user_preferences(callback.from_user.id)
     user_preferences[f"product_{product_id}_size"] = size
     db.save_user_preferences(callback.from_user.id, user_preferences)
     
-    await callback.answer(f"✅ Size {size} selected!", show_alert=True)
\ No newline at end of file
+    await callback.answer(f"✅ Size {size} selected!", show_alert=True)
+
+@callbacks.route(WishlistToggle)
+async def toggle_wishlist(callback: CallbackQuery, callback_data: WishlistToggle):
+    """Add a product to the wishlist, or remove it if it is already there"""
+    product_id = callback_data.product_id
+    product = db.get_item_by_id("products", product_id)
+    
+    if not product:
+        await callback.answer("Product not found!", show_alert=True)
+        return
+    
+    if db.toggle_wishlist(callback.from_user.id, product_id):
+        await callback.answer(f"❤️ {product['name']} added to your wishlist!")
+    else:
+        await callback.answer(f"💔 {product['name']} removed from your wishlist")
@@ -1,22 +1,48 @@
+from typing import Optional
+
 from aiogram import Router
-from aiogram.filters import CommandStart
-from aiogram.types import Message
+from aiogram.filters import CommandObject, CommandStart
+from aiogram.types import CallbackQuery, InlineKeyboardMarkup, Message
 
-from keyboards.main_keyboard import get_main_keyboard
+from handlers.search import find_linked_item, item_button, item_text
+from utils.callbacks import CallbackRoutes
+from utils.i18n import get_locale
+from utils.verticals import Vertical, get_vertical
 
 # Create router instance
 router = Router()
+callbacks = CallbackRoutes(router)
+
+@router.message(CommandStart(deep_link=True))
+async def start_deep_link(message: Message, command: CommandObject, vertical: Optional[Vertical] = None):
+    """Handle /start <payload>, e.g. from the item links of inline search results"""
+    await start_handler(message, vertical)
+    found = find_linked_item(vertical, command.args)
+    if found:
+        item_type, item = found
+        t = get_locale(message.from_user)
+        await message.answer(
+            item_text(item, t),
+            reply_markup=InlineKeyboardMarkup(inline_keyboard=[[item_button(item_type, item, t)]])
+        )
 
 @router.message(CommandStart())
-async def start_handler(message: Message):
+async def start_handler(message: Message, vertical: Optional[Vertical] = None):
     """Handle /start command"""
+    vertical = vertical or get_vertical("restaurant")
+    locale = get_locale(message.from_user)
     await message.answer(
-        f"👋 Hello, {message.from_user.full_name}!\n"
-        f"Welcome to our Restaurant Bot!\n\n"
-        f"I can help you:\n"
-        f"🍽️ Browse our menu\n"
-        f"📞 Get contact information\n"
-        f"📍 Find our location\n"
-        f"⏰ Check opening hours",
-        reply_markup=get_main_keyboard()
-    )
\ No newline at end of file
+        vertical.get_welcome_message(message.from_user.full_name, locale),
+        reply_markup=vertical.get_keyboard(locale)
+    )
+
+@callbacks.route("back")
+async def go_back(callback: CallbackQuery, vertical: Optional[Vertical] = None):
+    """Go back to main menu"""
+    vertical = vertical or get_vertical("restaurant")
+    t = get_locale(callback.from_user)
+    await callback.message.edit_text(
+        t("welcome.back", user_name=callback.from_user.full_name),
+        reply_markup=vertical.get_keyboard(t)
+    )
+    await callback.answer()
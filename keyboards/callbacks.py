@@ -0,0 +1,65 @@
+# keyboards/callbacks.py
+from datetime import date, time
+from typing import Literal
+
+from utils.callbacks import CallbackSchema
+
+# Payloads of the buttons that carry IDs; static buttons use plain strings
+
+# Restaurant
+class CategoryPick(CallbackSchema, prefix="category"):
+    category: str
+
+class AddItem(CallbackSchema, prefix="add"):
+    item_id: int
+
+# Education
+class CoursePick(CallbackSchema, prefix="course"):
+    course_id: int
+
+class CourseLessons(CallbackSchema, prefix="lessons"):
+    course_id: int
+
+class LessonPick(CallbackSchema, prefix="lesson"):
+    course_id: int
+    lesson_id: int
+
+class LessonDone(CallbackSchema, prefix="done"):
+    course_id: int
+    lesson_id: int
+
+class CourseProgress(CallbackSchema, prefix="progress"):
+    course_id: int
+
+class CourseEnroll(CallbackSchema, prefix="enroll"):
+    course_id: int
+
+class CoursePreview(CallbackSchema, prefix="preview"):
+    course_id: int
+
+# Shop
+class ProductPick(CallbackSchema, prefix="product"):
+    product_id: int
+
+class SizePick(CallbackSchema, prefix="size"):
+    product_id: int
+    size: Literal["S", "M", "L", "XL"]
+
+class ShopAdd(CallbackSchema, prefix="shop_add"):
+    product_id: int
+
+class WishlistToggle(CallbackSchema, prefix="wishlist"):
+    product_id: int
+
+# Booking: dates and times are packed in base62
+class ServicePick(CallbackSchema, prefix="service"):
+    service_id: int
+
+class DatePick(CallbackSchema, prefix="date"):
+    service_id: int
+    day: date
+
+class TimePick(CallbackSchema, prefix="time"):
+    service_id: int
+    day: date
+    slot: time
@@ -1,25 +1,49 @@
+from functools import lru_cache
+
 from aiogram.types import InlineKeyboardMarkup, InlineKeyboardButton
 
-def get_main_keyboard():
+from utils.i18n import get_locale
+
+# Keyboards are static per locale, so each is built once and reused
+
+@lru_cache(maxsize=None)
+def get_main_keyboard(locale=None):
     """Create main menu keyboard"""
+    t = locale or get_locale()
     keyboard = InlineKeyboardMarkup(inline_keyboard=[
         [
-            InlineKeyboardButton(text="🍽️ Menu", callback_data="menu"),
-            InlineKeyboardButton(text="🛒 My Cart", callback_data="cart")
+            InlineKeyboardButton(text=t["button.menu"], callback_data="menu"),
+            InlineKeyboardButton(text=t["button.my_cart"], callback_data="cart")
         ],
         [
-            InlineKeyboardButton(text="📞 Contact", callback_data="contact"),
-            InlineKeyboardButton(text="📍 Location", callback_data="location")
+            InlineKeyboardButton(text=t["button.contact"], callback_data="contact"),
+            InlineKeyboardButton(text=t["button.location"], callback_data="location")
         ],
         [
-            InlineKeyboardButton(text="⏰ Hours", callback_data="hours")
+            InlineKeyboardButton(text=t["button.hours"], callback_data="hours")
         ]
     ])
     return keyboard
 
-def get_back_keyboard():
+@lru_cache(maxsize=None)
+def get_back_keyboard(locale=None):
     """Create back to main menu keyboard"""
+    t = locale or get_locale()
+    keyboard = InlineKeyboardMarkup(inline_keyboard=[
+        [InlineKeyboardButton(text=t["button.back_main"], callback_data="back")]
+    ])
+    return keyboard
+
+def get_actions_keyboard(actions, locale=None):
+    """Create main menu keyboard from a business type's actions"""
+    def label(action):
+        key = f"action.{action['callback']}"
+        return locale(key) if locale is not None and key in locale else action["text"]
+    
     keyboard = InlineKeyboardMarkup(inline_keyboard=[
-        [InlineKeyboardButton(text="⬅️ Back to Main Menu", callback_data="back")]
+        [
+            InlineKeyboardButton(text=label(action), callback_data=action["callback"])
+            for action in actions
+        ]
     ])
-    return keyboard
\ No newline at end of file
+    return keyboard
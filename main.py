@@ -1,15 +1,15 @@
+# Imported first so the startup report measures from process start
+from utils.startup_report import startup_report
+
 import asyncio
 import logging
 import sys
-from aiogram import Bot, Dispatcher
-from aiogram.client.default import DefaultBotProperties
-from aiogram.enums import ParseMode
 
-# Import handlers
-from handlers.start import router as start_router
-from handlers.menu import router as menu_router
-from handlers.admin import router as admin_router
+from app_factory import create_bot, create_dispatcher
 from config import config
+from utils.polling import PollingRunner
+
+startup_report.mark("imports")
 
 # Configure logging
 logging.basicConfig(
@@ -22,32 +22,35 @@ async def main():
     """Main function to start the bot"""
     
     # Initialize Bot instance
-    bot = Bot(
-        token=config.token,
-        default=DefaultBotProperties(parse_mode=ParseMode.HTML)
-    )
+    bot = create_bot()
     
-    # Initialize Dispatcher
-    dp = Dispatcher()
+    # Initialize Dispatcher with the routers of the configured business type
+    dp = create_dispatcher()
     
-    # Register routers
-    dp.include_router(start_router)
-    dp.include_router(menu_router)
-    dp.include_router(admin_router)
+    polling = PollingRunner(
+        dp,
+        timeout=config.polling_timeout,
+        limit=config.polling_limit,
+        concurrency=config.polling_concurrency,
+        allowed_updates=config.polling_allowed_updates
+    )
+    dp["polling"] = polling
     
-    # Start polling
+    # Start polling; SIGINT/SIGTERM stop it, then the shutdown hooks drain
+    # running handlers and flush storage
     logger.info("Starting bot...")
     try:
-        await dp.start_polling(bot)
+        await polling.run(bot)
     except KeyboardInterrupt:
         logger.info("Bot stopped by user")
     except Exception as e:
         logger.error(f"Error occurred: {e}")
     finally:
+        await dp["lifecycle"].confirm_offset(bot)
         await bot.session.close()
 
 if __name__ == '__main__':
     try:
         asyncio.run(main())
     except KeyboardInterrupt:
-        print("Bot stopped!")
\ No newline at end of file
+        print("Bot stopped!")
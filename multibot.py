@@ -0,0 +1,91 @@
+import logging
+from typing import Dict, List
+
+from aiohttp import web
+from aiogram import Bot, Dispatcher
+from aiogram.client.default import DefaultBotProperties
+from aiogram.enums import ParseMode
+from aiogram.webhook.aiohttp_server import setup_application
+
+from app_factory import create_dispatcher
+from config import config
+from database.tenancy import current_tenant
+from utils.http_session import TunedAiohttpSession, create_session
+from utils.ingress import QueuedRequestHandler, add_health_route
+from utils.lifecycle import listening_socket, wait_for_predecessor
+from utils.tenants import Tenant, TenantMiddleware, TenantRequestHandler, load_tenants, register_tenant
+from utils.verticals import get_vertical
+
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+def create_tenant_bots(tenants: List[Tenant], session: TunedAiohttpSession) -> Dict[str, Bot]:
+    """Create one Bot per tenant, all sharing the same HTTP session"""
+    bots = {}
+    for tenant in tenants:
+        bot = Bot(
+            token=tenant.token,
+            session=session,
+            default=DefaultBotProperties(parse_mode=ParseMode.HTML)
+        )
+        register_tenant(tenant, bot)
+        bots[tenant.name] = bot
+    return bots
+
+def create_multibot_dispatcher(tenants: List[Tenant], bots: Dict[str, Bot]) -> Dispatcher:
+    """Build one Dispatcher serving every tenant's vertical"""
+    business_types = []
+    for tenant in tenants:
+        if tenant.business_type not in business_types:
+            business_types.append(tenant.business_type)
+    
+    # Tenant stores are loaded below; the default ones are never used here
+    dp = create_dispatcher(",".join(business_types), load_stores=False)
+    dp.update.outer_middleware(TenantMiddleware())
+    
+    async def on_startup() -> None:
+        """Load every tenant's store and set its webhook"""
+        for tenant in tenants:
+            token = current_tenant.set(tenant.name)
+            try:
+                get_vertical(tenant.business_type).load_store()
+            finally:
+                current_tenant.reset(token)
+            
+            if config.webhook_url:
+                url = f"{config.webhook_url}{config.webhook_path}/{tenant.name}"
+                await bots[tenant.name].set_webhook(url, secret_token=tenant.secret_token)
+                logger.info(f"Webhook for {tenant.name} set to {url}")
+    
+    dp.startup.register(on_startup)
+    return dp
+
+def main() -> None:
+    """Serve all tenants from one process and one connection pool"""
+    sock = listening_socket(config.webapp_host, config.webapp_port)
+    tenants = load_tenants()
+    session = create_session(config)
+    bots = create_tenant_bots(tenants, session)
+    dp = create_multibot_dispatcher(tenants, bots)
+    
+    app = web.Application()
+    handler = TenantRequestHandler(dispatcher=dp, bots=bots)
+    if config.webhook_ingress == "queue":
+        handler = QueuedRequestHandler(
+            handler,
+            workers=config.ingress_workers,
+            max_queue=config.ingress_queue_size
+        )
+        dp["ingress"] = handler
+    # Drain before the webhook handler closes the shared session
+    dp["lifecycle"].setup_app(app, sock, dp.get("ingress"))
+    handler.register(app, path=f"{config.webhook_path}/{{tenant}}")
+    add_health_route(app, dp.get("ingress"))
+    setup_application(app, dp)
+    
+    wait_for_predecessor(config.drain_timeout + 30)
+    logger.info(f"Serving {len(tenants)} tenants")
+    web.run_app(app, sock=sock)
+
+if __name__ == "__main__":
+    main()
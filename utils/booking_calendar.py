@@ -0,0 +1,163 @@
+# utils/booking_calendar.py
+import logging
+import time
+from datetime import date, datetime, timedelta
+from typing import Callable, Dict, List, Optional, Sequence, Set, Tuple
+from zoneinfo import ZoneInfo, ZoneInfoNotFoundError
+
+from aiogram.types import InlineKeyboardButton, InlineKeyboardMarkup
+
+from keyboards.callbacks import DatePick, ServicePick, TimePick
+
+logger = logging.getLogger(__name__)
+
+# Bookable times: every 30 minutes from 9 AM to 6 PM
+TIME_SLOTS = [f"{hour:02d}:{minute:02d}" for hour in range(9, 18) for minute in (0, 30)]
+
+def business_zone(name: Optional[str] = None) -> ZoneInfo:
+    """Zone of BUSINESS_TIMEZONE (or `name`); UTC if it is unknown"""
+    if name is None:
+        from config import config
+        name = config.business_timezone
+    try:
+        return ZoneInfo(name)
+    except (ZoneInfoNotFoundError, ValueError):
+        logger.warning(f"Unknown business timezone {name!r}, using UTC")
+        return ZoneInfo("UTC")
+
+class BookingCalendar:
+    """Date and time slot keyboards of the booking flow
+    
+    Buttons are built once per local day for each locale and service; each
+    request only picks free or taken buttons for the slots already booked and
+    reuses the last keyboard while nothing changed. Everything is dropped at
+    midnight in the business timezone.
+    """
+    
+    def __init__(self, time_slots: Sequence[str], days: int = 14, closed_weekdays: Sequence[int] = (6,),
+                 timezone: Optional[str] = None, row_size: int = 3):
+        self.time_slots = list(time_slots)
+        self.days = days
+        self.closed_weekdays = set(closed_weekdays)
+        self.row_size = row_size
+        self.timezone = timezone
+        self._tz: Optional[ZoneInfo] = None
+        self.today: Optional[date] = None
+        self.dates: List[str] = []
+        self._rollover_at = 0.0
+        # (locale, service_id) -> date buttons; (locale, service_id, date) -> (free, taken) slot buttons
+        self._day_buttons: Dict[Tuple[str, int], List[Tuple[InlineKeyboardButton, InlineKeyboardButton]]] = {}
+        self._slot_buttons: Dict[Tuple[str, int, str], List[Tuple[InlineKeyboardButton, InlineKeyboardButton]]] = {}
+        # Last keyboard per key with the availability it was built for
+        self._views: Dict[tuple, Tuple[tuple, InlineKeyboardMarkup]] = {}
+        self.stats = {"built": 0, "reused": 0, "rollovers": 0}
+    
+    @property
+    def tz(self) -> ZoneInfo:
+        if self._tz is None:
+            if self.timezone is None:
+                from config import config
+                self.timezone = config.business_timezone
+            self._tz = business_zone(self.timezone)
+        return self._tz
+    
+    def now(self) -> datetime:
+        return datetime.now(self.tz)
+    
+    def _roll(self):
+        """Start a new day when local midnight has passed"""
+        if time.time() < self._rollover_at:
+            return
+        today = self.now().date()
+        tomorrow = datetime.combine(today + timedelta(days=1), datetime.min.time(), tzinfo=self.tz)
+        self._rollover_at = tomorrow.timestamp()
+        if today == self.today:
+            return
+        
+        self.today = today
+        self.dates = [
+            day.isoformat()
+            for day in (today + timedelta(days=offset) for offset in range(self.days))
+            if day.weekday() not in self.closed_weekdays
+        ]
+        self._day_buttons.clear()
+        self._slot_buttons.clear()
+        self._views.clear()
+        self.stats["rollovers"] += 1
+        logger.info(f"Booking calendar rolled over to {today} ({self.timezone})")
+    
+    def is_bookable(self, day: str) -> bool:
+        """Whether a date (YYYY-MM-DD) is in the current booking window"""
+        self._roll()
+        return day in self.dates
+    
+    def is_past(self, day: str, slot: str) -> bool:
+        """Whether a slot has already started in the business timezone"""
+        now = self.now()
+        return day < now.date().isoformat() or (day == now.date().isoformat() and slot <= now.strftime("%H:%M"))
+    
+    def _view(self, key: tuple, state: tuple, build) -> InlineKeyboardMarkup:
+        cached = self._views.get(key)
+        if cached is not None and cached[0] == state:
+            self.stats["reused"] += 1
+            return cached[1]
+        markup = build()
+        self._views[key] = (state, markup)
+        self.stats["built"] += 1
+        return markup
+    
+    def day_keyboard(self, locale, service_id: int, booked: Callable[[str], Set[str]]) -> InlineKeyboardMarkup:
+        """Dates of the booking window; fully booked dates are marked"""
+        self._roll()
+        key = (locale.code, service_id)
+        buttons = self._day_buttons.get(key)
+        if buttons is None:
+            weekdays, months = locale.list("weekdays"), locale.list("months")
+            buttons = self._day_buttons[key] = []
+            for day in self.dates:
+                value = date.fromisoformat(day)
+                label = locale("booking.date_button", weekday=weekdays[value.weekday()],
+                               month=months[value.month - 1], day=value.day)
+                buttons.append((
+                    InlineKeyboardButton(text=label, callback_data=DatePick(service_id, value).pack()),
+                    InlineKeyboardButton(text=locale("button.day_full", label=label), callback_data="day_full")
+                ))
+        
+        full = tuple(len(booked(day)) >= len(self.time_slots) for day in self.dates)
+        return self._view(key, full, lambda: InlineKeyboardMarkup(inline_keyboard=[
+            [button[taken]] for button, taken in zip(buttons, full)
+        ] + [[InlineKeyboardButton(text=locale["button.back_to_services"], callback_data="book_appointment")]]))
+    
+    def slot_keyboard(self, locale, service_id: int, day: str, booked: Set[str]) -> Optional[InlineKeyboardMarkup]:
+        """Time slots of a date with booked ones marked and past ones left out; None outside the window"""
+        if not self.is_bookable(day):
+            return None
+        key = (locale.code, service_id, day)
+        buttons = self._slot_buttons.get(key)
+        if buttons is None:
+            value = date.fromisoformat(day)
+            buttons = self._slot_buttons[key] = [
+                (
+                    InlineKeyboardButton(
+                        text=slot, callback_data=TimePick(service_id, value, datetime.strptime(slot, "%H:%M").time()).pack()
+                    ),
+                    InlineKeyboardButton(text=locale("button.slot_taken", time=slot), callback_data="slot_taken")
+                )
+                for slot in self.time_slots
+            ]
+        
+        # Slots before `first` have started already (only today)
+        first = 0
+        if day == self.today.isoformat():
+            current = self.now().strftime("%H:%M")
+            while first < len(self.time_slots) and self.time_slots[first] <= current:
+                first += 1
+        taken = tuple(slot in booked for slot in self.time_slots[first:])
+        
+        def build() -> InlineKeyboardMarkup:
+            row_buttons = [pair[is_taken] for pair, is_taken in zip(buttons[first:], taken)]
+            rows = [row_buttons[i:i + self.row_size] for i in range(0, len(row_buttons), self.row_size)]
+            rows.append([InlineKeyboardButton(text=locale["button.back_to_dates"], callback_data=ServicePick(service_id).pack())])
+            return InlineKeyboardMarkup(inline_keyboard=rows)
+        
+        return self._view(key, (first, taken), build)
@@ -0,0 +1,271 @@
+# utils/callbacks.py
+import dataclasses
+import logging
+from datetime import date, time
+from typing import Any, Callable, ClassVar, Dict, List, Literal, Optional, Sequence, Tuple, Type, Union, get_args, get_origin, get_type_hints
+
+from aiogram import Router
+from aiogram.dispatcher.event.handler import FilterObject, HandlerObject
+from aiogram.filters import Filter
+from aiogram.types import CallbackQuery
+
+logger = logging.getLogger(__name__)
+
+# Telegram rejects buttons with longer callback data
+MAX_CALLBACK_BYTES = 64
+SEPARATOR = "_"
+# Escapes the separator (and itself) inside str fields
+ESCAPE = "~"
+
+BASE62 = "0123456789abcdefghijklmnopqrstuvwxyzABCDEFGHIJKLMNOPQRSTUVWXYZ"
+BASE62_VALUES = {char: value for value, char in enumerate(BASE62)}
+# Dates are packed as days since this one
+EPOCH = date(2000, 1, 1).toordinal()
+
+def to_base62(value: int) -> str:
+    if value < 0:
+        raise ValueError(f"Cannot pack negative value {value}")
+    digits = ""
+    while True:
+        value, digit = divmod(value, 62)
+        digits = BASE62[digit] + digits
+        if not value:
+            return digits
+
+def from_base62(text: str) -> int:
+    if not text:
+        raise ValueError("Empty base62 value")
+    value = 0
+    for char in text:
+        value = value * 62 + BASE62_VALUES[char]
+    return value
+
+def _pack_str(value: str) -> str:
+    return value.replace(ESCAPE, ESCAPE * 2).replace(SEPARATOR, ESCAPE + "-")
+
+def _unpack_str(text: str) -> str:
+    if ESCAPE not in text:
+        return text
+    chars = []
+    escaped = False
+    for char in text:
+        if escaped:
+            if char not in (ESCAPE, "-"):
+                raise ValueError(f"Invalid escape {ESCAPE + char!r} in {text!r}")
+            chars.append(ESCAPE if char == ESCAPE else SEPARATOR)
+            escaped = False
+        elif char == ESCAPE:
+            escaped = True
+        else:
+            chars.append(char)
+    if escaped:
+        raise ValueError(f"Unfinished escape in {text!r}")
+    return "".join(chars)
+
+def _pack_date(value: date) -> str:
+    return to_base62(value.toordinal() - EPOCH)
+
+def _unpack_date(text: str) -> date:
+    # ISO dates come from keyboards sent before dates were packed
+    if len(text) == 10:
+        return date.fromisoformat(text)
+    return date.fromordinal(from_base62(text) + EPOCH)
+
+def _pack_time(value: time) -> str:
+    return to_base62(value.hour * 60 + value.minute)
+
+def _unpack_time(text: str) -> time:
+    if ":" in text:
+        return time.fromisoformat(text)
+    hour, minute = divmod(from_base62(text), 60)
+    return time(hour, minute)
+
+def _unpack_bool(text: str) -> bool:
+    if text not in ("0", "1"):
+        raise ValueError(f"Invalid flag {text!r}")
+    return text == "1"
+
+# Field type -> (pack, unpack). Ints stay decimal, so data of keyboards sent before stays valid.
+FIELD_CODECS: Dict[Any, Tuple[Callable[[Any], str], Callable[[str], Any]]] = {
+    int: (str, int),
+    str: (_pack_str, _unpack_str),
+    bool: (lambda value: "1" if value else "0", _unpack_bool),
+    date: (_pack_date, _unpack_date),
+    time: (_pack_time, _unpack_time)
+}
+
+def _choice_codec(choices: Tuple[str, ...]):
+    def check(value: str) -> str:
+        if value not in choices:
+            raise ValueError(f"{value!r} is not one of {choices}")
+        return value
+    
+    def pack(value: str) -> str:
+        return _pack_str(check(value))
+    
+    def unpack(text: str) -> str:
+        return check(_unpack_str(text))
+    return pack, unpack
+
+class CallbackSchema:
+    """Typed callback payload packed as "<prefix>_<field>_<field>..."
+    
+    Not aiogram's CallbackData: payloads are routed by CallbackRoutes and
+    fields are packed compactly, but there is no `.filter()`.
+    
+    Subclasses declare a prefix and annotated fields and become frozen
+    dataclasses:
+        
+        class TimePick(CallbackSchema, prefix="time"):
+            service_id: int
+            day: date
+            slot: time
+    
+    Supported field types are int, str, bool, date, time and Literal[...]
+    of strings. Dates and times are packed in base62 (3 and 2 characters);
+    in str values the separator is escaped as "~-" and "~" as "~~".
+    """
+    
+    __prefix__: ClassVar[str]
+    # (field name, pack, unpack) in declaration order
+    __codecs__: ClassVar[Tuple[Tuple[str, Callable[[Any], str], Callable[[str], Any]], ...]]
+    
+    def __init_subclass__(cls, prefix: str, **kwargs: Any):
+        super().__init_subclass__(**kwargs)
+        if not prefix or any(not part for part in prefix.split(SEPARATOR)):
+            raise ValueError(f"Invalid callback prefix {prefix!r}")
+        cls.__prefix__ = prefix
+        dataclasses.dataclass(frozen=True)(cls)
+        
+        hints = get_type_hints(cls)
+        codecs = []
+        for field in dataclasses.fields(cls):
+            hint = hints[field.name]
+            if get_origin(hint) is Literal:
+                codecs.append((field.name, *_choice_codec(get_args(hint))))
+            elif hint in FIELD_CODECS:
+                codecs.append((field.name, *FIELD_CODECS[hint]))
+            else:
+                raise TypeError(f"{cls.__name__}.{field.name}: unsupported callback field type {hint}")
+        cls.__codecs__ = tuple(codecs)
+    
+    def pack(self) -> str:
+        """Callback data string; ValueError if it exceeds Telegram's 64 bytes"""
+        data = SEPARATOR.join([self.__prefix__] + [pack(getattr(self, name)) for name, pack, _ in self.__codecs__])
+        if len(data.encode("utf-8")) > MAX_CALLBACK_BYTES:
+            raise ValueError(f"Callback data {data!r} is longer than {MAX_CALLBACK_BYTES} bytes")
+        return data
+    
+    @classmethod
+    def from_parts(cls, parts: List[str]):
+        """Build from the fields that follow the prefix; ValueError if they don't fit"""
+        if len(parts) != len(cls.__codecs__):
+            raise ValueError(f"{cls.__name__} takes {len(cls.__codecs__)} fields, got {len(parts)}")
+        return cls(*[unpack(part) for (_, _, unpack), part in zip(cls.__codecs__, parts)])
+    
+    @classmethod
+    def unpack(cls, data: str):
+        """Parse a callback data string of this schema"""
+        prefix = cls.__prefix__ + SEPARATOR
+        if not data.startswith(prefix):
+            raise ValueError(f"{data!r} is not {cls.__name__} data")
+        return cls.from_parts(data[len(prefix):].split(SEPARATOR))
+
+Target = Union[str, Type[CallbackSchema]]
+
+class CallbackRoutes:
+    """Callback query dispatch table of a router
+    
+    Static data ("menu", "shop_cart") is looked up in a dict. Schema
+    prefixes are kept in a trie of separator-delimited parts, so routing
+    walks the data once, whatever the number of handlers, and the longest
+    prefix wins: "shop_add_5" and "shop_cart" or "course_5" and "courses"
+    cannot shadow each other.
+    
+    The router gets a single callback handler whose filter does the lookup.
+    Each route is an aiogram HandlerObject: its own filters run next, and
+    the filter hands the route to aiogram as `handler`, so inner middlewares
+    see the route's flags. Handlers receive the parsed schema as
+    `callback_data`. Data with no route, or whose route filters fail, is
+    passed on to the next router.
+    """
+    
+    def __init__(self, router: Optional[Router] = None):
+        self._static: Dict[str, HandlerObject] = {}
+        # part -> child node; the None key holds a node's (schema, handler)
+        self._trie: Dict[Any, Any] = {}
+        if router is not None:
+            router.callback_query.register(self.dispatch, self.match)
+    
+    def add(self, target: Target, handler: Callable[..., Any], *filters: Any,
+            flags: Optional[Dict[str, Any]] = None):
+        """Route a data string or schema to a handler, with aiogram filters and flags"""
+        flags = dict(flags or {})
+        for item in filters:
+            if isinstance(item, Filter):
+                item.update_handler_flags(flags=flags)
+        route = HandlerObject(callback=handler, filters=[FilterObject(item) for item in filters], flags=flags)
+        
+        if isinstance(target, str):
+            if target in self._static:
+                raise ValueError(f"Callback data {target!r} is already routed")
+            self._static[target] = route
+            return
+        
+        node = self._trie
+        for part in target.__prefix__.split(SEPARATOR):
+            node = node.setdefault(part, {})
+        if None in node:
+            raise ValueError(f"Callback prefix {target.__prefix__!r} is already routed")
+        node[None] = (target, route)
+    
+    def route(self, *targets: Target, filters: Sequence[Any] = (), flags: Optional[Dict[str, Any]] = None):
+        """Decorator routing static data strings and/or schemas to a handler"""
+        def decorator(handler):
+            for target in targets:
+                self.add(target, handler, *filters, flags=flags)
+            return handler
+        return decorator
+    
+    def resolve(self, data: str) -> Optional[Tuple[HandlerObject, Optional[CallbackSchema]]]:
+        """Handler and parsed payload for callback data; None if nothing matches"""
+        handler = self._static.get(data)
+        if handler is not None:
+            return handler, None
+        
+        parts = data.split(SEPARATOR)
+        node, found, depth = self._trie, None, 0
+        for position, part in enumerate(parts):
+            node = node.get(part)
+            if node is None:
+                break
+            if None in node:
+                found, depth = node[None], position + 1
+        if found is None:
+            return None
+        
+        schema, handler = found
+        try:
+            return handler, schema.from_parts(parts[depth:])
+        except (ValueError, KeyError) as e:
+            logger.debug(f"Malformed callback data {data!r}: {e}")
+            return None
+    
+    async def match(self, callback: CallbackQuery, **kwargs: Any) -> Union[bool, Dict[str, Any]]:
+        """Filter of the router's callback handler: the route and its data, if its filters pass"""
+        resolved = self.resolve(callback.data or "")
+        if resolved is None:
+            return False
+        route, callback_data = resolved
+        if callback_data is not None:
+            kwargs["callback_data"] = callback_data
+        passed, data = await route.check(callback, **kwargs)
+        if not passed:
+            return False
+        # Replaces aiogram's "handler" before the inner middlewares run
+        data["handler"] = route
+        return data
+    
+    @staticmethod
+    async def dispatch(callback: CallbackQuery, handler: HandlerObject, **kwargs: Any) -> Any:
+        return await handler.call(callback, handler=handler, **kwargs)
@@ -0,0 +1,77 @@
+# utils/dedup.py
+import logging
+from typing import Any, Awaitable, Callable, Dict, Tuple
+
+from aiogram import BaseMiddleware
+from aiogram.types import TelegramObject, Update
+
+from database.codecs import get_codec
+from database.recent_keys import RecentKeys
+from database.snapshots import SnapshotWriter
+
+logger = logging.getLogger(__name__)
+
+class UpdateDeduplicator(BaseMiddleware):
+    """Outer update middleware that drops updates it has already handled
+    
+    Telegram redelivers updates whose delivery it could not confirm: after a
+    polling restart, a webhook timeout or a crash. The last `size`
+    (bot_id, update_id) pairs are kept in a ring buffer and saved every
+    `save_every` updates and on shutdown, so redeliveries are recognised
+    across restarts too.
+    """
+    
+    def __init__(self, path: str = "database/seen_updates.json", size: int = 10000, save_every: int = 100):
+        self.recent = RecentKeys(size)
+        self.snapshots = SnapshotWriter(path, get_codec(), generations=1)
+        self.save_every = save_every
+        self._unsaved = 0
+        self.stats: Dict[str, int] = {"handled": 0, "duplicates": 0}
+    
+    def load(self):
+        """Restore the window saved by the previous run"""
+        try:
+            saved = self.snapshots.load()
+        except ValueError as e:
+            logger.warning(f"Ignoring unreadable update window: {e}")
+            saved = None
+        for bot_id, update_id in (saved or {}).get("updates", []):
+            self.recent.add((bot_id, update_id))
+        logger.info(f"Restored {len(self.recent)} recent update IDs")
+    
+    def __contains__(self, key: Tuple[int, int]) -> bool:
+        """Whether a (bot_id, update_id) pair has been handled recently"""
+        return key in self.recent
+    
+    def to_json(self) -> Dict[str, Any]:
+        return {"updates": [list(key) for key in self.recent.to_list()]}
+    
+    async def flush(self):
+        """Save the window and wait for the write"""
+        self.snapshots.save(self.to_json)
+        await self.snapshots.flush()
+        self._unsaved = 0
+    
+    async def __call__(
+        self,
+        handler: Callable[[TelegramObject, Dict[str, Any]], Awaitable[Any]],
+        event: Update,
+        data: Dict[str, Any]
+    ) -> Any:
+        key = (data["bot"].id, event.update_id)
+        if not self.recent.add(key):
+            self.stats["duplicates"] += 1
+            logger.info(f"Skipping redelivered update {event.update_id}")
+            return None
+        
+        self.stats["handled"] += 1
+        self._unsaved += 1
+        if self._unsaved >= self.save_every:
+            self._unsaved = 0
+            self.snapshots.save(self.to_json)
+        try:
+            return await handler(event, data)
+        except BaseException:
+            # Not confirmed either (see LifecycleManager), so a redelivery is handled again
+            self.recent.discard(key)
+            raise
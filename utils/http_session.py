@@ -0,0 +1,115 @@
+# utils/http_session.py
+import time
+from typing import Any, Dict
+
+from aiohttp import ClientSession, TraceConfig
+from aiohttp.hdrs import USER_AGENT
+from aiohttp.http import SERVER_SOFTWARE
+from aiogram.__meta__ import __version__
+from aiogram.client.session.aiohttp import AiohttpSession
+
+from database.codecs import get_codec
+
+class ConnectionStats:
+    """Connection reuse counters for the Bot API session"""
+    
+    def __init__(self):
+        self.requests = 0
+        self.created = 0
+        self.reused = 0
+        self.queued = 0
+        self.queue_wait = 0.0
+        self.connect_time = 0.0
+    
+    def as_dict(self) -> Dict[str, Any]:
+        return {
+            "requests": self.requests,
+            "created": self.created,
+            "reused": self.reused,
+            "reuse_ratio": round(self.reused / self.requests, 3) if self.requests else 0.0,
+            "queued": self.queued,
+            "avg_queue_wait_ms": round(self.queue_wait / self.queued * 1000, 2) if self.queued else 0.0,
+            "avg_connect_ms": round(self.connect_time / self.created * 1000, 2) if self.created else 0.0
+        }
+    
+    def trace_config(self) -> TraceConfig:
+        """aiohttp trace hooks feeding these counters"""
+        trace_config = TraceConfig()
+        
+        async def on_request_start(session, context, params):
+            self.requests += 1
+        
+        async def on_queued_start(session, context, params):
+            context.queued_at = time.perf_counter()
+        
+        async def on_queued_end(session, context, params):
+            self.queued += 1
+            self.queue_wait += time.perf_counter() - context.queued_at
+        
+        async def on_create_start(session, context, params):
+            context.connect_started_at = time.perf_counter()
+        
+        async def on_create_end(session, context, params):
+            self.created += 1
+            self.connect_time += time.perf_counter() - context.connect_started_at
+        
+        async def on_reuse(session, context, params):
+            self.reused += 1
+        
+        trace_config.on_request_start.append(on_request_start)
+        trace_config.on_connection_queued_start.append(on_queued_start)
+        trace_config.on_connection_queued_end.append(on_queued_end)
+        trace_config.on_connection_create_start.append(on_create_start)
+        trace_config.on_connection_create_end.append(on_create_end)
+        trace_config.on_connection_reuseconn.append(on_reuse)
+        return trace_config
+
+class TunedAiohttpSession(AiohttpSession):
+    """aiogram session with a configurable connector and reuse statistics"""
+    
+    def __init__(
+        self,
+        limit: int = 100,
+        limit_per_host: int = 0,
+        keepalive_timeout: float = 30.0,
+        ttl_dns_cache: int = 3600,
+        **kwargs: Any
+    ):
+        super().__init__(limit=limit, **kwargs)
+        self._connector_init.update(
+            limit_per_host=limit_per_host,
+            keepalive_timeout=keepalive_timeout,
+            ttl_dns_cache=ttl_dns_cache
+        )
+        self.stats = ConnectionStats()
+    
+    async def create_session(self) -> ClientSession:
+        if self._should_reset_connector:
+            await self.close()
+        
+        if self._session is None or self._session.closed:
+            self._session = ClientSession(
+                connector=self._connector_type(**self._connector_init),
+                headers={
+                    USER_AGENT: f"{SERVER_SOFTWARE} aiogram/{__version__}",
+                },
+                trace_configs=[self.stats.trace_config()]
+            )
+            self._should_reset_connector = False
+        
+        return self._session
+
+def create_session(bot_config) -> TunedAiohttpSession:
+    """Build the Bot API session from BotConfig settings"""
+    # aiohttp has no HTTP/1.1 pipelining; persistent keep-alive connections
+    # are the closest thing and are what keepalive_timeout controls.
+    codec = get_codec()
+    return TunedAiohttpSession(
+        limit=bot_config.http_pool_size,
+        limit_per_host=bot_config.http_pool_per_host,
+        keepalive_timeout=bot_config.http_keepalive,
+        ttl_dns_cache=bot_config.http_dns_ttl,
+        timeout=bot_config.http_timeout,
+        json_loads=codec.loads,
+        json_dumps=codec.dumps_str
+    )
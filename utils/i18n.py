@@ -0,0 +1,143 @@
+# utils/i18n.py
+import json
+import logging
+import os
+from string import Formatter
+from typing import Any, Callable, Dict, Iterable, List, Mapping, Optional, Tuple, Union
+
+logger = logging.getLogger(__name__)
+
+LOCALES_DIR = "locales"
+DEFAULT_LOCALE = "en"
+
+# A compiled template: the finished string when it has no fields, else a
+# renderer called with a mapping of the field values
+Template = Union[str, Callable[[Mapping[str, Any]], str]]
+
+def _parse(text: str) -> Tuple[List[Tuple[str, str, Optional[str], str]], str]:
+    """Split a template into (literal, field, conversion, spec) parts and the trailing literal"""
+    parts = []
+    pending = ""
+    for literal, field, spec, conversion in Formatter().parse(text):
+        # Escaped braces split the literal text into several pieces
+        pending += literal
+        if field is None:
+            continue
+        if not field.isidentifier() or "{" in (spec or "") or conversion not in (None, "r", "s", "a"):
+            raise ValueError(f"Unsupported template field {field!r} in {text!r}")
+        parts.append((pending, field, conversion, spec or ""))
+        pending = ""
+    return parts, pending
+
+def compile_template(text: str) -> Template:
+    """Compile a str.format-style template into a renderer of a mapping
+    
+    Fields must be plain names (with an optional conversion and format spec),
+    e.g. "{name} - ${price:.2f}"; values are only formatted, never evaluated
+    or looked into. Templates without fields are returned as finished strings.
+    Up to three plain fields are rendered by concatenating the literal parts
+    with the formatted values, which beats str.format_map; longer templates
+    use format_map itself.
+    """
+    parts, tail = _parse(text)
+    if not parts:
+        return tail
+    if len(parts) > 3 or any(conversion for _, _, conversion, _ in parts):
+        return text.format_map
+    if len(parts) == 1:
+        (l0, f0, _, s0), = parts
+        return lambda values: l0 + format(values[f0], s0) + tail
+    if len(parts) == 2:
+        (l0, f0, _, s0), (l1, f1, _, s1) = parts
+        return lambda values: l0 + format(values[f0], s0) + l1 + format(values[f1], s1) + tail
+    (l0, f0, _, s0), (l1, f1, _, s1), (l2, f2, _, s2) = parts
+    return lambda values: (
+        l0 + format(values[f0], s0) + l1 + format(values[f1], s1) + l2 + format(values[f2], s2) + tail
+    )
+
+class Locale(dict):
+    """Compiled templates of one language
+    
+    The locale itself maps the keys of templates without fields to their
+    finished strings, so static text is a plain lookup: t["menu.title"].
+    The others are rendered from keyword arguments in __call__ and from each
+    row (which may carry extra keys, e.g. catalog items) in join().
+    """
+    
+    # Compared and hashed by identity, e.g. as part of render cache keys
+    __eq__ = object.__eq__
+    __hash__ = object.__hash__
+    
+    def __init__(self, code: str, messages: Mapping[str, Any]):
+        super().__init__()
+        self.code = code
+        self.templates: Dict[str, Template] = {}
+        self.lists: Dict[str, List[str]] = {}
+        for key, value in messages.items():
+            if isinstance(value, list):
+                self.lists[key] = value
+                continue
+            template = self.templates[key] = compile_template(value)
+            if isinstance(template, str):
+                self[key] = template
+    
+    def __call__(self, key: str, **values: Any) -> str:
+        """Render a template; static ones are returned as they are"""
+        template = self.templates[key]
+        return template if template.__class__ is str else template(values)
+    
+    def join(self, key: str, rows: Iterable[Mapping[str, Any]], separator: str = "") -> str:
+        """Render a template once per row and concatenate the results"""
+        template = self.templates[key]
+        if isinstance(template, str):
+            # Static row text: repeated once per row
+            return separator.join(template for _ in rows)
+        return separator.join(map(template, rows))
+    
+    def list(self, key: str) -> List[str]:
+        return self.lists[key]
+    
+    def __contains__(self, key: object) -> bool:
+        return key in self.templates
+
+class Translations:
+    """All locales, compiled once; missing keys fall back to the default locale"""
+    
+    def __init__(self, directory: str = LOCALES_DIR, default: str = DEFAULT_LOCALE):
+        self.directory = directory
+        self.default = default
+        self.locales: Dict[str, Locale] = {}
+        # language_code (e.g. "ru-RU") -> locale, filled on first sight
+        self._resolved: Dict[Optional[str], Locale] = {}
+    
+    def load(self):
+        """Read and compile every locale file"""
+        sources = {}
+        for name in sorted(os.listdir(self.directory)):
+            code, extension = os.path.splitext(name)
+            if extension == ".json":
+                with open(os.path.join(self.directory, name), encoding="utf-8") as file:
+                    sources[code] = json.load(file)
+        
+        base = sources[self.default]
+        self.locales = {code: Locale(code, {**base, **messages}) for code, messages in sources.items()}
+        self._resolved = {}
+        logger.info(f"Compiled {len(base)} templates for locales: {', '.join(self.locales)}")
+    
+    def get(self, language_code: Optional[str] = None) -> Locale:
+        """Locale for a Telegram language_code, e.g. "ru" or "pt-br" """
+        locale = self._resolved.get(language_code)
+        if locale is None:
+            if not self.locales:
+                self.load()
+            code = (language_code or "").lower()
+            locale = self.locales.get(code) or self.locales.get(code.split("-")[0]) or self.locales[self.default]
+            self._resolved[language_code] = locale
+        return locale
+
+# Global translations instance
+translations = Translations()
+
+def get_locale(user: Any = None) -> Locale:
+    """Locale of a Telegram user (the default locale for None)"""
+    return translations.get(user.language_code if user is not None else None)
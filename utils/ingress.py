@@ -0,0 +1,123 @@
+# utils/ingress.py
+import asyncio
+import logging
+from typing import Any, Dict, List, Optional
+
+from aiohttp import web
+from aiogram import Bot
+from aiogram.methods import TelegramMethod
+from aiogram.webhook.aiohttp_server import BaseRequestHandler
+
+logger = logging.getLogger(__name__)
+
+class QueuedRequestHandler(BaseRequestHandler):
+    """Webhook ingress that acknowledges updates immediately
+    
+    The request is authenticated by the wrapped handler and put on a bounded
+    queue that a pool of workers drains. Updates already handled are answered
+    at once from the dispatcher's UpdateDeduplicator window (dp["dedup"]),
+    which stays the only record of seen updates. When the queue is full the
+    update is refused with 503 so Telegram redelivers it later instead of the
+    process piling up work.
+    """
+    
+    def __init__(self, inner: BaseRequestHandler, workers: int = 8, max_queue: int = 1000, **data: Any):
+        super().__init__(dispatcher=inner.dispatcher, handle_in_background=True, **{**inner.data, **data})
+        self.inner = inner
+        self.workers = workers
+        self.queue: asyncio.Queue = asyncio.Queue(maxsize=max_queue)
+        self.dedup = inner.dispatcher.get("dedup")
+        self._worker_tasks: List[asyncio.Task] = []
+        self.stats: Dict[str, int] = {
+            "accepted": 0,
+            "duplicates": 0,
+            "shed": 0,
+            "processed": 0,
+            "failed": 0
+        }
+    
+    def register(self, app: web.Application, /, path: str, **kwargs: Any) -> None:
+        app.on_startup.append(self._start_workers)
+        super().register(app, path=path, **kwargs)
+    
+    async def _start_workers(self, app: web.Application) -> None:
+        self._worker_tasks = [asyncio.create_task(self._worker()) for _ in range(self.workers)]
+    
+    async def _worker(self) -> None:
+        while True:
+            bot, update = await self.queue.get()
+            try:
+                result = await self.dispatcher.feed_raw_update(bot=bot, update=update, **self.data)
+                if isinstance(result, TelegramMethod):
+                    await self.dispatcher.silent_call_request(bot=bot, result=result)
+                self.stats["processed"] += 1
+            except Exception as e:
+                self.stats["failed"] += 1
+                logger.error(f"Update {update.get('update_id')} failed: {e}")
+            finally:
+                self.queue.task_done()
+    
+    def queue_info(self) -> Dict[str, Any]:
+        return {"depth": self.queue.qsize(), "capacity": self.queue.maxsize, "workers": self.workers, **self.stats}
+    
+    async def resolve_bot(self, request: web.Request) -> Bot:
+        return await self.inner.resolve_bot(request)
+    
+    def verify_secret(self, telegram_secret_token: str, bot: Bot) -> bool:
+        return self.inner.verify_secret(telegram_secret_token, bot)
+    
+    async def drain(self, timeout: float = 10) -> bool:
+        """Wait until every queued update has been processed"""
+        try:
+            await asyncio.wait_for(self.queue.join(), timeout=timeout)
+            return True
+        except asyncio.TimeoutError:
+            logger.warning(f"Dropping {self.queue.qsize()} queued updates on shutdown")
+            return False
+    
+    async def close(self) -> None:
+        """Stop workers once the queue is drained (or after a short wait)"""
+        await self.drain()
+        for task in self._worker_tasks:
+            task.cancel()
+        await asyncio.gather(*self._worker_tasks, return_exceptions=True)
+        await self.inner.close()
+    
+    async def handle(self, request: web.Request) -> web.Response:
+        bot = await self.resolve_bot(request)
+        if not self.verify_secret(request.headers.get("X-Telegram-Bot-Api-Secret-Token", ""), bot):
+            return web.Response(body="Unauthorized", status=401)
+        
+        try:
+            update = await request.json(loads=bot.session.json_loads)
+            update_id = int(update["update_id"])
+        except (ValueError, KeyError, TypeError):
+            return web.Response(body="Bad Request", status=400)
+        
+        # The middleware records the update when it is handled; a copy
+        # redelivered while the first is still queued is dropped there
+        if self.dedup is not None and (bot.id, update_id) in self.dedup:
+            self.stats["duplicates"] += 1
+            return web.Response(status=200)
+        
+        try:
+            self.queue.put_nowait((bot, update))
+        except asyncio.QueueFull:
+            # Nothing is recorded, so Telegram's retry of a shed update is accepted
+            self.stats["shed"] += 1
+            return web.Response(body="Overloaded", status=503, headers={"Retry-After": "1"})
+        
+        self.stats["accepted"] += 1
+        return web.Response(status=200)
+    
+    __call__ = handle
+
+def add_health_route(app: web.Application, handler: Optional[QueuedRequestHandler] = None, path: str = "/health"):
+    """GET /health with the ingress queue depth and counters"""
+    async def health(request: web.Request) -> web.Response:
+        body = {"status": "ok"}
+        if handler is not None:
+            body["ingress"] = handler.queue_info()
+        return web.json_response(body)
+    
+    app.router.add_get(path, health)
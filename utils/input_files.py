@@ -0,0 +1,23 @@
+# utils/input_files.py
+from typing import AsyncGenerator, Iterable
+
+from aiogram import Bot
+from aiogram.types.input_file import InputFile, DEFAULT_CHUNK_SIZE
+
+class IterInputFile(InputFile):
+    """Upload a document produced chunk by chunk, without building it in memory"""
+    
+    def __init__(self, chunks: Iterable[bytes], filename: str, chunk_size: int = DEFAULT_CHUNK_SIZE):
+        super().__init__(filename=filename, chunk_size=chunk_size)
+        self.chunks = chunks
+    
+    async def read(self, bot: Bot) -> AsyncGenerator[bytes, None]:
+        # Coalesce small chunks (e.g. CSV rows) into upload-sized ones
+        pending = bytearray()
+        for chunk in self.chunks:
+            pending += chunk
+            if len(pending) >= self.chunk_size:
+                yield bytes(pending)
+                pending.clear()
+        if pending:
+            yield bytes(pending)
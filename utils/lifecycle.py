@@ -0,0 +1,238 @@
+# utils/lifecycle.py
+import asyncio
+import logging
+import os
+import select
+import signal
+import socket
+import subprocess
+import sys
+import time
+from typing import Any, Awaitable, Callable, Dict, Optional, Set
+
+from aiohttp import web
+from aiogram import BaseMiddleware, Bot
+from aiogram.types import TelegramObject, Update
+
+from database.codecs import get_codec
+from database.snapshots import SnapshotWriter
+
+logger = logging.getLogger(__name__)
+
+# Environment variables through which a restarted process receives the
+# listening socket and the pipes used to coordinate with its predecessor
+HANDOFF_SOCKET_FD = "HANDOFF_SOCKET_FD"
+HANDOFF_READY_FD = "HANDOFF_READY_FD"
+HANDOFF_GO_FD = "HANDOFF_GO_FD"
+
+class LifecycleManager(BaseMiddleware):
+    """Outer update middleware that tracks in-flight updates for shutdown
+    
+    On shutdown the running handlers get up to `drain_timeout` seconds to
+    finish before storage is flushed. The next polling offset of each bot and
+    the time the drain took are saved for the next run; the offset never
+    passes an update that is still running or whose handler failed, so those
+    are redelivered instead of being confirmed.
+    """
+    
+    def __init__(self, state_path: str = "database/lifecycle.json", drain_timeout: float = 25.0):
+        self.drain_timeout = drain_timeout
+        self.snapshots = SnapshotWriter(state_path, get_codec(), generations=1)
+        self.in_flight = 0
+        self._idle = asyncio.Event()
+        self._idle.set()
+        self._drained = False
+        self._handoff_fd: Optional[int] = None
+        # Next update_id to request per bot, as saved by the previous run
+        self.offsets: Dict[int, int] = {}
+        # Per bot: one past the highest handled update, and the updates that
+        # are still running or failed
+        self._handled: Dict[int, int] = {}
+        self._running: Dict[int, Set[int]] = {}
+        self._failed: Dict[int, Set[int]] = {}
+        self.stats: Dict[str, Any] = {
+            "last_drain_ms": None,
+            "previous_drain_ms": None,
+            "abandoned": 0
+        }
+    
+    def load(self):
+        """Restore offsets saved by the previous run"""
+        try:
+            saved = self.snapshots.load() or {}
+        except ValueError as e:
+            logger.warning(f"Ignoring unreadable lifecycle state: {e}")
+            saved = {}
+        self.offsets = {int(bot_id): offset for bot_id, offset in saved.get("offsets", {}).items()}
+        self.stats["previous_drain_ms"] = saved.get("last_drain_ms")
+    
+    def next_offset(self, bot_id: int) -> Optional[int]:
+        """Offset confirming the handled updates, but none still running or failed"""
+        unfinished = self._running.get(bot_id, set()) | self._failed.get(bot_id, set())
+        if unfinished:
+            return min(unfinished)
+        return self._handled.get(bot_id, self.offsets.get(bot_id))
+    
+    def to_json(self) -> Dict[str, Any]:
+        offsets = {bot_id: self.next_offset(bot_id) for bot_id in {*self.offsets, *self._handled, *self._running}}
+        return {
+            "offsets": {str(bot_id): offset for bot_id, offset in offsets.items() if offset is not None},
+            "last_drain_ms": self.stats["last_drain_ms"]
+        }
+    
+    async def save(self):
+        """Write offsets and drain time and wait for the write"""
+        self.snapshots.save(self.to_json)
+        await self.snapshots.flush()
+    
+    async def __call__(
+        self,
+        handler: Callable[[TelegramObject, Dict[str, Any]], Awaitable[Any]],
+        event: Update,
+        data: Dict[str, Any]
+    ) -> Any:
+        bot_id = data["bot"].id
+        running = self._running.setdefault(bot_id, set())
+        running.add(event.update_id)
+        self.in_flight += 1
+        self._idle.clear()
+        try:
+            return await handler(event, data)
+        except BaseException:
+            self._failed.setdefault(bot_id, set()).add(event.update_id)
+            raise
+        finally:
+            self.in_flight -= 1
+            running.discard(event.update_id)
+            if event.update_id >= self._handled.get(bot_id, 0):
+                self._handled[bot_id] = event.update_id + 1
+            if not self.in_flight:
+                self._idle.set()
+    
+    async def drain(self, ingress=None) -> float:
+        """Wait for queued and running updates, at most `drain_timeout` seconds
+        
+        Returns the drain time in milliseconds. Only the first call waits.
+        """
+        if self._drained:
+            return self.stats["last_drain_ms"]
+        self._drained = True
+        
+        started = time.perf_counter()
+        if ingress is not None:
+            await ingress.drain(self.drain_timeout)
+        remaining = self.drain_timeout - (time.perf_counter() - started)
+        try:
+            await asyncio.wait_for(self._idle.wait(), max(remaining, 0))
+        except asyncio.TimeoutError:
+            self.stats["abandoned"] = self.in_flight
+            logger.warning(f"{self.in_flight} handlers still running after {self.drain_timeout}s drain deadline")
+        
+        drain_ms = round((time.perf_counter() - started) * 1000, 1)
+        self.stats["last_drain_ms"] = drain_ms
+        logger.info(f"Drained in-flight updates in {drain_ms} ms")
+        return drain_ms
+    
+    async def confirm_offset(self, bot: Bot):
+        """Tell Telegram (polling mode) that every handled update is done
+        
+        Updates abandoned by the drain or failed are left unconfirmed.
+        """
+        offset = self.next_offset(bot.id)
+        if offset is None:
+            return
+        try:
+            await bot.get_updates(offset=offset, limit=1, timeout=0)
+        except Exception as e:
+            logger.warning(f"Could not confirm polling offset {offset}: {e}")
+    
+    async def hand_off(self, sock: socket.socket, timeout: float = 60.0) -> bool:
+        """Start a new copy of this process on the same listening socket
+        
+        Returns once the new process has finished its imports and is
+        waiting for this one to exit. Connections arriving in between wait
+        in the socket backlog instead of being refused.
+        """
+        ready_read, ready_write = os.pipe()
+        go_read, go_write = os.pipe()
+        env = {
+            **os.environ,
+            HANDOFF_SOCKET_FD: str(sock.fileno()),
+            HANDOFF_READY_FD: str(ready_write),
+            HANDOFF_GO_FD: str(go_read)
+        }
+        process = subprocess.Popen(
+            [sys.executable, *sys.argv],
+            env=env,
+            pass_fds=(sock.fileno(), ready_write, go_read)
+        )
+        os.close(ready_write)
+        os.close(go_read)
+        
+        ready = await asyncio.to_thread(_read_with_timeout, ready_read, timeout)
+        os.close(ready_read)
+        if not ready:
+            logger.error(f"Replacement process {process.pid} did not start; keeping this one")
+            process.kill()
+            # Reap it so no zombie is left behind
+            await asyncio.to_thread(process.wait)
+            os.close(go_write)
+            return False
+        
+        # Closed when this process exits, which lets the new one start serving
+        self._handoff_fd = go_write
+        logger.info(f"Handing over to process {process.pid}")
+        return True
+    
+    def setup_app(self, app: web.Application, sock: socket.socket, ingress=None):
+        """Drain on shutdown and hand over to a new process on SIGHUP
+        
+        Call before registering the webhook handler so that the drain runs
+        before the handler closes the bot session.
+        """
+        async def restart() -> None:
+            if await self.hand_off(sock):
+                os.kill(os.getpid(), signal.SIGTERM)
+        
+        async def on_startup(app: web.Application) -> None:
+            if hasattr(signal, "SIGHUP"):
+                asyncio.get_running_loop().add_signal_handler(
+                    signal.SIGHUP, lambda: asyncio.ensure_future(restart())
+                )
+        
+        async def on_shutdown(app: web.Application) -> None:
+            await self.drain(ingress)
+        
+        app.on_startup.append(on_startup)
+        app.on_shutdown.append(on_shutdown)
+
+def _read_with_timeout(fd: int, timeout: float) -> bytes:
+    """Read from a pipe; empty on timeout or when the writer closed it"""
+    readable, _, _ = select.select([fd], [], [], timeout)
+    return os.read(fd, 64) if readable else b""
+
+def listening_socket(host: str, port: int, backlog: int = 1024) -> socket.socket:
+    """The socket inherited from the previous process, or a newly bound one"""
+    fd = os.environ.pop(HANDOFF_SOCKET_FD, None)
+    if fd is not None:
+        logger.info("Took over listening socket from the previous process")
+        return socket.socket(fileno=int(fd))
+    return socket.create_server((host, port), backlog=backlog)
+
+def wait_for_predecessor(timeout: float = 60.0):
+    """After a hand-off, report readiness and wait until the old process exits
+    
+    The old process flushes its storage before exiting, so the stores must
+    only be loaded after this returns. Does nothing on a normal start.
+    """
+    ready_fd = os.environ.pop(HANDOFF_READY_FD, None)
+    go_fd = os.environ.pop(HANDOFF_GO_FD, None)
+    if ready_fd is None or go_fd is None:
+        return
+    
+    os.write(int(ready_fd), b"ready")
+    os.close(int(ready_fd))
+    started = time.perf_counter()
+    _read_with_timeout(int(go_fd), timeout)
+    os.close(int(go_fd))
+    logger.info(f"Previous process finished after {(time.perf_counter() - started) * 1000:.0f} ms")
@@ -0,0 +1,87 @@
+# utils/maintenance.py
+import asyncio
+import logging
+import time
+from typing import Any, Callable, Dict, Iterable, Optional
+
+logger = logging.getLogger(__name__)
+
+class MaintenanceJob:
+    """Background task expiring idle carts and compacting storage
+    
+    Each store is swept in small time slices; between slices control goes back
+    to the event loop so updates are never delayed by more than one slice.
+    """
+    
+    def __init__(self, cart_ttl: float = 72 * 3600, interval: float = 600, slice_ms: float = 5.0):
+        self.cart_ttl = cart_ttl
+        self.interval = interval
+        self.slice = slice_ms / 1000
+        self._task: Optional[asyncio.Task] = None
+        self.stats: Dict[str, Any] = {
+            "runs": 0,
+            "last_run": None,
+            "last_duration_ms": 0.0,
+            "max_slice_ms": 0.0,
+            "carts_expired": 0,
+            "carts_emptied": 0,
+            "carts_skipped": 0,
+            "compactions": 0
+        }
+    
+    def start(self, get_stores: Callable[[], Iterable[Any]]):
+        """Run sweeps periodically over the stores returned by get_stores()"""
+        if self._task is None or self._task.done():
+            self._task = asyncio.create_task(self._run(get_stores))
+    
+    async def stop(self):
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+    
+    async def _run(self, get_stores: Callable[[], Iterable[Any]]):
+        while True:
+            await asyncio.sleep(self.interval)
+            try:
+                await self.run_once(get_stores())
+            except Exception as e:
+                logger.error(f"Maintenance run failed: {e}")
+    
+    async def run_once(self, stores: Iterable[Any]):
+        """Sweep every store once, in time slices"""
+        started = time.perf_counter()
+        now = time.time()
+        for store in stores:
+            sweep = store.sweep_carts(self.cart_ttl, now)
+            result = None
+            while result is None:
+                slice_started = time.perf_counter()
+                try:
+                    while time.perf_counter() - slice_started < self.slice:
+                        next(sweep)
+                except StopIteration as stop:
+                    result = stop.value
+                slice_ms = (time.perf_counter() - slice_started) * 1000
+                self.stats["max_slice_ms"] = max(self.stats["max_slice_ms"], round(slice_ms, 2))
+                await asyncio.sleep(0)
+            
+            expired, emptied, stamped, skipped = result
+            self.stats["carts_expired"] += expired
+            self.stats["carts_emptied"] += emptied
+            self.stats["carts_skipped"] += skipped
+            if expired or emptied or stamped:
+                # Rewrites the snapshot without the removed entries; only a view of
+                # the store is taken here, the encode and write run in a thread
+                store.save_data()
+                self.stats["compactions"] += 1
+        
+        self.stats["runs"] += 1
+        self.stats["last_run"] = time.strftime("%Y-%m-%d %H:%M:%S")
+        self.stats["last_duration_ms"] = round((time.perf_counter() - started) * 1000, 1)
+
+# Global maintenance job
+maintenance = MaintenanceJob()
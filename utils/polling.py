@@ -0,0 +1,176 @@
+# utils/polling.py
+import asyncio
+import logging
+import signal
+import time
+from collections import deque
+from contextlib import suppress
+from typing import Any, Deque, Dict, List, Optional
+
+from aiogram import Bot, Dispatcher
+from aiogram.methods import GetUpdates, TelegramMethod
+from aiogram.types import Update
+
+logger = logging.getLogger(__name__)
+
+class UpdateLag:
+    """Recent delays between an update's creation and its handler starting"""
+    
+    def __init__(self, samples: int = 1000):
+        self._samples: Deque[float] = deque(maxlen=samples)
+        self.count = 0
+        self.max = 0.0
+    
+    def add(self, lag: float):
+        self._samples.append(lag)
+        self.count += 1
+        self.max = max(self.max, lag)
+    
+    def percentile(self, fraction: float) -> float:
+        if not self._samples:
+            return 0.0
+        ordered = sorted(self._samples)
+        return ordered[min(int(len(ordered) * fraction), len(ordered) - 1)]
+    
+    def as_dict(self) -> Dict[str, Any]:
+        return {
+            "count": self.count,
+            "p50_ms": round(self.percentile(0.5) * 1000, 1),
+            "p95_ms": round(self.percentile(0.95) * 1000, 1),
+            "max_ms": round(self.max * 1000, 1)
+        }
+
+class PollingRunner:
+    """Long polling with prefetch and a bounded number of running handlers
+    
+    One task keeps a getUpdates request open while another feeds the
+    previous batch to the dispatcher, at most `concurrency` handlers at a
+    time. Two lags are tracked: from the server date of messages to their
+    handler starting (`server_lag`, whole-second resolution) and from
+    receiving any update to its handler starting (`queue_lag`).
+    """
+    
+    def __init__(
+        self,
+        dispatcher: Dispatcher,
+        timeout: int = 30,
+        limit: int = 100,
+        concurrency: int = 64,
+        allowed_updates: Optional[List[str]] = None,
+        prefetch: int = 1
+    ):
+        self.dispatcher = dispatcher
+        self.timeout = timeout
+        self.limit = limit
+        self.concurrency = concurrency
+        self.allowed_updates = allowed_updates or dispatcher.resolve_used_update_types()
+        self._batches: asyncio.Queue = asyncio.Queue(maxsize=prefetch)
+        self._slots = asyncio.Semaphore(concurrency)
+        self._tasks = set()
+        self._stop = asyncio.Event()
+        self.server_lag = UpdateLag()
+        self.queue_lag = UpdateLag()
+        self.stats: Dict[str, int] = {"requests": 0, "updates": 0, "errors": 0}
+    
+    def stop(self):
+        self._stop.set()
+    
+    async def _fetch(self, bot: Bot, offset: Optional[int]):
+        backoff = 1.0
+        while True:
+            try:
+                updates = await bot(
+                    GetUpdates(offset=offset, limit=self.limit, timeout=self.timeout, allowed_updates=self.allowed_updates),
+                    request_timeout=self.timeout + 10
+                )
+            except Exception as e:
+                self.stats["errors"] += 1
+                logger.error(f"getUpdates failed: {e}; retrying in {backoff:.0f}s")
+                await asyncio.sleep(backoff)
+                backoff = min(backoff * 2, 30.0)
+                continue
+            backoff = 1.0
+            self.stats["requests"] += 1
+            if updates:
+                self.stats["updates"] += len(updates)
+                offset = updates[-1].update_id + 1
+                # Blocks while the previous batch is still waiting for handler slots
+                await self._batches.put((time.time(), updates))
+    
+    async def _process(self, bot: Bot, data: Dict[str, Any]):
+        while True:
+            received, updates = await self._batches.get()
+            for update in updates:
+                await self._slots.acquire()
+                task = asyncio.create_task(self._handle(bot, update, received, data))
+                self._tasks.add(task)
+                task.add_done_callback(self._tasks.discard)
+    
+    async def _handle(self, bot: Bot, update: Update, received: float, data: Dict[str, Any]):
+        try:
+            now = time.time()
+            self.queue_lag.add(now - received)
+            date = getattr(update.event, "date", None)
+            if date is not None:
+                self.server_lag.add(max(now - date.timestamp(), 0.0))
+            
+            result = await self.dispatcher.feed_update(bot, update, **data)
+            if isinstance(result, TelegramMethod):
+                await self.dispatcher.silent_call_request(bot=bot, result=result)
+        except Exception as e:
+            logger.exception(f"Update {update.update_id} failed: {e}")
+        finally:
+            self._slots.release()
+    
+    async def _cancel_handlers(self):
+        """Cancel the handlers still running after the shutdown drain and wait for them"""
+        running = list(self._tasks)
+        for task in running:
+            task.cancel()
+        await asyncio.gather(*running, return_exceptions=True)
+        if running:
+            logger.warning(f"Cancelled {len(running)} handlers still running at shutdown")
+    
+    def as_dict(self) -> Dict[str, Any]:
+        return {
+            **self.stats,
+            "running": len(self._tasks),
+            "server_lag": self.server_lag.as_dict(),
+            "queue_lag": self.queue_lag.as_dict()
+        }
+    
+    async def run(self, bot: Bot, **kwargs: Any):
+        """Poll until SIGINT/SIGTERM, with the dispatcher's startup and shutdown hooks"""
+        loop = asyncio.get_running_loop()
+        with suppress(NotImplementedError):
+            loop.add_signal_handler(signal.SIGTERM, self.stop)
+            loop.add_signal_handler(signal.SIGINT, self.stop)
+        
+        data = {"dispatcher": self.dispatcher, "bots": [bot], **self.dispatcher.workflow_data, **kwargs}
+        await self.dispatcher.emit_startup(bot=bot, **data)
+        
+        # Continue after the last update the previous run handled
+        lifecycle = self.dispatcher.get("lifecycle")
+        offset = lifecycle.offsets.get(bot.id) if lifecycle is not None else None
+        logger.info(
+            f"Polling for {', '.join(self.allowed_updates)} "
+            f"(timeout {self.timeout}s, limit {self.limit}, {self.concurrency} handlers)"
+        )
+        
+        workers = [
+            asyncio.create_task(self._fetch(bot, offset)),
+            asyncio.create_task(self._process(bot, data))
+        ]
+        try:
+            await self._stop.wait()
+        finally:
+            logger.info("Polling stopped")
+            # Prefetched but unhandled updates are not confirmed and will be redelivered
+            for task in workers:
+                task.cancel()
+            await asyncio.gather(*workers, return_exceptions=True)
+            try:
+                await self.dispatcher.emit_shutdown(bot=bot, **data)
+            finally:
+                # Handlers must not outlive the bot session, closed by the caller next
+                await self._cancel_handlers()
@@ -0,0 +1,135 @@
+# utils/profiler.py
+import os
+import sys
+import threading
+import time
+from collections import Counter
+from types import CodeType, FrameType
+from typing import Any, Dict, List, Optional, Tuple
+
+# Frames in these directories identify the handler a sample belongs to
+HANDLER_DIRS = (os.sep + "handlers" + os.sep,)
+
+class SamplingProfiler:
+    """Samples the event loop thread's stack from a background thread
+    
+    Stacks are counted per handler (the outermost frame in a handlers/
+    module) and exported in collapsed-stack format for flame graphs. The
+    sampler measures its own cost and halves the sampling rate whenever it
+    exceeds `max_overhead` of wall time; `max_samples` bounds memory.
+    """
+    
+    def __init__(self, interval: float = 0.005, max_overhead: float = 0.01,
+                 max_interval: float = 0.1, max_samples: int = 100000):
+        self.interval = interval
+        self.max_overhead = max_overhead
+        self.max_interval = max_interval
+        self.max_samples = max_samples
+        self.stacks: Counter = Counter()
+        self.samples = 0
+        self.overhead = 0.0
+        self._labels: Dict[CodeType, str] = {}
+        self._thread: Optional[threading.Thread] = None
+        self._stop = threading.Event()
+        self._target: Optional[int] = None
+        self._root = os.getcwd() + os.sep
+        self._stdlib = os.path.dirname(os.__file__) + os.sep
+        self._duration = 0.0
+        self._effective_interval = interval
+    
+    @property
+    def running(self) -> bool:
+        return self._thread is not None and self._thread.is_alive()
+    
+    def start(self):
+        """Start sampling the calling thread (the one running the event loop)"""
+        if self.running:
+            raise RuntimeError("Profiler is already running")
+        self.stacks.clear()
+        self.samples = 0
+        self.overhead = 0.0
+        self._target = threading.get_ident()
+        self._stop.clear()
+        self._thread = threading.Thread(target=self._run, name="sampling-profiler", daemon=True)
+        self._thread.start()
+    
+    def stop(self):
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join()
+            self._thread = None
+    
+    def _label(self, code: CodeType) -> str:
+        label = self._labels.get(code)
+        if label is None:
+            filename = code.co_filename
+            if filename.startswith(self._root):
+                filename = filename[len(self._root):]
+            elif "site-packages" + os.sep in filename:
+                filename = filename.split("site-packages" + os.sep, 1)[1]
+            elif filename.startswith(self._stdlib):
+                filename = filename[len(self._stdlib):]
+            label = f"{code.co_name} ({filename}:{code.co_firstlineno})"
+            self._labels[code] = label
+        return label
+    
+    def _capture(self, frame: Optional[FrameType]) -> Tuple[str, ...]:
+        codes: List[CodeType] = []
+        while frame is not None:
+            codes.append(frame.f_code)
+            frame = frame.f_back
+        codes.reverse()
+        
+        handler = "<loop>"
+        for code in codes:
+            filename = code.co_filename
+            if filename.startswith(self._root) and any(part in filename for part in HANDLER_DIRS):
+                handler = code.co_name
+                break
+        if codes and codes[-1].co_name in ("select", "poll", "_run_once") and handler == "<loop>":
+            handler = "<idle>"
+        return (handler, *(self._label(code) for code in codes))
+    
+    def _run(self):
+        started = time.perf_counter()
+        spent = 0.0
+        interval = self.interval
+        while not self._stop.wait(interval) and self.samples < self.max_samples:
+            sample_started = time.perf_counter()
+            frame = sys._current_frames().get(self._target)
+            self.stacks[self._capture(frame)] += 1
+            self.samples += 1
+            spent += time.perf_counter() - sample_started
+            
+            elapsed = time.perf_counter() - started
+            self.overhead = spent / elapsed
+            if self.overhead > self.max_overhead and interval < self.max_interval:
+                interval = min(interval * 2, self.max_interval)
+        self._effective_interval = interval
+        self._duration = time.perf_counter() - started
+    
+    def by_handler(self) -> List[Tuple[str, int]]:
+        """Sample counts per handler, busiest first"""
+        totals: Counter = Counter()
+        for stack, count in self.stacks.items():
+            totals[stack[0]] += count
+        return totals.most_common()
+    
+    def collapsed(self) -> str:
+        """Stacks in collapsed format ("handler;frame;frame count" per line)"""
+        return "".join(
+            ";".join(stack) + f" {count}\n"
+            for stack, count in sorted(self.stacks.items(), key=lambda item: -item[1])
+        )
+    
+    def summary(self) -> Dict[str, Any]:
+        return {
+            "samples": self.samples,
+            "duration_s": round(self._duration, 2),
+            "interval_ms": round(self._effective_interval * 1000, 1),
+            "overhead_pct": round(self.overhead * 100, 2),
+            "handlers": self.by_handler()
+        }
+
+# Global profiler instance; one session at a time
+profiler = SamplingProfiler()
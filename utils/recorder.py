@@ -0,0 +1,220 @@
+# utils/recorder.py
+import asyncio
+import glob
+import hashlib
+import logging
+import os
+import struct
+import time
+import zlib
+from typing import Any, Awaitable, Callable, Dict, Iterable, Iterator, List, Optional
+
+from aiogram import BaseMiddleware
+from aiogram.types import TelegramObject, Update
+
+from database.codecs import get_codec
+
+logger = logging.getLogger(__name__)
+
+# Keys holding a user or chat object, whose "id" is replaced
+PARTY_KEYS = {"from", "user", "chat", "sender_chat", "forward_from", "forward_from_chat",
+              "new_chat_member", "old_chat_member", "via_bot"}
+# Personal strings, replaced by pseudonyms
+PERSONAL_KEYS = {"first_name", "last_name", "username", "title", "phone_number", "email", "bio", "vcard"}
+# Free text typed by users: masked, except for the command word
+TEXT_KEYS = {"text", "caption", "query"}
+# File and chat tokens, replaced by pseudonyms of the same shape
+TOKEN_KEYS = {"file_id", "file_unique_id", "chat_instance", "inline_message_id"}
+# Dropped entirely
+DROPPED_KEYS = {"location", "venue", "contact", "live_period", "user_shared", "users_shared"}
+
+# Pseudonymous user ID given to the admins, so admin flows can be replayed with ADMIN_ID=1
+ADMIN_PSEUDONYM = 1
+
+BLOCK_MAGIC = b"REC1"
+BLOCK_HEADER = struct.Struct("<4sII")
+
+class Anonymizer:
+    """Replaces identities and typed text in update JSON
+    
+    IDs are mapped through a keyed hash, so one user keeps the same pseudonym
+    within a recording (and across recordings made with the same secret).
+    Masked text keeps its UTF-16 length and whitespace, so message entities
+    still line up.
+    """
+    
+    def __init__(self, secret: Optional[bytes] = None, admin_ids: Iterable[int] = ()):
+        self.secret = secret or os.urandom(16)
+        self.admin_ids = set(admin_ids)
+    
+    def _digest(self, value: Any) -> int:
+        digest = hashlib.blake2b(str(value).encode(), key=self.secret, digest_size=6).digest()
+        return int.from_bytes(digest, "big")
+    
+    def party_id(self, value: int) -> int:
+        if value in self.admin_ids:
+            return ADMIN_PSEUDONYM
+        # Group and channel IDs stay negative
+        pseudonym = self._digest(value) % 10 ** 12 + 1000
+        return -pseudonym if value < 0 else pseudonym
+    
+    def name(self, value: str) -> str:
+        return f"anon{self._digest(value) % 10 ** 6:06d}"
+    
+    def token(self, value: str) -> str:
+        return hashlib.blake2b(value.encode(), key=self.secret, digest_size=max(4, len(value) // 2)).hexdigest()[:len(value)]
+    
+    @staticmethod
+    def mask(text: str) -> str:
+        command, _, rest = text.partition(" ") if text.startswith("/") else ("", "", text)
+        masked = "".join(
+            char if char.isspace() else ("x" if ord(char) < 0x10000 else "xx")
+            for char in rest
+        )
+        return f"{command} {masked}" if command and rest else command or masked
+    
+    def anonymize(self, value: Any, key: Optional[str] = None) -> Any:
+        """Anonymized copy of a JSON value"""
+        if isinstance(value, dict):
+            result = {}
+            for child_key, child in value.items():
+                if child_key in DROPPED_KEYS:
+                    continue
+                if key in PARTY_KEYS and child_key == "id" or child_key == "user_id":
+                    result[child_key] = self.party_id(child)
+                elif child_key in PERSONAL_KEYS and isinstance(child, str):
+                    result[child_key] = self.name(child)
+                elif child_key in TEXT_KEYS and isinstance(child, str):
+                    result[child_key] = self.mask(child)
+                elif child_key in TOKEN_KEYS and isinstance(child, str):
+                    result[child_key] = self.token(child)
+                else:
+                    result[child_key] = self.anonymize(child, child_key)
+            return result
+        if isinstance(value, list):
+            return [self.anonymize(child, key) for child in value]
+        return value
+
+def iter_records(path: str) -> Iterator[Dict[str, Any]]:
+    """Records of a segment file; a truncated last block is skipped"""
+    codec = get_codec()
+    with open(path, "rb") as f:
+        raw = f.read()
+    offset = 0
+    while offset + BLOCK_HEADER.size <= len(raw):
+        magic, count, size = BLOCK_HEADER.unpack_from(raw, offset)
+        offset += BLOCK_HEADER.size
+        if magic != BLOCK_MAGIC or offset + size > len(raw):
+            return
+        lines = zlib.decompress(raw[offset:offset + size]).split(b"\n")
+        offset += size
+        for line in lines[:count]:
+            yield codec.loads(line)
+
+def recording_files(path: str) -> List[str]:
+    """Segment files of a recording directory (or the file itself), oldest first"""
+    if os.path.isdir(path):
+        return sorted(glob.glob(os.path.join(path, "updates-*.rec")))
+    return [path]
+
+class UpdateRecorder(BaseMiddleware):
+    """Outer update middleware writing anonymized updates with their timing
+    
+    Each record holds the arrival time, the handling time in ms and the
+    anonymized update. Records are written as zlib-compressed blocks of
+    `block_size` records (or after `flush_interval` seconds) to rotating
+    segment files; only the newest `max_segments` are kept. Opt-in with
+    RECORD_UPDATES=1; replay with benchmarks/replay.py.
+    """
+    
+    def __init__(self, directory: str = "database/recordings", anonymizer: Optional[Anonymizer] = None,
+                 block_size: int = 256, flush_interval: float = 30.0,
+                 segment_bytes: int = 8 * 1024 * 1024, max_segments: int = 16):
+        self.directory = directory
+        self.anonymizer = anonymizer or Anonymizer()
+        self.block_size = block_size
+        self.flush_interval = flush_interval
+        self.segment_bytes = segment_bytes
+        self.max_segments = max_segments
+        self.codec = get_codec()
+        self._buffer: List[bytes] = []
+        self._buffer_started = 0.0
+        self._segment: Optional[str] = None
+        self._task: Optional[asyncio.Task] = None
+        self.stats = {"recorded": 0, "blocks": 0, "bytes": 0}
+    
+    async def __call__(
+        self,
+        handler: Callable[[TelegramObject, Dict[str, Any]], Awaitable[Any]],
+        event: Update,
+        data: Dict[str, Any]
+    ) -> Any:
+        arrived = time.time()
+        started = time.perf_counter()
+        error = None
+        try:
+            return await handler(event, data)
+        except Exception as e:
+            error = type(e).__name__
+            raise
+        finally:
+            self.record(event, arrived, (time.perf_counter() - started) * 1000, error)
+    
+    def record(self, update: Update, arrived: float, handled_ms: float, error: Optional[str] = None):
+        raw = update.model_dump(mode="json", exclude_none=True, by_alias=True)
+        record = {"ts": round(arrived, 4), "ms": round(handled_ms, 3), "update": self.anonymizer.anonymize(raw)}
+        if error:
+            record["error"] = error
+        if not self._buffer:
+            self._buffer_started = arrived
+        self._buffer.append(self.codec.dumps(record))
+        self.stats["recorded"] += 1
+        if len(self._buffer) >= self.block_size or arrived - self._buffer_started >= self.flush_interval:
+            self._write_buffer()
+    
+    def segments(self) -> List[str]:
+        return recording_files(self.directory) if os.path.isdir(self.directory) else []
+    
+    def _take_block(self) -> Optional[bytes]:
+        if not self._buffer:
+            return None
+        payload = zlib.compress(b"\n".join(self._buffer), 6)
+        block = BLOCK_HEADER.pack(BLOCK_MAGIC, len(self._buffer), len(payload)) + payload
+        self._buffer = []
+        return block
+    
+    def _append(self, block: bytes):
+        os.makedirs(self.directory, exist_ok=True)
+        if self._segment is None or not os.path.exists(self._segment) \
+                or os.path.getsize(self._segment) >= self.segment_bytes:
+            self._segment = os.path.join(self.directory, f"updates-{time.time_ns()}.rec")
+            for old in self.segments()[:-self.max_segments + 1 or None]:
+                os.remove(old)
+        with open(self._segment, "ab") as f:
+            f.write(block)
+        self.stats["blocks"] += 1
+        self.stats["bytes"] += len(block)
+    
+    def _write_buffer(self):
+        block = self._take_block()
+        if block is None:
+            return
+        try:
+            loop = asyncio.get_running_loop()
+        except RuntimeError:
+            self._append(block)
+            return
+        previous = self._task
+        self._task = loop.create_task(self._append_after(previous, block))
+    
+    async def _append_after(self, previous: Optional[asyncio.Task], block: bytes):
+        # Blocks are appended in order
+        if previous is not None:
+            await previous
+        await asyncio.to_thread(self._append, block)
+    
+    async def flush(self):
+        """Write buffered records and wait for pending appends"""
+        self._write_buffer()
+        if self._task is not None:
+            await self._task
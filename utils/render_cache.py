@@ -0,0 +1,77 @@
+# utils/render_cache.py
+import hashlib
+import html
+import re
+from collections import OrderedDict
+from dataclasses import dataclass
+from typing import Any, Hashable, Optional
+
+from aiogram.types import InlineKeyboardMarkup, Message
+
+_TAG = re.compile(r"<[^>]+>")
+
+def _markup_signature(markup: Optional[InlineKeyboardMarkup]) -> str:
+    if markup is None:
+        return ""
+    return "\n".join(
+        "\t".join(f"{button.text}\x1f{button.callback_data or button.url or ''}" for button in row)
+        for row in markup.inline_keyboard
+    )
+
+def _digest(value: str) -> str:
+    return hashlib.blake2b(value.encode("utf-8"), digest_size=16).hexdigest()
+
+def text_fingerprint(html_text: str) -> str:
+    """Hash of the text as Telegram stores it (tags removed, entities decoded, trimmed)"""
+    return _digest(html.unescape(_TAG.sub("", html_text)).strip())
+
+@dataclass(slots=True)
+class RenderedView:
+    text: str
+    reply_markup: Optional[InlineKeyboardMarkup]
+    text_hash: str
+    markup_hash: str
+    
+    @classmethod
+    def build(cls, text: str, reply_markup: Optional[InlineKeyboardMarkup] = None) -> "RenderedView":
+        return cls(text, reply_markup, text_fingerprint(text), _digest(_markup_signature(reply_markup)))
+
+class RenderCache:
+    """Rendered views per key (e.g. user), valid while the source version is unchanged"""
+    
+    def __init__(self, max_entries: int = 10000):
+        self.max_entries = max_entries
+        self._entries: "OrderedDict[Hashable, tuple]" = OrderedDict()
+        self.hits = 0
+        self.misses = 0
+    
+    def get(self, key: Hashable, version: Any) -> Optional[RenderedView]:
+        entry = self._entries.get(key)
+        if entry is None or entry[0] != version:
+            self.misses += 1
+            return None
+        self._entries.move_to_end(key)
+        self.hits += 1
+        return entry[1]
+    
+    def put(self, key: Hashable, version: Any, view: RenderedView):
+        self._entries[key] = (version, view)
+        self._entries.move_to_end(key)
+        while len(self._entries) > self.max_entries:
+            self._entries.popitem(last=False)
+
+async def show_view(message: Message, view: RenderedView) -> bool:
+    """Edit the message into the view, sending only what differs
+    
+    Returns False when the message already shows the view (no request made,
+    so no "message is not modified" error).
+    """
+    same_text = text_fingerprint(html.escape(message.text or "", quote=False)) == view.text_hash
+    same_markup = _digest(_markup_signature(message.reply_markup)) == view.markup_hash
+    if same_text and same_markup:
+        return False
+    if same_text:
+        await message.edit_reply_markup(reply_markup=view.reply_markup)
+    else:
+        await message.edit_text(view.text, reply_markup=view.reply_markup)
+    return True
@@ -0,0 +1,71 @@
+# utils/startup_report.py
+import logging
+import time
+from typing import Any, Awaitable, Callable, Dict, Optional
+
+from aiogram import BaseMiddleware
+from aiogram.types import TelegramObject
+
+logger = logging.getLogger(__name__)
+
+class StartupReport:
+    """Collects cold start timings: imports, storage load and first update"""
+    
+    def __init__(self):
+        self.started_at = time.perf_counter()
+        self.timings: Dict[str, float] = {}
+        self.first_update_at: Optional[float] = None
+    
+    def mark(self, stage: str):
+        """Record the time elapsed since process start for a stage"""
+        self.timings[stage] = time.perf_counter() - self.started_at
+    
+    def measure(self, stage: str) -> "_Stopwatch":
+        """Context manager recording how long a block took"""
+        return _Stopwatch(self, stage)
+    
+    def first_update(self):
+        """Record the arrival of the first update and log the report"""
+        if self.first_update_at is not None:
+            return
+        self.first_update_at = time.perf_counter() - self.started_at
+        self.timings["first_update"] = self.first_update_at
+        self.log()
+    
+    def as_dict(self) -> Dict[str, float]:
+        return {stage: round(seconds * 1000, 1) for stage, seconds in self.timings.items()}
+    
+    def log(self):
+        report = ", ".join(f"{stage}={ms}ms" for stage, ms in self.as_dict().items())
+        logger.info(f"Startup report: {report}")
+
+class _Stopwatch:
+    def __init__(self, report: StartupReport, stage: str):
+        self.report = report
+        self.stage = stage
+    
+    def __enter__(self):
+        self._start = time.perf_counter()
+        return self
+    
+    def __exit__(self, *exc_info):
+        self.report.timings[self.stage] = time.perf_counter() - self._start
+
+class FirstUpdateMiddleware(BaseMiddleware):
+    """Outer update middleware that reports time to the first update"""
+    
+    def __init__(self, report: StartupReport):
+        self.report = report
+    
+    async def __call__(
+        self,
+        handler: Callable[[TelegramObject, Dict[str, Any]], Awaitable[Any]],
+        event: TelegramObject,
+        data: Dict[str, Any]
+    ) -> Any:
+        if self.report.first_update_at is None:
+            self.report.first_update()
+        return await handler(event, data)
+
+# Global startup report, created as early in the process as it is imported
+startup_report = StartupReport()
@@ -0,0 +1,98 @@
+# utils/tenants.py
+import json
+import os
+import secrets
+from dataclasses import dataclass
+from typing import Any, Awaitable, Callable, Dict, List, Optional
+
+from aiohttp import web
+from aiogram import BaseMiddleware, Bot, Dispatcher
+from aiogram.types import TelegramObject
+from aiogram.webhook.aiohttp_server import BaseRequestHandler
+
+from database.tenancy import current_tenant
+from utils.verticals import get_vertical
+
+@dataclass
+class Tenant:
+    """A customer bot served by the multi-bot runner"""
+    name: str
+    token: str
+    admin_id: int
+    business_type: str = "restaurant"
+    secret_token: Optional[str] = None
+
+def load_tenants(path: Optional[str] = None) -> List[Tenant]:
+    """Load tenants from a JSON list of {name, token, admin_id, business_type, secret_token}"""
+    path = path or os.getenv("TENANTS_FILE", "tenants.json")
+    with open(path, "r", encoding="utf-8") as f:
+        tenants = [Tenant(**entry) for entry in json.load(f)]
+    
+    names = [tenant.name for tenant in tenants]
+    if len(set(names)) != len(names):
+        raise ValueError(f"Duplicate tenant names in {path}")
+    return tenants
+
+# Tenant registered for each bot id, used by is_admin and the middleware
+TENANTS_BY_BOT_ID: Dict[int, Tenant] = {}
+TENANTS_BY_NAME: Dict[str, Tenant] = {}
+
+def register_tenant(tenant: Tenant, bot: Bot):
+    TENANTS_BY_BOT_ID[bot.id] = tenant
+    TENANTS_BY_NAME[tenant.name] = tenant
+
+def get_current_tenant() -> Optional[Tenant]:
+    """Tenant whose update is being processed, if any"""
+    name = current_tenant.get()
+    return TENANTS_BY_NAME.get(name) if name else None
+
+class TenantMiddleware(BaseMiddleware):
+    """Outer update middleware selecting the tenant's store namespace and vertical"""
+    
+    async def __call__(
+        self,
+        handler: Callable[[TelegramObject, Dict[str, Any]], Awaitable[Any]],
+        event: TelegramObject,
+        data: Dict[str, Any]
+    ) -> Any:
+        tenant = TENANTS_BY_BOT_ID.get(data["bot"].id)
+        if tenant is None:
+            return await handler(event, data)
+        
+        data["tenant"] = tenant
+        data["vertical"] = get_vertical(tenant.business_type)
+        token = current_tenant.set(tenant.name)
+        try:
+            return await handler(event, data)
+        finally:
+            current_tenant.reset(token)
+
+class TenantRequestHandler(BaseRequestHandler):
+    """Webhook handler resolving the bot from the {tenant} path segment"""
+    
+    def __init__(self, dispatcher: Dispatcher, bots: Dict[str, Bot], handle_in_background: bool = True, **data: Any):
+        super().__init__(dispatcher=dispatcher, handle_in_background=handle_in_background, **data)
+        self.bots = bots
+    
+    def register(self, app: web.Application, /, path: str, **kwargs: Any) -> None:
+        if "{tenant}" not in path:
+            raise ValueError("Path should contain '{tenant}' substring")
+        super().register(app, path=path, **kwargs)
+    
+    async def resolve_bot(self, request: web.Request) -> Bot:
+        bot = self.bots.get(request.match_info["tenant"])
+        if bot is None:
+            raise web.HTTPNotFound()
+        return bot
+    
+    def verify_secret(self, telegram_secret_token: str, bot: Bot) -> bool:
+        tenant = TENANTS_BY_BOT_ID.get(bot.id)
+        if tenant and tenant.secret_token:
+            return secrets.compare_digest(telegram_secret_token, tenant.secret_token)
+        return True
+    
+    async def close(self) -> None:
+        """Close the session shared by all tenant bots"""
+        sessions = {id(bot.session): bot.session for bot in self.bots.values()}
+        for session in sessions.values():
+            await session.close()
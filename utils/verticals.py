@@ -0,0 +1,200 @@
+# utils/verticals.py
+import importlib
+from dataclasses import dataclass, field
+from typing import Any, Awaitable, Callable, Dict, List, Optional
+
+from aiogram import BaseMiddleware, Router
+from aiogram.types import InlineKeyboardMarkup, TelegramObject
+
+@dataclass
+class Vertical:
+    """A business type: its routers, item type, keyboard and default data"""
+    name: str
+    item_type: str
+    router_modules: List[str]
+    categories: List[str]
+    actions: List[Dict[str, str]]
+    welcome_message: str
+    db_file: str
+    default_data: Dict[str, Any] = field(default_factory=dict)
+    # "module:attribute" of an existing store; otherwise an EnhancedDatabaseHelper is created
+    store_path: Optional[str] = None
+    # Called with the user's Locale (or None)
+    keyboard: Optional[Callable[[Any], InlineKeyboardMarkup]] = None
+    _store: Any = field(default=None, init=False, repr=False)
+    
+    def load_routers(self) -> List[Router]:
+        """Import this vertical's handler modules and return their routers"""
+        return [importlib.import_module(name).router for name in self.router_modules]
+    
+    @property
+    def store(self):
+        """Database of this vertical, created on first use"""
+        if self._store is None:
+            if self.store_path:
+                module_name, attribute = self.store_path.split(":")
+                self._store = getattr(importlib.import_module(module_name), attribute)
+            else:
+                from database.enhanced_db_helper import EnhancedDatabaseHelper
+                from database.tenancy import TenantAwareStore, tenant_db_file
+                self._store = TenantAwareStore(
+                    EnhancedDatabaseHelper(self.db_file, default_data=self.default_data),
+                    lambda tenant: EnhancedDatabaseHelper(
+                        tenant_db_file(tenant, self.db_file), default_data=self.default_data
+                    )
+                )
+        return self._store
+    
+    def load_store(self):
+        """Load the store and build the item and search indexes for this vertical only"""
+        self.store.load()
+        if hasattr(self.store, "build_index"):
+            self.store.build_index(self.item_type)
+        self.store.search_index
+    
+    async def flush_store(self):
+        """Wait for pending background saves of this vertical's stores"""
+        if self._store is None:
+            return
+        for store in self._store.all_stores():
+            await store.flush()
+    
+    def get_keyboard(self, locale: Any = None) -> InlineKeyboardMarkup:
+        if self.keyboard is not None:
+            return self.keyboard(locale)
+        from keyboards.main_keyboard import get_actions_keyboard
+        return get_actions_keyboard(self.actions, locale)
+    
+    def get_welcome_message(self, user_name: str, locale: Any = None) -> str:
+        # Localized "welcome.<name>" template, else the built-in English text
+        key = f"welcome.{self.name}"
+        if locale is not None and key in locale:
+            return locale(key, user_name=user_name)
+        return self.welcome_message.format(user_name=user_name)
+
+# Registered verticals by name
+VERTICALS: Dict[str, Vertical] = {}
+
+def register_vertical(vertical: Vertical) -> Vertical:
+    """Register a business type"""
+    VERTICALS[vertical.name] = vertical
+    return vertical
+
+def get_vertical(name: str) -> Vertical:
+    """Get a registered business type by name"""
+    vertical = VERTICALS.get(name)
+    if vertical is None:
+        raise ValueError(f"Unknown business type: {name}")
+    return vertical
+
+class VerticalMiddleware(BaseMiddleware):
+    """Outer update middleware passing the active vertical to handlers as `vertical`"""
+    
+    def __init__(self, vertical: Vertical):
+        self.vertical = vertical
+    
+    async def __call__(
+        self,
+        handler: Callable[[TelegramObject, Dict[str, Any]], Awaitable[Any]],
+        event: TelegramObject,
+        data: Dict[str, Any]
+    ) -> Any:
+        data["vertical"] = self.vertical
+        return await handler(event, data)
+
+def _restaurant_keyboard(locale: Any = None) -> InlineKeyboardMarkup:
+    from keyboards.main_keyboard import get_main_keyboard
+    return get_main_keyboard(locale)
+
+# Built-in verticals
+register_vertical(Vertical(
+    name="restaurant",
+    item_type="menu",
+    router_modules=["handlers.start", "handlers.menu", "handlers.admin", "handlers.search"],
+    categories=["pizza", "burgers", "drinks", "desserts"],
+    actions=[
+        {"text": "🍽️ Menu", "callback": "menu"},
+        {"text": "🛒 Cart", "callback": "cart"}
+    ],
+    welcome_message=(
+        "👋 Hello, {user_name}!\n"
+        "Welcome to our Restaurant Bot!\n\n"
+        "I can help you:\n"
+        "🍽️ Browse our menu\n"
+        "📞 Get contact information\n"
+        "📍 Find our location\n"
+        "⏰ Check opening hours"
+    ),
+    db_file="database/data.json",
+    store_path="database.db_helper:db",
+    keyboard=_restaurant_keyboard
+))
+
+register_vertical(Vertical(
+    name="shop",
+    item_type="products",
+    router_modules=["handlers.start", "handlers.shop", "handlers.admin", "handlers.search"],
+    categories=["clothing", "electronics", "accessories", "books"],
+    actions=[
+        {"text": "🛍️ Shop", "callback": "shop"},
+        {"text": "🛒 Cart", "callback": "shop_cart"}
+    ],
+    welcome_message="👋 Welcome to our Store, {user_name}!\n\nDiscover amazing products at great prices!",
+    db_file="database/shop.json",
+    default_data={
+        "business_type": "shop",
+        "products": {
+            "clothing": [
+                {"id": 1, "name": "T-Shirt", "price": 19.99, "description": "Cotton crew neck t-shirt", "stock": 50},
+                {"id": 2, "name": "Hoodie", "price": 39.99, "description": "Warm fleece hoodie", "stock": 20}
+            ]
+        }
+    }
+))
+
+register_vertical(Vertical(
+    name="booking",
+    item_type="services",
+    router_modules=["handlers.start", "handlers.booking", "handlers.admin", "handlers.search"],
+    categories=["haircut", "massage", "consultation", "therapy"],
+    actions=[
+        {"text": "📅 Book Appointment", "callback": "book_appointment"},
+        {"text": "📋 My Bookings", "callback": "my_bookings"}
+    ],
+    welcome_message="👋 Welcome, {user_name}!\n\nBook your appointment with our professional services.",
+    db_file="database/booking.json",
+    default_data={
+        "business_type": "booking",
+        "services": {
+            "salon": [
+                {"id": 1, "name": "Haircut", "duration": 30, "price": 25.00},
+                {"id": 2, "name": "Hair Coloring", "duration": 90, "price": 80.00},
+                {"id": 3, "name": "Manicure", "duration": 45, "price": 35.00},
+                {"id": 4, "name": "Facial Treatment", "duration": 60, "price": 60.00}
+            ]
+        }
+    }
+))
+
+register_vertical(Vertical(
+    name="education",
+    item_type="courses",
+    router_modules=["handlers.start", "handlers.courses", "handlers.admin", "handlers.search"],
+    categories=["programming", "design", "business", "languages"],
+    actions=[
+        {"text": "📚 Courses", "callback": "courses"},
+        {"text": "📊 My Progress", "callback": "progress"}
+    ],
+    welcome_message="👋 Welcome to our Learning Platform, {user_name}!\n\nStart your educational journey today!",
+    db_file="database/education.json",
+    default_data={
+        "business_type": "education",
+        "courses": {
+            "programming": [
+                {"id": 1, "name": "Python Programming", "lessons": 12, "duration": "6 weeks", "price": 99.00, "level": "Beginner"},
+                {"id": 2, "name": "Web Development", "lessons": 15, "duration": "8 weeks", "price": 149.00, "level": "Intermediate"},
+                {"id": 3, "name": "Data Science", "lessons": 20, "duration": "10 weeks", "price": 199.00, "level": "Advanced"}
+            ]
+        }
+    }
+))
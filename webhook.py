@@ -1,15 +1,17 @@
-import asyncio
+# Imported first so the startup report measures from process start
+from utils.startup_report import startup_report
+
 import logging
 from aiohttp import web
-from aiogram import Bot, Dispatcher
-from aiogram.client.default import DefaultBotProperties
-from aiogram.enums import ParseMode
+from aiogram import Bot
 from aiogram.webhook.aiohttp_server import SimpleRequestHandler, setup_application
 
-from handlers.start import router as start_router
-from handlers.menu import router as menu_router
-from handlers.admin import router as admin_router
+from app_factory import create_bot, create_dispatcher
 from config import config
+from utils.ingress import QueuedRequestHandler, add_health_route
+from utils.lifecycle import listening_socket, wait_for_predecessor
+
+startup_report.mark("imports")
 
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
@@ -17,28 +19,28 @@ logger = logging.getLogger(__name__)
 async def on_startup(bot: Bot) -> None:
     """Set webhook on startup"""
     if config.webhook_url:
-        await bot.set_webhook(f"{config.webhook_url}{config.webhook_path}")
+        await bot.set_webhook(
+            f"{config.webhook_url}{config.webhook_path}",
+            secret_token=config.webhook_secret
+        )
         logger.info(f"Webhook set to {config.webhook_url}{config.webhook_path}")
 
-async def main() -> None:
-    """Main function for webhook mode"""
+def main() -> None:
+    """Main function for webhook mode
+    
+    SIGTERM drains and exits; SIGHUP starts a replacement process on the
+    same socket and then drains and exits.
+    """
+    sock = listening_socket(config.webapp_host, config.webapp_port)
     
     # Initialize Bot and Dispatcher
-    bot = Bot(
-        token=config.token,
-        default=DefaultBotProperties(parse_mode=ParseMode.HTML)
-    )
+    bot = create_bot()
     
-    dp = Dispatcher()
+    dp = create_dispatcher()
     
     # Register startup function
     dp.startup.register(on_startup)
     
-    # Register routers
-    dp.include_router(start_router)
-    dp.include_router(menu_router)
-    dp.include_router(admin_router)
-    
     # Create aiohttp application
     app = web.Application()
     
@@ -46,16 +48,31 @@ async def main() -> None:
     webhook_requests_handler = SimpleRequestHandler(
         dispatcher=dp,
         bot=bot,
+        secret_token=config.webhook_secret
     )
+    if config.webhook_ingress == "queue":
+        webhook_requests_handler = QueuedRequestHandler(
+            webhook_requests_handler,
+            workers=config.ingress_workers,
+            max_queue=config.ingress_queue_size
+        )
+        dp["ingress"] = webhook_requests_handler
+    
+    # Drain before the webhook handler closes the bot session
+    dp["lifecycle"].setup_app(app, sock, dp.get("ingress"))
     
     # Register webhook handler
     webhook_requests_handler.register(app, path=config.webhook_path)
+    add_health_route(app, dp.get("ingress"))
     
     # Setup application
     setup_application(app, dp, bot=bot)
     
+    # After a hand-off, storage is loaded only once the old process has flushed it
+    wait_for_predecessor(config.drain_timeout + 30)
+    
     # Start server
-    web.run_app(app, host=config.webapp_host, port=config.webapp_port)
+    web.run_app(app, sock=sock)
 
 if __name__ == "__main__":
-    asyncio.run(main())
\ No newline at end of file
+    main()